@@ -1,8 +1,12 @@
 import asyncio
+import collections
 import concurrent
 import functools as ft
+import hashlib
 import json
 import os
+import re
+import threading
 import uvloop
 from aiohttp import web
 
@@ -17,7 +21,19 @@ uvloop.install()
 master = os.environ.get('HAIL_APISERVER_SPARK_MASTER')
 hl.init(master=master, min_block_size=0)
 
-app = web.Application()
+
+@web.middleware
+async def compress_responses(request, handler):
+    # request bodies sent with Content-Encoding: gzip are decompressed by
+    # aiohttp; large responses are compressed with an encoding the client
+    # accepts
+    response = await handler(request)
+    if isinstance(response, web.Response) and response.body is not None and len(response.body) > 1024:
+        response.enable_compression()
+    return response
+
+
+app = web.Application(middlewares=[compress_responses])
 routes = web.RouteTableDef()
 
 
@@ -33,14 +49,158 @@ async def run(f, *args):
     return await loop.run_in_executor(executor, f, *args)
 
 
+class LRUCache:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        if self.capacity <= 0:
+            return
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self.entries),
+                'capacity': self.capacity,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else None
+            }
+
+
+type_cache = LRUCache(int(os.environ.get('HAIL_APISERVER_TYPE_CACHE_SIZE', 16384)))
+# results are only cached if the size is set, and only for deterministic
+# queries, see is_deterministic
+result_cache = LRUCache(int(os.environ.get('HAIL_APISERVER_RESULT_CACHE_SIZE', 0)))
+
+
+def payload_hash(code):
+    return hashlib.sha256(code.encode('utf-8')).hexdigest()
+
+
+def parse_ir(kind, code):
+    # parsed IRs are not cached: the JVM infers their types and optimizes
+    # them in place, so one cannot be shared by concurrent requests
+    parse = getattr(Env.hail().expr.ir.IRParser, f'parse_{kind}_ir')
+    return parse(code, {}, {})
+
+
+# queries that read or write data or draw random numbers may give different
+# results each time they run
+nondeterministic_ir = re.compile(r'\((?:ApplySeeded|\w*Read\w*|\w*Write\w*|\w*Export\w*)[\s)]')
+
+
+def is_deterministic(code):
+    return nondeterministic_ir.search(code) is None
+
+
+class UserQueueFull(Exception):
+    pass
+
+
+class AdmissionControl:
+    """Limits the number of running requests of each user to
+    `max_running_per_user`, and rejects requests of users that already have
+    `max_waiting_per_user` requests waiting, so one user cannot take every
+    thread of the executor. A request holds its slot until its thread
+    finishes, even if the client disconnects first."""
+
+    def __init__(self, max_running_per_user, max_waiting_per_user):
+        self.max_running_per_user = max_running_per_user
+        self.max_waiting_per_user = max_waiting_per_user
+        self.semaphores = {}
+        self.running = collections.Counter()
+        self.waiting = collections.Counter()
+
+    async def run(self, user, f, *args):
+        if self.waiting[user] >= self.max_waiting_per_user:
+            raise UserQueueFull(f'too many queued requests for user {user}')
+        semaphore = self.semaphores.get(user)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_running_per_user)
+            self.semaphores[user] = semaphore
+
+        self.waiting[user] += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.waiting[user] -= 1
+        self.running[user] += 1
+        fut = asyncio.ensure_future(run(f, *args))
+
+        def release(fut):
+            self.running[user] -= 1
+            semaphore.release()
+            if not fut.cancelled():
+                # retrieved here in case the request was cancelled
+                fut.exception()
+
+        fut.add_done_callback(release)
+        return await asyncio.shield(fut)
+
+    def stats(self):
+        return {
+            'running': sum(self.running.values()),
+            'waiting': sum(self.waiting.values()),
+            'n_users': sum(1 for user in self.semaphores if self.running[user] or self.waiting[user])
+        }
+
+
+admission = AdmissionControl(int(os.environ.get('HAIL_APISERVER_MAX_RUNNING_PER_USER', 4)),
+                             int(os.environ.get('HAIL_APISERVER_MAX_WAITING_PER_USER', 32)))
+
+
+async def run_for_user(userdata, f, *args):
+    try:
+        return await admission.run(userdata['username'], f, *args)
+    except UserQueueFull as e:
+        raise web.HTTPTooManyRequests(text=json.dumps({'message': e.args[0]}),
+                                      content_type='application/json')
+
+
 @routes.get('/healthcheck')
 async def healthcheck(request):
     del request
     return status_response(200)
 
 
+@routes.get('/stats')
+@authenticated_users_only
+async def stats(request, userdata):
+    del request, userdata
+    return web.json_response({
+        'type_cache': type_cache.stats(),
+        'result_cache': result_cache.stats(),
+        'queue': admission.stats()
+    })
+
+
 def blocking_execute(code):
-    jir = Env.hail().expr.ir.IRParser.parse_value_ir(code, {}, {})
+    jir = parse_ir('value', code)
     typ = hl.dtype(jir.typ().toString())
     result = Env.hc()._jhc.backend().executeJSON(jir)
     return {
@@ -55,7 +215,12 @@ async def execute(request, userdata):
     code = await request.json()
     info(f'execute: {code}')
     try:
-        result = await run(blocking_execute, code)
+        deterministic = result_cache.capacity > 0 and is_deterministic(code)
+        result = result_cache.get(payload_hash(code)) if deterministic else None
+        if result is None:
+            result = await run_for_user(userdata, blocking_execute, code)
+            if deterministic:
+                result_cache.put(payload_hash(code), result)
         info(f'result: {result}')
         return web.json_response(result)
     except FatalError as e:
@@ -64,18 +229,15 @@ async def execute(request, userdata):
         }, status=400)
 
 
-def blocking_value_type(code):
-    jir = Env.hail().expr.ir.IRParser.parse_value_ir(code, {}, {})
-    return jir.typ().toString()
-
-
-@routes.post('/type/value')
-@authenticated_users_only
-async def value_type(request, userdata):
+async def type_response(request, userdata, kind, blocking_type):
     code = await request.json()
-    info(f'value type: {code}')
+    info(f'{kind} type: {code}')
     try:
-        result = await run(blocking_value_type, code)
+        key = (kind, payload_hash(code))
+        result = type_cache.get(key)
+        if result is None:
+            result = await run_for_user(userdata, blocking_type, code)
+            type_cache.put(key, result)
         info(f'result: {result}')
         return web.json_response(result)
     except FatalError as e:
@@ -84,8 +246,19 @@ async def value_type(request, userdata):
         }, status=400)
 
 
+def blocking_value_type(code):
+    jir = parse_ir('value', code)
+    return jir.typ().toString()
+
+
+@routes.post('/type/value')
+@authenticated_users_only
+async def value_type(request, userdata):
+    return await type_response(request, userdata, 'value', blocking_value_type)
+
+
 def blocking_table_type(code):
-    jir = Env.hail().expr.ir.IRParser.parse_table_ir(code, {}, {})
+    jir = parse_ir('table', code)
     ttyp = hl.ttable._from_java(jir.typ())
     return {
         'global': str(ttyp.global_type),
@@ -97,20 +270,11 @@ def blocking_table_type(code):
 @routes.post('/type/table')
 @authenticated_users_only
 async def table_type(request, userdata):
-    code = await request.json()
-    info(f'table type: {code}')
-    try:
-        result = await run(blocking_table_type, code)
-        info(f'result: {result}')
-        return web.json_response(result)
-    except FatalError as e:
-        return web.json_response({
-            'message': e.args[0]
-        }, status=400)
+    return await type_response(request, userdata, 'table', blocking_table_type)
 
 
 def blocking_matrix_type(code):
-    jir = Env.hail().expr.ir.IRParser.parse_matrix_ir(code, {}, {})
+    jir = parse_ir('matrix', code)
     mtyp = hl.tmatrix._from_java(jir.typ())
     return {
         'global': str(mtyp.global_type),
@@ -125,20 +289,11 @@ def blocking_matrix_type(code):
 @routes.post('/type/matrix')
 @authenticated_users_only
 async def matrix_type(request, userdata):
-    code = await request.json()
-    info(f'matrix type: {code}')
-    try:
-        result = await run(blocking_matrix_type, code)
-        info(f'result: {result}')
-        return web.json_response(result)
-    except FatalError as e:
-        return web.json_response({
-            'message': e.args[0]
-        }, status=400)
+    return await type_response(request, userdata, 'matrix', blocking_matrix_type)
 
 
 def blocking_blockmatrix_type(code):
-    jir = Env.hail().expr.ir.IRParser.parse_blockmatrix_ir(code, {}, {})
+    jir = parse_ir('blockmatrix', code)
     bmtyp = hl.tblockmatrix._from_java(jir.typ())
     return {
         'element_type': str(bmtyp.element_type),
@@ -151,16 +306,7 @@ def blocking_blockmatrix_type(code):
 @routes.post('/type/blockmatrix')
 @authenticated_users_only
 async def blockmatrix_type(request, userdata):
-    code = await request.json()
-    info(f'blockmatrix type: {code}')
-    try:
-        result = await run(blocking_blockmatrix_type, code)
-        info(f'result: {result}')
-        return web.json_response(result)
-    except FatalError as e:
-        return web.json_response({
-            'message': e.args[0]
-        }, status=400)
+    return await type_response(request, userdata, 'blockmatrix', blocking_blockmatrix_type)
 
 
 @routes.post('/references/create')
@@ -227,6 +373,7 @@ async def reference_add_sequence(request, userdata):
     try:
         data = await request.json()
         await run(blocking_reference_add_sequence, data)
+        result_cache.clear()
         return status_response(204)
     except FatalError as e:
         return web.json_response({'message': e.args[0]}, status=400)
@@ -243,6 +390,7 @@ async def reference_remove_sequence(request, userdata):
     try:
         data = await request.json()
         await run(blocking_reference_remove_sequence, data)
+        result_cache.clear()
         return status_response(204)
     except FatalError as e:
         return web.json_response({
@@ -263,6 +411,7 @@ async def reference_add_liftover(request, userdata):
     try:
         data = await request.json()
         await run(blocking_reference_add_liftover, data)
+        result_cache.clear()
         return status_response(204)
     except FatalError as e:
         return web.json_response({'message': e.args[0]}, status=400)
@@ -280,6 +429,7 @@ async def reference_remove_liftover(request, userdata):
     try:
         data = await request.json()
         await run(blocking_reference_remove_liftover, data)
+        result_cache.clear()
         return status_response(204)
     except FatalError as e:
         return web.json_response({'message': e.args[0]}, status=400)
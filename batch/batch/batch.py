@@ -1,6 +1,8 @@
 import asyncio
+import collections
 import concurrent
 import logging
+import math
 import os
 import threading
 import traceback
@@ -26,12 +28,16 @@ from hailtop.gear.auth import rest_authenticated_users_only, web_authenticated_u
 
 from .blocking_to_async import blocking_to_async
 from .log_store import LogStore
+from .dag import DAGIndex
 from .database import BatchDatabase, JobsBuilder
 from .datetime_json import JSON_ENCODER
 from .k8s import K8s
+from .notifier import StateNotifier
 from .globals import states, complete_states, valid_state_transitions
 from .batch_configuration import KUBERNETES_TIMEOUT_IN_SECONDS, REFRESH_INTERVAL_IN_SECONDS, \
-    HAIL_POD_NAMESPACE, POD_VOLUME_SIZE, INSTANCE_ID, BATCH_IMAGE, QUEUE_SIZE, MAX_PODS
+    HAIL_POD_NAMESPACE, POD_VOLUME_SIZE, INSTANCE_ID, BATCH_IMAGE, QUEUE_SIZE, MAX_PODS, POD_QUEUE_USER_WEIGHTS, \
+    MAX_WAIT_SECONDS
+from .pod_cache import PodCache
 from .throttler import PodThrottler
 
 from . import schemas
@@ -128,6 +134,10 @@ class JobStateWriteFailure(Exception):
     pass
 
 
+class PodUpdateFailure(Exception):
+    pass
+
+
 class Job:
     async def _create_pvc(self):
         _, err = await app['k8s'].create_pvc(
@@ -433,7 +443,8 @@ class Job:
             output_files=json.dumps(output_files),
             directory=directory,
             exit_codes=json.dumps(exit_codes),
-            durations=json.dumps(durations))
+            durations=json.dumps(durations),
+            n_pending_parents=len(parent_ids))
 
         for parent in parent_ids:
             jobs_builder.create_job_parent(
@@ -476,12 +487,6 @@ class Job:
         self._cancelled = cancelled
         self._pod_spec = pod_spec
 
-    async def refresh_parents_and_maybe_create(self):
-        for record in await db.jobs.get_parents(*self.id):
-            parent_job = Job.from_record(record)
-            assert parent_job.batch_id == self.batch_id
-            await self.parent_new_state(parent_job._state, *parent_job.id)
-
     async def set_state(self, new_state):
         assert new_state in valid_state_transitions[self._state], f'{self._state} -> {new_state}'
         if self._state != new_state:
@@ -496,35 +501,36 @@ class Job:
                 self._state,
                 new_state))
             self._state = new_state
+            self.notify_waiters()
             await self.notify_children(new_state)
 
+    def notify_waiters(self):
+        notifier = app['state_notifier']
+        notifier.notify(('job', self.batch_id, self.job_id))
+        if self.is_complete():
+            notifier.notify(('batch', self.batch_id))
+
     async def notify_children(self, new_state):
         if new_state not in complete_states:
             return
+        app['parent_completions'].put_nowait((self.batch_id, self.job_id, new_state == 'Success'))
 
-        children = [Job.from_record(record) for record in await db.jobs.get_children(*self.id)]
-        for child in children:
-            await child.parent_new_state(new_state, *self.id)
-
-    async def parent_new_state(self, new_state, parent_batch_id, parent_job_id):
-        del parent_job_id
-        assert parent_batch_id == self.batch_id
-        if new_state in complete_states:
-            await self.create_if_ready()
-
-    async def create_if_ready(self):
-        incomplete_parent_ids = await db.jobs.get_incomplete_parents(*self.id)
-        if self._state == 'Pending' and not incomplete_parent_ids:
+    async def create_if_ready(self, parents_succeeded):
+        if self._state != 'Pending':
+            return
+        try:
             await self.set_state('Running')
-            parents = [Job.from_record(record) for record in await db.jobs.get_parents(*self.id)]
-            if (self.always_run or
-                    (not self._cancelled and all(p.is_successful() for p in parents))):
-                log.info(f'all parents complete for {self.id},'
-                         f' creating pod')
-                app['pod_throttler'].create_pod(self)
-            else:
-                log.info(f'parents deleted, cancelled, or failed: cancelling {self.id}')
-                await self.set_state('Cancelled')
+        except JobStateWriteFailure:
+            log.info(f'job {self.id} was already started')
+            return
+        if (self.always_run or
+                (not self._cancelled and parents_succeeded)):
+            log.info(f'all parents complete for {self.id},'
+                     f' creating pod')
+            app['pod_throttler'].create_pod(self)
+        else:
+            log.info(f'parents deleted, cancelled, or failed: cancelling {self.id}')
+            await self.set_state('Cancelled')
 
     async def cancel(self):
         self._cancelled = True
@@ -650,6 +656,7 @@ class Job:
                 new_state))
 
         self._state = new_state
+        self.notify_waiters()
 
         await app['pod_throttler'].delete_pod(self)
         await self._delete_pvc()
@@ -743,10 +750,76 @@ def create_job(jobs_builder, batch_id, userdata, parameters):  # pylint: disable
         state=state)
     return job
 
+
+JOBS_CHUNK_SIZE = 5000
+
+validators = threading.local()
+
+
+def validate_job_array(jobs_parameters):
+    # validators are not thread safe, so each thread of the blocking pool
+    # keeps its own
+    validator = getattr(validators, 'job_array', None)
+    if validator is None:
+        validator = cerberus.Validator(schemas.job_array_schema)
+        validators.job_array = validator
+    if not validator.validate(jobs_parameters):
+        return validator.errors
+    return None
+
+
+def build_jobs(batch_id, userdata, jobs_parameters):
+    jobs_builder = JobsBuilder(db)
+    for job_params in jobs_parameters:
+        create_job(jobs_builder, batch_id, userdata, job_params)
+    return jobs_builder
+
+
+def index_jobs(batch_id, jobs_parameters):
+    for job_params in jobs_parameters:
+        app['dag_index'].add_job(batch_id, job_params.get('job_id'), job_params.get('parent_ids', []))
+
+
+async def commit_jobs(jobs_builder):
+    try:
+        return await jobs_builder.commit()
+    finally:
+        await jobs_builder.close()
+
+
 @routes.get('/healthcheck')
 async def get_healthcheck(request):  # pylint: disable=W0613
     return jsonify({})
 
+
+def get_wait_seconds(params):
+    wait = params.get('wait')
+    if wait is None:
+        return 0
+    try:
+        wait = float(wait)
+    except ValueError:
+        abort(400, f'invalid wait {wait}')
+    if not math.isfinite(wait) or wait < 0:
+        abort(400, f'invalid wait {wait}')
+    return min(wait, MAX_WAIT_SECONDS)
+
+
+async def wait_for_state(key, timeout, get, ready):
+    """Long poll: return ``await get()`` once `ready` is true of it, or
+    after `timeout` seconds. The value is read again each time the job or
+    batch `key` is notified of a change."""
+    loop = asyncio.get_event_loop()
+    deadline = loop.time() + timeout
+    while True:
+        with app['state_notifier'].subscribe(key) as subscription:
+            value = await get()
+            remaining = deadline - loop.time()
+            if ready(value) or remaining <= 0:
+                return value
+            await subscription.wait(remaining)
+
+
 @routes.get('/api/v1alpha/batches/{batch_id}/jobs/{job_id}')
 @prom_async_time(REQUEST_TIME_GET_JOB)
 @rest_authenticated_users_only
@@ -754,8 +827,16 @@ async def get_job(request, userdata):
     batch_id = int(request.match_info['batch_id'])
     job_id = int(request.match_info['job_id'])
     user = userdata['username']
+    params = request.query
+    wait = get_wait_seconds(params)
+    state = params.get('state')
 
-    job = await Job.from_db(batch_id, job_id, user)
+    def ready(job):
+        return job is None or job.is_complete() or (state is not None and job._state != state)
+
+    # with wait, blocks until the job is complete or is no longer in state
+    job = await wait_for_state(('job', batch_id, job_id), wait,
+                               lambda: Job.from_db(batch_id, job_id, user), ready)
     if not job:
         abort(404)
     return jsonify(job.to_dict())
@@ -834,7 +915,9 @@ class Batch:
                          complete=complete,
                          deleted=record['deleted'],
                          cancelled=record['cancelled'],
-                         closed=record['closed'])
+                         closed=record['closed'],
+                         n_jobs=record['n_jobs'],
+                         n_completed=record['n_completed'])
         return None
 
     @staticmethod
@@ -866,7 +949,8 @@ class Batch:
         batch = Batch(id=id, attributes=attributes, callback=callback,
                       userdata=userdata, user=user, state='running',
                       complete=False, deleted=False, cancelled=False,
-                      closed=False)
+                      closed=False, n_jobs=0, n_completed=0)
+        app['dag_index'].add_batch(id)
 
         if attributes is not None:
             items = [{'batch_id': id, 'key': k, 'value': v} for k, v in attributes.items()]
@@ -878,7 +962,7 @@ class Batch:
         return batch
 
     def __init__(self, id, attributes, callback, userdata, user,
-                 state, complete, deleted, cancelled, closed):
+                 state, complete, deleted, cancelled, closed, n_jobs, n_completed):
         self.id = id
         self.attributes = attributes
         self.callback = callback
@@ -889,16 +973,23 @@ class Batch:
         self.deleted = deleted
         self.cancelled = cancelled
         self.closed = closed
+        self.n_jobs = n_jobs
+        self.n_completed = n_completed
 
     async def get_jobs(self, limit=None, offset=None):
         return [Job.from_record(record) for record in await db.jobs.get_records_by_batch(self.id, limit, offset)]
 
+    async def get_jobs_completed_after(self, n_completed):
+        return [Job.from_record(record)
+                for record in await db.jobs.get_records_completed_after(self.id, n_completed)]
+
     async def cancel(self):
         await db.batch.update_record(self.id, cancelled=True, closed=True)
         self.cancelled = True
         self.closed = True
         for j in await self.get_jobs():
             await j.cancel()
+        app['state_notifier'].notify(('batch', self.id))
         log.info(f'batch {self.id} cancelled')
 
     async def _close_jobs(self):
@@ -909,6 +1000,7 @@ class Batch:
     async def close(self):
         await db.batch.update_record(self.id, closed=True)
         self.closed = True
+        app['state_notifier'].notify(('batch', self.id))
         asyncio.ensure_future(self._close_jobs())
 
     async def mark_deleted(self):
@@ -924,6 +1016,7 @@ class Batch:
             # Job deleted from database when batch is deleted with delete cascade
             await j._delete_gs_files()
         await db.batch.delete_record(self.id)
+        app['dag_index'].remove_batch(self.id)
         log.info(f'batch {self.id} deleted')
 
     async def mark_job_complete(self, job):
@@ -947,17 +1040,22 @@ class Batch:
     def is_successful(self):
         return self.state == 'success'
 
-    async def to_dict(self, include_jobs=False, limit=None, offset=None):
+    async def to_dict(self, include_jobs=False, limit=None, offset=None, completed_after=None):
         result = {
             'id': self.id,
             'state': self.state,
             'complete': self.complete,
-            'closed': self.closed
+            'closed': self.closed,
+            'n_jobs': self.n_jobs,
+            'n_completed': self.n_completed
         }
         if self.attributes:
             result['attributes'] = self.attributes
         if include_jobs:
-            jobs = await self.get_jobs(limit, offset)
+            if completed_after is not None:
+                jobs = await self.get_jobs_completed_after(completed_after)
+            else:
+                jobs = await self.get_jobs(limit, offset)
             result['jobs'] = sorted([j.to_dict() for j in jobs], key=lambda j: j['job_id'])
         return result
 
@@ -1010,22 +1108,42 @@ async def create_jobs(request, userdata):
 
     jobs_parameters = await request.json()
 
-    validator = cerberus.Validator(schemas.job_array_schema)
-    if not validator.validate(jobs_parameters):
-        abort(400, 'invalid request: {}'.format(validator.errors))
-
-    jobs_builder = JobsBuilder(db)
+    errors = await blocking_to_async(app['blocking_pool'], validate_job_array, jobs_parameters)
+    if errors is not None:
+        abort(400, 'invalid request: {}'.format(errors))
+
+    # jobs are built in the blocking pool while the previous chunk is
+    # inserted. Each chunk is committed on its own, so the jobs of a chunk
+    # are indexed once it is committed; if a later chunk fails, the batch is
+    # dropped from the index and the children of the jobs already inserted
+    # are found by asking the database.
+    jobs = jobs_parameters['jobs']
+    commit = None
+    committing = None
+    created = False
     try:
-        for job_params in jobs_parameters['jobs']:
-            create_job(jobs_builder, batch.id, userdata, job_params)
-
-        success = await jobs_builder.commit()
-        if not success:
-            abort(400, f'insertion of jobs in db failed')
-
-        log.info(f"created {len(jobs_parameters['jobs'])} jobs for batch {batch_id}")
+        for start in range(0, len(jobs), JOBS_CHUNK_SIZE):
+            chunk = jobs[start:start + JOBS_CHUNK_SIZE]
+            jobs_builder = await blocking_to_async(app['blocking_pool'], build_jobs,
+                                                   batch.id, userdata, chunk)
+            if commit is not None:
+                if not await commit:
+                    abort(400, f'insertion of jobs in db failed')
+                index_jobs(batch.id, committing)
+            commit = asyncio.ensure_future(commit_jobs(jobs_builder))
+            committing = chunk
+        if commit is not None:
+            if not await commit:
+                abort(400, f'insertion of jobs in db failed')
+            index_jobs(batch.id, committing)
+        created = True
     finally:
-        await jobs_builder.close()
+        if commit is not None and not commit.done():
+            await asyncio.wait([commit])
+        if not created:
+            app['dag_index'].remove_batch(batch.id)
+
+    log.info(f"created {len(jobs)} jobs for batch {batch_id}")
 
     return jsonify({})
 
@@ -1073,7 +1191,34 @@ async def get_batch(request, userdata):
     params = request.query
     limit = params.get('limit')
     offset = params.get('offset')
-    return jsonify(await _get_batch(batch_id, user, limit=limit, offset=offset))
+    wait = get_wait_seconds(params)
+    n_completed = params.get('n_completed')
+    if n_completed is not None:
+        try:
+            n_completed = int(n_completed)
+        except ValueError:
+            abort(400, f'invalid n_completed {n_completed}')
+    # lists only the jobs that completed after the first completed_after
+    # jobs of the batch to complete
+    completed_after = params.get('completed_after')
+    if completed_after is not None:
+        try:
+            completed_after = int(completed_after)
+        except ValueError:
+            abort(400, f'invalid completed_after {completed_after}')
+
+    def ready(batch):
+        return (batch is None or batch.complete or
+                (n_completed is not None and batch.n_completed != n_completed))
+
+    # with wait, blocks until the batch is complete or, if n_completed is
+    # given, until a different number of its jobs are complete
+    batch = await wait_for_state(('batch', batch_id), wait,
+                                 lambda: Batch.from_db(batch_id, user), ready)
+    if not batch:
+        abort(404)
+    return jsonify(await batch.to_dict(include_jobs=True, limit=limit, offset=offset,
+                                       completed_after=completed_after))
 
 
 @routes.patch('/api/v1alpha/batches/{batch_id}/cancel')
@@ -1195,15 +1340,17 @@ async def update_job_with_pod(job, pod):  # pylint: disable=R0911,R0915
         return
 
     if pod and (not job or job.is_complete()):
-        err = await app['k8s'].delete_pod(name=pod.metadata.name)
-        if err is not None:
-            traceback.print_tb(err.__traceback__)
-            log.info(f'failed to delete pod {pod.metadata.name} for job {job.id if job else "None"} due to {err}, ignoring')
-
-        err = await app['k8s'].delete_pvc(name=pod.metadata.name)
-        if err is not None:
-            traceback.print_tb(err.__traceback__)
-            log.info(f'failed to delete pvc {pod.metadata.name} for job {job.id if job else "None"} due to {err}, ignoring')
+        pod_err = await app['k8s'].delete_pod(name=pod.metadata.name)
+        if pod_err is not None:
+            traceback.print_tb(pod_err.__traceback__)
+            log.info(f'failed to delete pod {pod.metadata.name} for job {job.id if job else "None"} due to {pod_err}')
+
+        pvc_err = await app['k8s'].delete_pvc(name=pod.metadata.name)
+        if pvc_err is not None:
+            traceback.print_tb(pvc_err.__traceback__)
+            log.info(f'failed to delete pvc {pod.metadata.name} for job {job.id if job else "None"} due to {pvc_err}')
+        if pod_err is not None or pvc_err is not None:
+            raise PodUpdateFailure(f'could not delete resources of pod {pod.metadata.name}')
         return
 
     if job and job._cancelled and not job.always_run and job._state == 'Running':
@@ -1271,7 +1418,7 @@ async def update_job_with_pod(job, pod):  # pylint: disable=R0911,R0915
                         if err:
                             log.info(f'could not connect to cleanup pod, we will '
                                      f'try again in next refresh loop {job} {pod} {err}')
-                            return
+                            raise PodUpdateFailure(f'could not terminate cleanup of pod {pod.metadata.name}')
                         return
 
     if pod and pod.status and pod.status.phase == 'Unknown':
@@ -1280,66 +1427,28 @@ async def update_job_with_pod(job, pod):  # pylint: disable=R0911,R0915
         return
 
 
-class DeblockedIterator:
-    def __init__(self, it):
-        self.it = it
-
-    def __aiter__(self):
-        return self
-
-    def __anext__(self):
-        return blocking_to_async(app['blocking_pool'], self.it.__next__)
-
-
 async def pod_changed(pod):
     job = await Job.from_k8s_labels(pod)
     await update_job_with_pod(job, pod)
 
 
-async def kube_event_loop():
-    while True:
-        try:
-            stream = kube.watch.Watch().stream(
-                v1.list_namespaced_pod,
-                HAIL_POD_NAMESPACE,
-                label_selector=f'app=batch-job,hail.is/batch-instance={INSTANCE_ID}')
-            async for event in DeblockedIterator(stream):
-                type = event['type']
-                object = event['object']
-                name = object.metadata.name
-                log.info(f'received event {type} {name}')
-                if type == 'ERROR':
-                    log.info(f'kubernetes sent an ERROR event: {event}')
-                    continue
-                await pod_changed(object)
-        except Exception as exc:  # pylint: disable=W0703
-            log.exception(f'k8s event stream failed due to: {exc}')
-        await asyncio.sleep(5)
-
-
 async def refresh_k8s_pods():
     log.info(f'refreshing k8s pods')
 
-    # if we do this after we get pods, we will pick up jobs created
-    # while listing pods and unnecessarily restart them
-    pod_jobs = [Job.from_record(record) for record in await db.jobs.get_records_where({'state': 'Running'})]
-
-    pods, err = await app['k8s'].list_pods(
-        label_selector=f'app=batch-job,hail.is/batch-instance={INSTANCE_ID}')
-    if err is not None:
-        traceback.print_tb(err.__traceback__)
-        log.info(f'could not refresh pods due to {err}, will try again later')
+    pod_cache = app['pod_cache']
+    if not pod_cache.synced():
+        log.info(f'pods not listed yet, will try again later')
         return
 
-    log.info(f'k8s had {len(pods.items)} pods')
-
-    seen_pods = set()
+    # if we do this after we get pods, we will pick up jobs created
+    # while reading the pods and unnecessarily restart them
+    pod_jobs = [Job.from_record(record) for record in await db.jobs.get_records_where({'state': 'Running'})]
 
-    async def see_pod(pod):
-        pod_name = pod.metadata.name
-        seen_pods.add(pod_name)
-        await pod_changed(pod)
-    await asyncio.gather(*[see_pod(pod) for pod in pods.items])
+    # changes to the pods are handled as they are watched; only the changes
+    # that could not be applied are passed on again
+    await pod_cache.retry_failed()
+    seen_pods = pod_cache.pod_names()
+    log.info(f'k8s had {len(seen_pods)} pods')
 
     if app['pod_throttler'].full():
         log.info(f'pod creation queue is full; skipping restarting jobs not seen in k8s')
@@ -1348,6 +1457,16 @@ async def refresh_k8s_pods():
     log.info('restarting running jobs with pods not seen in k8s')
 
     async def restart_job(job):
+        # the watch lags behind, so a pod that was just created may not be
+        # cached yet; it is handled when the watch delivers it
+        _, err = await app['k8s'].get_pod(job._pod_name)
+        if err is None:
+            log.info(f'pod of job {job.id} is not watched yet, not restarting')
+            return
+        if err.status != 404:
+            traceback.print_tb(err.__traceback__)
+            log.info(f'could not get pod for job {job.id} due to {err}, will try again later')
+            return
         log.info(f'restarting job {job.id}')
         await update_job_with_pod(job, None)
     await asyncio.gather(*[restart_job(job)
@@ -1392,6 +1511,67 @@ async def polling_event_loop():
         await asyncio.sleep(REFRESH_INTERVAL_IN_SECONDS)
 
 
+async def start_ready_children(completions):
+    parents_by_batch = collections.defaultdict(list)
+    for batch_id, parent_id, succeeded in completions:
+        parents_by_batch[batch_id].append((parent_id, succeeded))
+
+    for batch_id, parents in parents_by_batch.items():
+        for parent_id, succeeded in parents:
+            await db.jobs.complete_parent(batch_id, parent_id, succeeded)
+
+        ready_ids = []
+        unindexed_parent_ids = []
+        for parent_id, _ in parents:
+            ready = app['dag_index'].parent_complete(batch_id, parent_id)
+            if ready is None:
+                unindexed_parent_ids.append(parent_id)
+            else:
+                ready_ids.extend(ready)
+
+        records = []
+        if ready_ids:
+            records.extend(await db.jobs.get_records(batch_id, ready_ids))
+        if unindexed_parent_ids:
+            records.extend(await db.jobs.get_ready_children(batch_id, unindexed_parent_ids))
+        for record in records:
+            await Job.from_record(record).create_if_ready(record['parents_succeeded'])
+
+
+async def dag_event_loop():
+    # completions that arrive while children are being started are
+    # handled together
+    queue = app['parent_completions']
+    while True:
+        completions = [await queue.get()]
+        while not queue.empty():
+            completions.append(queue.get_nowait())
+        try:
+            await start_ready_children(completions)
+        except Exception as exc:  # pylint: disable=W0703
+            log.exception(f'Could not start ready jobs due to exception: {exc}')
+            # the index may already have forgotten the children of these
+            # parents, so retry them against the database
+            for batch_id, _, _ in completions:
+                app['dag_index'].remove_batch(batch_id)
+            for completion in completions:
+                queue.put_nowait(completion)
+            await asyncio.sleep(1)
+
+
+async def dag_sweep_event_loop():
+    # starts ready jobs whose completed parents were never processed, e.g.
+    # because the server restarted before draining parent_completions
+    await asyncio.sleep(1)
+    while True:
+        try:
+            for record in await db.jobs.get_ready_pending_records():
+                await Job.from_record(record).create_if_ready(record['parents_succeeded'])
+        except Exception as exc:  # pylint: disable=W0703
+            log.exception(f'Could not start ready jobs due to exception: {exc}')
+        await asyncio.sleep(REFRESH_INTERVAL_IN_SECONDS)
+
+
 async def db_cleanup_event_loop():
     await asyncio.sleep(1)
     while True:
@@ -1417,11 +1597,20 @@ async def on_startup(app):
     app['blocking_pool'] = pool
     app['k8s'] = K8s(pool, KUBERNETES_TIMEOUT_IN_SECONDS, HAIL_POD_NAMESPACE, v1)
     app['log_store'] = LogStore(pool, INSTANCE_ID)
-    app['pod_throttler'] = PodThrottler(QUEUE_SIZE, MAX_PODS, parallelism=16)
+    app['pod_throttler'] = PodThrottler(QUEUE_SIZE, MAX_PODS, parallelism=16,
+                                        user_weights=POD_QUEUE_USER_WEIGHTS)
     app['client_session'] = aiohttp.ClientSession()
+    app['dag_index'] = DAGIndex()
+    app['parent_completions'] = asyncio.Queue()
+    app['state_notifier'] = StateNotifier()
+    app['pod_cache'] = PodCache(pool, v1, HAIL_POD_NAMESPACE,
+                                f'app=batch-job,hail.is/batch-instance={INSTANCE_ID}',
+                                pod_changed)
 
     asyncio.ensure_future(polling_event_loop())
-    asyncio.ensure_future(kube_event_loop())
+    asyncio.ensure_future(dag_event_loop())
+    asyncio.ensure_future(dag_sweep_event_loop())
+    asyncio.ensure_future(app['pod_cache'].run())
     asyncio.ensure_future(db_cleanup_event_loop())
 
 
@@ -1,3 +1,5 @@
+import json
+import math
 import os
 import uuid
 
@@ -9,3 +11,14 @@ INSTANCE_ID = os.environ.get('HAIL_INSTANCE_ID', uuid.uuid4().hex)
 BATCH_IMAGE = os.environ.get('BATCH_IMAGE', 'gcr.io/hail-vdc/batch:latest')
 QUEUE_SIZE = os.environ.get('QUEUE_SIZE', 1_000_000)
 MAX_PODS = os.environ.get('MAX_PODS', 30_000)
+# relative share of pod creation of each user, by default 1
+POD_QUEUE_USER_WEIGHTS = json.loads(os.environ.get('POD_QUEUE_USER_WEIGHTS', '{}'))
+if not isinstance(POD_QUEUE_USER_WEIGHTS, dict):
+    raise ValueError(f'POD_QUEUE_USER_WEIGHTS must be an object, found {POD_QUEUE_USER_WEIGHTS!r}')
+for _user, _weight in POD_QUEUE_USER_WEIGHTS.items():
+    if isinstance(_weight, bool) or not isinstance(_weight, (int, float)) or not (0 < _weight < math.inf):
+        raise ValueError(f'weight of user {_user} in POD_QUEUE_USER_WEIGHTS must be a positive number, '
+                         f'found {_weight!r}')
+# longest a request with a wait parameter is held open, the long poll
+# interval of hailtop.batch_client
+MAX_WAIT_SECONDS = float(os.environ.get('MAX_WAIT_SECONDS', 50))
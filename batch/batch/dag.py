@@ -0,0 +1,48 @@
+class DAGIndex:
+    """In-process index of the children of each job and the number of
+    parents each job is waiting on, for batches created by this process.
+
+    The counts mirror the ``n_pending_parents`` column of the ``jobs``
+    table, so when a parent completes the children that became ready are
+    known without querying its children or their parents. Batches created
+    before the server started are not indexed; `parent_complete` returns
+    ``None`` for their jobs and the database must be asked instead.
+    """
+
+    def __init__(self):
+        self._batches = {}
+
+    def add_batch(self, batch_id):
+        self._batches[batch_id] = ({}, {})
+
+    def remove_batch(self, batch_id):
+        self._batches.pop(batch_id, None)
+
+    def add_job(self, batch_id, job_id, parent_ids):
+        batch = self._batches.get(batch_id)
+        if batch is None:
+            return
+        children, n_pending_parents = batch
+        if parent_ids:
+            n_pending_parents[job_id] = len(parent_ids)
+            for parent_id in parent_ids:
+                children.setdefault(parent_id, []).append(job_id)
+
+    def parent_complete(self, batch_id, parent_id):
+        """Record that `parent_id` completed and return the ids of its
+        children that have no more pending parents, or ``None`` if the batch
+        is not indexed."""
+        batch = self._batches.get(batch_id)
+        if batch is None:
+            return None
+        children, n_pending_parents = batch
+        ready = []
+        # a completion seen twice finds no children the second time
+        for child_id in children.pop(parent_id, []):
+            n = n_pending_parents[child_id] - 1
+            if n == 0:
+                del n_pending_parents[child_id]
+                ready.append(child_id)
+            else:
+                n_pending_parents[child_id] = n
+        return ready
@@ -162,7 +162,7 @@ class JobsBuilder:
                    'callback', 'attributes', 'always_run',
                    'token', 'pod_spec', 'input_files',
                    'output_files', 'directory', 'exit_codes',
-                   'durations'}
+                   'durations', 'n_pending_parents'}
 
     jobs_parents_fields = {'batch_id', 'job_id', 'parent_id'}
 
@@ -291,18 +291,64 @@ class JobsTable(Table):
     async def delete_record(self, batch_id, job_id):
         await super().delete_record({'batch_id': batch_id, 'job_id': job_id})
 
-    async def get_incomplete_parents(self, batch_id, job_id):
+    async def complete_parent(self, batch_id, parent_id, succeeded):
+        """Decrement the number of pending parents of the children of
+        `parent_id`. Each parent is counted once, however many times it is
+        completed."""
         async with self._db.pool.acquire() as conn:
             async with conn.cursor() as cursor:
                 jobs_parents_name = self._db.jobs_parents.name
-                sql = f"""SELECT `{self.name}`.batch_id, `{self.name}`.job_id FROM `{self.name}`
+                sql = f"""UPDATE `{self.name}` INNER JOIN `{jobs_parents_name}`
+                          ON `{self.name}`.batch_id = `{jobs_parents_name}`.batch_id AND `{self.name}`.job_id = `{jobs_parents_name}`.job_id
+                          SET `{self.name}`.n_pending_parents = `{self.name}`.n_pending_parents - 1,
+                              `{self.name}`.parents_succeeded = `{self.name}`.parents_succeeded AND %s,
+                              `{jobs_parents_name}`.parent_complete = TRUE
+                          WHERE `{jobs_parents_name}`.batch_id = %s AND `{jobs_parents_name}`.parent_id = %s
+                          AND NOT `{jobs_parents_name}`.parent_complete"""
+                await execute_with_retry(cursor, sql, (succeeded, batch_id, parent_id))
+
+    async def get_ready_children(self, batch_id, parent_ids):
+        async with self._db.pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                jobs_parents_name = self._db.jobs_parents.name
+                batch_name = self._db.batch.name
+                fields = ', '.join(self._select_fields())
+                sql = f"""SELECT DISTINCT {fields} FROM `{self.name}`
+                          INNER JOIN `{batch_name}` ON `{self.name}`.batch_id = `{batch_name}`.id
                           INNER JOIN `{jobs_parents_name}`
-                          ON `{self.name}`.batch_id = `{jobs_parents_name}`.batch_id AND `{self.name}`.job_id = `{jobs_parents_name}`.parent_id
-                          WHERE `{self.name}`.state IN %s AND `{jobs_parents_name}`.batch_id = %s AND `{jobs_parents_name}`.job_id = %s"""
+                          ON `{self.name}`.batch_id = `{jobs_parents_name}`.batch_id AND `{self.name}`.job_id = `{jobs_parents_name}`.job_id
+                          WHERE `{jobs_parents_name}`.batch_id = %s AND `{jobs_parents_name}`.parent_id IN %s
+                          AND `{self.name}`.state = 'Pending' AND `{self.name}`.n_pending_parents = 0"""
+                await cursor.execute(sql, (batch_id, parent_ids))
+                return await cursor.fetchall()
 
-                await cursor.execute(sql, (('Pending', 'Running'), batch_id, job_id))
-                result = await cursor.fetchall()
-                return [(record['batch_id'], record['job_id']) for record in result]
+    async def get_ready_pending_records(self):
+        """Jobs of closed batches whose parents have all completed but which
+        were never started."""
+        async with self._db.pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                batch_name = self._db.batch.name
+                fields = ', '.join(self._select_fields())
+                sql = f"""SELECT {fields} FROM `{self.name}`
+                          INNER JOIN `{batch_name}` ON `{self.name}`.batch_id = `{batch_name}`.id
+                          WHERE `{batch_name}`.closed
+                          AND `{self.name}`.state = 'Pending' AND `{self.name}`.n_pending_parents = 0"""
+                await cursor.execute(sql)
+                return await cursor.fetchall()
+
+    async def get_records_completed_after(self, batch_id, completion_seq):
+        """Jobs of the batch that completed after the first `completion_seq`
+        jobs of the batch to complete, in the order they completed."""
+        async with self._db.pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                batch_name = self._db.batch.name
+                fields = ', '.join(self._select_fields())
+                sql = f"""SELECT {fields} FROM `{self.name}`
+                          INNER JOIN `{batch_name}` ON `{self.name}`.batch_id = `{batch_name}`.id
+                          WHERE `{self.name}`.batch_id = %s AND `{self.name}`.completion_seq > %s
+                          ORDER BY `{self.name}`.completion_seq ASC"""
+                await cursor.execute(sql, (batch_id, completion_seq))
+                return await cursor.fetchall()
 
     async def get_records_by_batch(self, batch_id, limit=None, offset=None):
         if offset is not None:
@@ -338,34 +384,6 @@ class JobsTable(Table):
                 await cursor.execute(sql, where_values)
                 return await cursor.fetchall()
 
-    async def get_parents(self, batch_id, job_id):
-        async with self._db.pool.acquire() as conn:
-            async with conn.cursor() as cursor:
-                jobs_parents_name = self._db.jobs_parents.name
-                batch_name = self._db.batch.name
-                fields = ', '.join(self._select_fields())
-                sql = f"""SELECT {fields} FROM `{self.name}`
-                          INNER JOIN `{batch_name}` ON `{self.name}`.batch_id = `{batch_name}`.id
-                          INNER JOIN `{jobs_parents_name}`
-                          ON `{self.name}`.batch_id = `{jobs_parents_name}`.batch_id AND `{self.name}`.job_id = `{jobs_parents_name}`.parent_id
-                          WHERE `{jobs_parents_name}`.batch_id = %s AND `{jobs_parents_name}`.job_id = %s"""
-                await cursor.execute(sql, (batch_id, job_id))
-                return await cursor.fetchall()
-
-    async def get_children(self, batch_id, parent_id):
-        async with self._db.pool.acquire() as conn:
-            async with conn.cursor() as cursor:
-                jobs_parents_name = self._db.jobs_parents.name
-                batch_name = self._db.batch.name
-                fields = ', '.join(self._select_fields())
-                sql = f"""SELECT {fields} FROM `{self.name}`
-                          INNER JOIN `{batch_name}` ON `{self.name}`.batch_id = `{batch_name}`.id
-                          INNER JOIN `{jobs_parents_name}`
-                          ON `{self.name}`.batch_id = `{jobs_parents_name}`.batch_id AND `{self.name}`.job_id = `{jobs_parents_name}`.job_id
-                          WHERE `{jobs_parents_name}`.batch_id = %s AND `{jobs_parents_name}`.parent_id = %s"""
-                await cursor.execute(sql, (batch_id, parent_id))
-                return await cursor.fetchall()
-
 
 class JobsParentsTable(Table):
     def __init__(self, db):
@@ -0,0 +1,51 @@
+import asyncio
+
+
+class Subscription:
+    def __init__(self, notifier, key):
+        self.notifier = notifier
+        self.key = key
+        self.event = asyncio.Event()
+
+    async def wait(self, timeout):
+        """Wait up to `timeout` seconds for a notification. Returns whether
+        one was received since the subscription was made."""
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.event.is_set()
+
+    def __enter__(self):
+        self.notifier._subscribers.setdefault(self.key, set()).add(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        subscribers = self.notifier._subscribers.get(self.key)
+        if subscribers is not None:
+            subscribers.discard(self)
+            if not subscribers:
+                del self.notifier._subscribers[self.key]
+
+
+class StateNotifier:
+    """Wakes up requests waiting for a job or batch of this process to
+    change.
+
+    A waiter subscribes to a key before reading the current state, so a
+    change made between the read and the wait is not missed:
+
+        with notifier.subscribe(key) as subscription:
+            ... read the state, return if it is the one wanted ...
+            await subscription.wait(timeout)
+    """
+
+    def __init__(self):
+        self._subscribers = {}
+
+    def subscribe(self, key):
+        return Subscription(self, key)
+
+    def notify(self, key):
+        for subscription in self._subscribers.get(key, ()):
+            subscription.event.set()
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+
+import kubernetes as kube
+
+from .blocking_to_async import blocking_to_async
+
+log = logging.getLogger('batch.pod_cache')
+
+
+class ResourceVersionExpired(Exception):
+    pass
+
+
+def _container_state(container_status):
+    state = container_status.state
+    if state is None:
+        return (container_status.name, None)
+    if state.terminated:
+        return (container_status.name, 'terminated', state.terminated.exit_code)
+    if state.running:
+        return (container_status.name, 'running')
+    if state.waiting:
+        return (container_status.name, 'waiting', state.waiting.reason)
+    return (container_status.name, None)
+
+
+def pod_state(pod):
+    """The parts of the status of `pod` that jobs are updated from. Pod
+    updates that leave it unchanged, like heartbeats and condition
+    timestamps, are not passed on."""
+    status = pod.status
+    if status is None:
+        return None
+    return (status.phase,
+            status.reason,
+            tuple(_container_state(s) for s in status.init_container_statuses or []),
+            tuple(_container_state(s) for s in status.container_statuses or []))
+
+
+class PodCache:
+    """Local copy of the batch pods, kept up to date from a watch.
+
+    The pods are listed once, then watched from the resource version of the
+    list. The watch is resumed from the last resource version it saw when
+    it ends or fails; the pods are only listed again when the API server
+    no longer has that version. `on_change` is called with a pod when it
+    is first seen, when its :func:`pod_state` changes and when it is
+    deleted. If `on_change` raises, the pod is passed again by
+    `retry_failed` and with its next event, whether its state changed or
+    not.
+    """
+
+    def __init__(self, blocking_pool, k8s_api, namespace, label_selector, on_change,
+                 watch_timeout_seconds=300):
+        self.blocking_pool = blocking_pool
+        self.k8s_api = k8s_api
+        self.namespace = namespace
+        self.label_selector = label_selector
+        self.on_change = on_change
+        self.watch_timeout_seconds = watch_timeout_seconds
+
+        self.pods = {}
+        self.failed = {}
+        self.resource_version = None
+
+    def synced(self):
+        return self.resource_version is not None
+
+    def pod_names(self):
+        return set(self.pods)
+
+    async def _change(self, pod):
+        name = pod.metadata.name
+        try:
+            await self.on_change(pod)
+        except Exception as exc:  # pylint: disable=W0703
+            log.exception(f'could not handle change of pod {name}, will try again later: {exc}')
+            self.failed[name] = pod
+        else:
+            self.failed.pop(name, None)
+
+    async def retry_failed(self):
+        for name, pod in list(self.failed.items()):
+            if self.failed.get(name) is pod:
+                await self._change(pod)
+
+    async def _update(self, pod, deleted=False):
+        name = pod.metadata.name
+        old = self.pods.get(name)
+        if deleted or old is None or name in self.failed or pod_state(old) != pod_state(pod):
+            await self._change(pod)
+        if deleted:
+            self.pods.pop(name, None)
+        else:
+            self.pods[name] = pod
+
+    async def relist(self):
+        pods = await blocking_to_async(self.blocking_pool,
+                                       self.k8s_api.list_namespaced_pod,
+                                       self.namespace,
+                                       label_selector=self.label_selector)
+        log.info(f'listed {len(pods.items)} pods at resource version {pods.metadata.resource_version}')
+
+        names = set()
+        for pod in pods.items:
+            names.add(pod.metadata.name)
+            await self._update(pod)
+        # pods deleted while not watching are left to the job refresh,
+        # which restarts running jobs without pods
+        for name in set(self.pods) - names:
+            del self.pods[name]
+            self.failed.pop(name, None)
+        self.resource_version = pods.metadata.resource_version
+
+    def _stream(self):
+        return kube.watch.Watch().stream(
+            self.k8s_api.list_namespaced_pod,
+            self.namespace,
+            label_selector=self.label_selector,
+            resource_version=self.resource_version,
+            timeout_seconds=self.watch_timeout_seconds)
+
+    async def watch(self):
+        stream = self._stream()
+        done = object()
+        while True:
+            event = await blocking_to_async(self.blocking_pool, next, stream, done)
+            if event is done:
+                return
+            event_type = event['type']
+            if event_type == 'ERROR':
+                raw = event.get('raw_object') or {}
+                if raw.get('code') == 410:
+                    raise ResourceVersionExpired(raw.get('message'))
+                log.info(f'kubernetes sent an ERROR event: {event}')
+                continue
+            pod = event['object']
+            log.info(f'received event {event_type} {pod.metadata.name}')
+            await self._update(pod, deleted=(event_type == 'DELETED'))
+            self.resource_version = pod.metadata.resource_version
+
+    async def run(self):
+        while True:
+            try:
+                if not self.synced():
+                    await self.relist()
+                await self.watch()
+            except ResourceVersionExpired as exc:
+                log.info(f'resource version {self.resource_version} expired, listing pods: {exc}')
+                self.resource_version = None
+            except kube.client.rest.ApiException as exc:
+                if exc.status == 410:
+                    log.info(f'resource version {self.resource_version} expired, listing pods')
+                    self.resource_version = None
+                else:
+                    log.exception(f'k8s pod watch failed due to: {exc}')
+                    await asyncio.sleep(5)
+            except Exception as exc:  # pylint: disable=W0703
+                log.exception(f'k8s pod watch failed due to: {exc}')
+                await asyncio.sleep(5)
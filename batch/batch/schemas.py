@@ -2,7 +2,23 @@ pod_spec = {
     'type': 'dict',
     'required': True,
     'allow_unknown': True,
-    'schema': {}
+    'schema': {
+        # checked here rather than when the job is created, so that a bad
+        # job fails the request before any job is inserted
+        'containers': {
+            'type': 'list',
+            'required': True,
+            'minlength': 1,
+            'maxlength': 1,
+            'schema': {
+                'type': 'dict',
+                'allow_unknown': True,
+                'schema': {
+                    'name': {'type': 'string', 'required': True, 'allowed': ['main']}
+                }
+            }
+        }
+    }
 }
 
 job_schema = {
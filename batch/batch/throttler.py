@@ -1,15 +1,140 @@
 import asyncio
+import collections
+import heapq
 import logging
+import time
 import traceback
 
+import prometheus_client as pc
+
 
 log = logging.getLogger('batch.throttler')
 
+POD_QUEUE_WAIT_TIME = pc.Summary('batch_pod_queue_wait_seconds',
+                                 'Time jobs wait in the pod creation queue in seconds', ['user'])
+POD_QUEUE_SIZE = pc.Gauge('batch_pod_queue_size', 'Number of jobs in the pod creation queue', ['user'])
+
+
+def job_priority(job):
+    """The ``priority`` attribute of `job` as an integer, 0 if it has none.
+    Jobs with a higher priority are created first within their batch."""
+    try:
+        return int((job.attributes or {}).get('priority', 0))
+    except ValueError:
+        return 0
+
+
+class _UserQueue:
+    def __init__(self):
+        self.batches = collections.OrderedDict()
+        self.deficit = 0
+        self.size = 0
+
+    def put(self, entry, priority):
+        batch = self.batches.get(entry.batch_id)
+        if batch is None:
+            batch = []
+            self.batches[entry.batch_id] = batch
+        heapq.heappush(batch, (-priority, entry.seq, entry))
+        self.size += 1
+
+    def get(self):
+        # batches of a user take turns
+        batch_id, batch = next(iter(self.batches.items()))
+        _, _, entry = heapq.heappop(batch)
+        self.batches.move_to_end(batch_id)
+        if not batch:
+            del self.batches[batch_id]
+        self.size -= 1
+        return entry
+
+
+class _Entry:
+    __slots__ = ['job', 'user', 'batch_id', 'seq', 'queued_at']
+
+    def __init__(self, job, seq):
+        self.job = job
+        self.user = job.user
+        self.batch_id = job.batch_id
+        self.seq = seq
+        self.queued_at = time.time()
+
+
+class FairShareQueue:
+    """Queue of jobs shared fairly between users by deficit round robin.
+
+    Each user with queued jobs gets `weight` jobs per round, by default 1.
+    Within a user the batches take turns, and within a batch jobs with a
+    higher priority go first, otherwise jobs are first in, first out. Like
+    :class:`asyncio.Queue`, `put_nowait` raises :class:`asyncio.QueueFull`
+    when there are `maxsize` jobs queued.
+    """
+
+    def __init__(self, maxsize, user_weights=None):
+        self.maxsize = maxsize
+        self.user_weights = user_weights or {}
+        self.users = {}
+        self.active_users = collections.deque()
+        self.size = 0
+        self.seq = 0
+        self.nonempty = asyncio.Event()
+
+    def full(self):
+        return self.size >= self.maxsize
+
+    def qsize(self):
+        return self.size
+
+    def put_nowait(self, job):
+        if self.full():
+            raise asyncio.QueueFull()
+        entry = _Entry(job, self.seq)
+        self.seq += 1
+
+        user_queue = self.users.get(entry.user)
+        if user_queue is None:
+            user_queue = _UserQueue()
+            self.users[entry.user] = user_queue
+            self.active_users.append(entry.user)
+        user_queue.put(entry, job_priority(job))
+        self.size += 1
+        POD_QUEUE_SIZE.labels(user=entry.user).inc()
+        self.nonempty.set()
+
+    def get_nowait(self):
+        if self.size == 0:
+            raise asyncio.QueueEmpty()
+        while True:
+            user = self.active_users[0]
+            user_queue = self.users[user]
+            if user_queue.deficit < 1:
+                user_queue.deficit += self.user_weights.get(user, 1)
+                self.active_users.rotate(-1)
+                continue
+
+            entry = user_queue.get()
+            user_queue.deficit -= 1
+            if user_queue.size == 0:
+                del self.users[user]
+                self.active_users.popleft()
+
+            self.size -= 1
+            if self.size == 0:
+                self.nonempty.clear()
+            POD_QUEUE_SIZE.labels(user=user).dec()
+            POD_QUEUE_WAIT_TIME.labels(user=user).observe(time.time() - entry.queued_at)
+            return entry.job
+
+    async def get(self):
+        while self.size == 0:
+            await self.nonempty.wait()
+        return self.get_nowait()
+
 
 class PodThrottler:
-    def __init__(self, queue_size, max_pods, parallelism=1):
+    def __init__(self, queue_size, max_pods, parallelism=1, user_weights=None):
         self.queue_size = queue_size
-        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.queue = FairShareQueue(queue_size, user_weights)
         self.semaphore = asyncio.BoundedSemaphore(max_pods)
         self.pending_pods = set()
         self.created_pods = set()
@@ -41,7 +166,7 @@ class PodThrottler:
                 if pod_name not in self.pending_pods:
                     log.info(f'pod {pod_name} was deleted before it was created, ignoring')
                     self.semaphore.release()
-                    return
+                    continue
 
                 await job._create_pod()
             except:
@@ -50,7 +175,6 @@ class PodThrottler:
 
             self.pending_pods.remove(pod_name)
             self.created_pods.add(pod_name)
-            self.queue.task_done()
 
     def is_queued(self, job):
         return job._pod_name in self.pending_pods
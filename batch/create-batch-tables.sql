@@ -34,15 +34,20 @@ CREATE TABLE IF NOT EXISTS `jobs` (
   `durations` TEXT(65535),
   `input_files` TEXT(65535),
   `output_files` TEXT(65535),
+  `n_pending_parents` INT NOT NULL default 0,
+  `parents_succeeded` BOOLEAN NOT NULL default true,
+  `completion_seq` INT,
   PRIMARY KEY (`batch_id`, `job_id`),
   FOREIGN KEY (`batch_id`) REFERENCES batch(id) ON DELETE CASCADE
 ) ENGINE = InnoDB;
 CREATE INDEX `jobs_state` ON `jobs` (`state`);
+CREATE INDEX `jobs_completion_seq` ON `jobs` (`batch_id`, `completion_seq`);
 
 CREATE TABLE IF NOT EXISTS `jobs-parents` (
   `batch_id` BIGINT NOT NULL,
   `job_id` INT NOT NULL,
   `parent_id` INT NOT NULL,
+  `parent_complete` BOOLEAN NOT NULL default false,
   PRIMARY KEY (`batch_id`, `job_id`, `parent_id`),
   FOREIGN KEY (`batch_id`) REFERENCES batch(id) ON DELETE CASCADE
 ) ENGINE = InnoDB;
@@ -59,11 +64,12 @@ CREATE INDEX batch_attributes_key_value ON `batch-attributes` (`key`, `value`(25
 
 DELIMITER $$
 
-CREATE TRIGGER trigger_jobs_insert AFTER INSERT ON jobs
+CREATE TRIGGER trigger_jobs_insert BEFORE INSERT ON jobs
     FOR EACH ROW BEGIN
         UPDATE batch SET n_jobs = n_jobs + 1 WHERE id = new.batch_id;
         IF (NEW.state LIKE 'Error' OR NEW.state LIKE 'Failed' OR NEW.state LIKE 'Success' OR NEW.state LIKE 'Cancelled') THEN
             UPDATE batch SET n_completed = n_completed + 1 WHERE id = NEW.batch_id;
+            SET NEW.completion_seq = (SELECT n_completed FROM batch WHERE id = NEW.batch_id);
             IF (NEW.state LIKE 'Failed' OR NEW.state LIKE 'Error') THEN
 	        UPDATE batch SET n_failed = n_failed + 1 WHERE id = NEW.batch_id;
             ELSEIF (NEW.state LIKE 'Success') THEN
@@ -75,10 +81,11 @@ CREATE TRIGGER trigger_jobs_insert AFTER INSERT ON jobs
     END;
 $$
 
-CREATE TRIGGER trigger_jobs_update AFTER UPDATE ON jobs
+CREATE TRIGGER trigger_jobs_update BEFORE UPDATE ON jobs
     FOR EACH ROW BEGIN
         IF (OLD.state NOT LIKE NEW.state) AND (NEW.state LIKE 'Error' OR NEW.state LIKE 'Failed' OR NEW.state LIKE 'Success' OR NEW.state LIKE 'Cancelled') THEN
             UPDATE batch SET n_completed = n_completed + 1 WHERE id = NEW.batch_id;
+            SET NEW.completion_seq = (SELECT n_completed FROM batch WHERE id = NEW.batch_id);
             IF (NEW.state LIKE 'Failed' OR NEW.state LIKE 'Error') THEN
 	        UPDATE batch SET n_failed = n_failed + 1 WHERE id = NEW.batch_id;
             ELSEIF (NEW.state LIKE 'Success') THEN
@@ -0,0 +1,74 @@
+-- Brings a database created by an earlier create-batch-tables.sql up to
+-- date. Run it with the batch server stopped.
+
+-- pending parents of each job
+ALTER TABLE `jobs`
+  ADD COLUMN `n_pending_parents` INT NOT NULL default 0,
+  ADD COLUMN `parents_succeeded` BOOLEAN NOT NULL default true;
+ALTER TABLE `jobs-parents`
+  ADD COLUMN `parent_complete` BOOLEAN NOT NULL default false;
+
+UPDATE `jobs-parents`
+  INNER JOIN `jobs` AS parents
+  ON `jobs-parents`.batch_id = parents.batch_id AND `jobs-parents`.parent_id = parents.job_id
+  SET `jobs-parents`.parent_complete = TRUE
+  WHERE parents.state IN ('Error', 'Failed', 'Success', 'Cancelled');
+
+UPDATE `jobs`
+  INNER JOIN (
+    SELECT `jobs-parents`.batch_id, `jobs-parents`.job_id,
+           SUM(NOT `jobs-parents`.parent_complete) AS n_pending_parents,
+           COALESCE(MIN(CASE WHEN `jobs-parents`.parent_complete THEN parents.state = 'Success' END), TRUE)
+             AS parents_succeeded
+    FROM `jobs-parents`
+    INNER JOIN `jobs` AS parents
+    ON `jobs-parents`.batch_id = parents.batch_id AND `jobs-parents`.parent_id = parents.job_id
+    GROUP BY `jobs-parents`.batch_id, `jobs-parents`.job_id) AS counts
+  ON `jobs`.batch_id = counts.batch_id AND `jobs`.job_id = counts.job_id
+  SET `jobs`.n_pending_parents = counts.n_pending_parents,
+      `jobs`.parents_succeeded = counts.parents_succeeded;
+
+-- order in which the jobs of a batch complete; jobs completed before the
+-- migration have none
+ALTER TABLE `jobs` ADD COLUMN `completion_seq` INT;
+CREATE INDEX `jobs_completion_seq` ON `jobs` (`batch_id`, `completion_seq`);
+
+DROP TRIGGER IF EXISTS trigger_jobs_insert;
+DROP TRIGGER IF EXISTS trigger_jobs_update;
+
+DELIMITER $$
+
+CREATE TRIGGER trigger_jobs_insert BEFORE INSERT ON jobs
+    FOR EACH ROW BEGIN
+        UPDATE batch SET n_jobs = n_jobs + 1 WHERE id = new.batch_id;
+        IF (NEW.state LIKE 'Error' OR NEW.state LIKE 'Failed' OR NEW.state LIKE 'Success' OR NEW.state LIKE 'Cancelled') THEN
+            UPDATE batch SET n_completed = n_completed + 1 WHERE id = NEW.batch_id;
+            SET NEW.completion_seq = (SELECT n_completed FROM batch WHERE id = NEW.batch_id);
+            IF (NEW.state LIKE 'Failed' OR NEW.state LIKE 'Error') THEN
+	        UPDATE batch SET n_failed = n_failed + 1 WHERE id = NEW.batch_id;
+            ELSEIF (NEW.state LIKE 'Success') THEN
+                UPDATE batch SET n_succeeded = n_succeeded + 1 WHERE id = NEW.batch_id;
+	    ELSEIF (NEW.state LIKE 'Cancelled') THEN
+                UPDATE batch SET n_cancelled = n_cancelled + 1 WHERE id = NEW.batch_id;
+	    END IF;
+        END IF;
+    END;
+$$
+
+CREATE TRIGGER trigger_jobs_update BEFORE UPDATE ON jobs
+    FOR EACH ROW BEGIN
+        IF (OLD.state NOT LIKE NEW.state) AND (NEW.state LIKE 'Error' OR NEW.state LIKE 'Failed' OR NEW.state LIKE 'Success' OR NEW.state LIKE 'Cancelled') THEN
+            UPDATE batch SET n_completed = n_completed + 1 WHERE id = NEW.batch_id;
+            SET NEW.completion_seq = (SELECT n_completed FROM batch WHERE id = NEW.batch_id);
+            IF (NEW.state LIKE 'Failed' OR NEW.state LIKE 'Error') THEN
+	        UPDATE batch SET n_failed = n_failed + 1 WHERE id = NEW.batch_id;
+            ELSEIF (NEW.state LIKE 'Success') THEN
+                UPDATE batch SET n_succeeded = n_succeeded + 1 WHERE id = NEW.batch_id;
+	    ELSEIF (NEW.state LIKE 'Cancelled') THEN
+                UPDATE batch SET n_cancelled = n_cancelled + 1 WHERE id = NEW.batch_id;
+	    END IF;
+        END IF;
+    END;
+$$
+
+DELIMITER ;
@@ -0,0 +1,184 @@
+"""Load test for bulk job insertion.
+
+Inserts a batch of synthetic jobs with JobsBuilder and reports jobs/sec.
+By default the database is an in-process stand-in that charges a fixed
+latency per statement plus a transfer time per byte and, like aiomysql,
+sends executemany of an INSERT as multi-row statements, which is enough to
+compare insertion strategies. Pass --db-config to use a real MySQL
+database instead, e.g. a local one started with docker and initialized
+with create-batch-tables.sql.
+
+    python3 -m test.load_jobs_builder --n-jobs 200000
+"""
+import argparse
+import asyncio
+import json
+import re
+import time
+
+from batch.database import BatchDatabase, JobsBuilder, JobsTable, JobsParentsTable
+
+
+# as in aiomysql.cursors
+RE_INSERT_VALUES = re.compile(
+    r"\s*((?:INSERT|REPLACE)\s.+\sVALUES?\s+)" +
+    r"(\(\s*(?:%s|%\(.+\)s)\s*(?:,\s*(?:%s|%\(.+\)s)\s*)*\))" +
+    r"(\s*(?:ON DUPLICATE.*)?);?\s*\Z",
+    re.IGNORECASE | re.DOTALL)
+
+
+def escape(value):
+    if value is None:
+        return 'NULL'
+    if isinstance(value, str):
+        return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+    return str(int(value)) if isinstance(value, bool) else str(value)
+
+
+class StandInCursor:
+    """Charges a fixed latency per statement plus a transfer time per byte.
+    Like aiomysql, `executemany` of an INSERT sends multi-row statements of
+    at most `max_stmt_length` bytes."""
+
+    max_stmt_length = 1024000
+
+    def __init__(self, latency, bytes_per_second):
+        self.latency = latency
+        self.bytes_per_second = bytes_per_second
+        self.rowcount = 0
+
+    async def _send(self, n_bytes, n_rows):
+        await asyncio.sleep(self.latency + n_bytes / self.bytes_per_second)
+        return n_rows
+
+    async def execute(self, sql, values=None):
+        if isinstance(values, dict):
+            sql = sql % {k: escape(v) for k, v in values.items()}
+        elif values:
+            sql = sql % tuple(escape(v) for v in values)
+        self.rowcount = await self._send(len(sql), len(re.findall(r'\)\s*,\s*\(', sql)) + 1)
+
+    async def executemany(self, sql, items):
+        m = RE_INSERT_VALUES.match(sql)
+        assert m, sql
+        prefix, values = m.group(1), m.group(2).rstrip()
+        rows = 0
+        stmt_length = len(prefix)
+        stmt_rows = 0
+        for item in items:
+            v = values % {k: escape(x) for k, x in item.items()}
+            if stmt_rows and stmt_length + len(v) + 1 > self.max_stmt_length:
+                rows += await self._send(stmt_length, stmt_rows)
+                stmt_length = len(prefix)
+                stmt_rows = 0
+            stmt_length += len(v) + (1 if stmt_rows else 0)
+            stmt_rows += 1
+        if stmt_rows:
+            rows += await self._send(stmt_length, stmt_rows)
+        self.rowcount = rows
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        pass
+
+
+class StandInConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    def cursor(self):
+        return StandInCursor(self.pool.latency, self.pool.bytes_per_second)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        pass
+
+
+class StandInPool:
+    def __init__(self, latency, bytes_per_second):
+        self.latency = latency
+        self.bytes_per_second = bytes_per_second
+
+    def acquire(self):
+        return StandInConnection(self)
+
+
+class StandInDatabase:
+    def __init__(self, latency, bytes_per_second):
+        self.pool = StandInPool(latency, bytes_per_second)
+        self.jobs = JobsTable(self)
+        self.jobs_parents = JobsParentsTable(self)
+
+
+def add_jobs(jobs_builder, batch_id, start, n_jobs, fan_in):
+    pod_spec = json.dumps({
+        'containers': [{
+            'name': 'main',
+            'image': 'ubuntu:18.04',
+            'command': ['/bin/bash', '-c', 'echo ' + 'x' * 512],
+            'resources': {'requests': {'cpu': '100m', 'memory': '500M'}}}],
+        'tolerations': [{'key': 'preemptible', 'value': 'true'}],
+        'service_account': 'batch-output-pod'})
+    for job_id in range(start, start + n_jobs):
+        parent_ids = list(range(max(1, job_id - fan_in), job_id))
+        jobs_builder.create_job(
+            batch_id=batch_id,
+            job_id=job_id,
+            state='Pending' if parent_ids else 'Running',
+            pvc_size=None,
+            callback=None,
+            attributes=json.dumps({'name': f'job-{job_id}'}),
+            always_run=False,
+            token='abcdef',
+            pod_spec=pod_spec,
+            input_files=json.dumps([]),
+            output_files=json.dumps([]),
+            directory=f'gs://bucket/instance/{batch_id}/{job_id}/abcdef/',
+            exit_codes=json.dumps([None, None, None]),
+            durations=json.dumps([None, None, None]),
+            n_pending_parents=len(parent_ids))
+        for parent_id in parent_ids:
+            jobs_builder.create_job_parent(batch_id=batch_id, job_id=job_id, parent_id=parent_id)
+
+
+async def run(db, batch_id, n_jobs, fan_in, chunk_size):
+    start = time.time()
+    for chunk_start in range(1, n_jobs + 1, chunk_size):
+        jobs_builder = JobsBuilder(db)
+        add_jobs(jobs_builder, batch_id, chunk_start, min(chunk_size, n_jobs + 1 - chunk_start), fan_in)
+        assert await jobs_builder.commit()
+        await jobs_builder.close()
+    elapsed = time.time() - start
+    print(f'inserted {n_jobs} jobs in {elapsed:.2f}s: {n_jobs / elapsed:.0f} jobs/sec')
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Load test bulk job insertion.')
+    parser.add_argument('--n-jobs', type=int, default=200_000)
+    parser.add_argument('--fan-in', type=int, default=1,
+                        help='Number of parents of each job.')
+    parser.add_argument('--chunk-size', type=int, default=5000,
+                        help='Number of jobs per JobsBuilder, as in create_jobs.')
+    parser.add_argument('--latency', type=float, default=0.0005,
+                        help='Seconds per statement of the stand-in database.')
+    parser.add_argument('--bytes-per-second', type=float, default=100e6,
+                        help='Transfer rate of the stand-in database.')
+    parser.add_argument('--db-config', type=str,
+                        help='Database config file of a real database to insert into.')
+    parser.add_argument('--batch-id', type=int, default=1,
+                        help='Existing batch to add jobs to with --db-config.')
+    args = parser.parse_args()
+
+    if args.db_config:
+        db = await BatchDatabase(args.db_config)
+    else:
+        db = StandInDatabase(args.latency, args.bytes_per_second)
+    await run(db, args.batch_id, args.n_jobs, args.fan_in, args.chunk_size)
+
+
+if __name__ == '__main__':
+    asyncio.get_event_loop().run_until_complete(main())
@@ -1,7 +1,7 @@
 import random
 import math
 import collections
-from hailtop.batch_client.client import BatchClient
+from hailtop.batch_client.client import BatchClient, as_completed, async_to_blocking, wait_any
 import json
 import os
 import pkg_resources
@@ -234,6 +234,62 @@ class Test(unittest.TestCase):
         n_failed = sum([j['exit_code']['main'] > 0 for j in bstatus['jobs'] if j['state'] in ('Failed', 'Error')])
         assert n_failed == 1, bstatus
 
+    def test_as_completed(self):
+        b = self.client.create_batch()
+        j1 = b.create_job('alpine', ['sleep', '20'])
+        j2 = b.create_job('alpine', ['true'])
+        b.submit()
+
+        b2 = self.client.create_batch()
+        j3 = b2.create_job('alpine', ['sleep', '10'])
+        b2.submit()
+
+        assert wait_any([j1, j3]).id == j3.id
+        completed = [j.id for j in as_completed([j1, j2, j3])]
+        assert sorted(completed) == sorted([j1.id, j2.id, j3.id]), completed
+        assert completed[-1] == j1.id, completed
+        assert j1._status['state'] == 'Success', j1._status
+
+    def test_long_poll_job(self):
+        b = self.client.create_batch()
+        j = b.create_job('alpine', ['sleep', '5'])
+        b.submit()
+
+        # the server responds once the job is complete, not after 30s
+        start = time.time()
+        status = async_to_blocking(self.client._async_client._get(
+            f'/api/v1alpha/batches/{j.batch_id}/jobs/{j.job_id}', wait=30))
+        assert status['state'] == 'Success', status
+        assert time.time() - start < 30
+
+        bstatus = async_to_blocking(self.client._async_client._get(
+            f'/api/v1alpha/batches/{j.batch_id}', params={'limit': '0'}, wait=30))
+        assert bstatus['complete'] and bstatus['n_completed'] == 1, bstatus
+
+        try:
+            async_to_blocking(self.client._async_client._get(
+                f'/api/v1alpha/batches/{j.batch_id}', params={'limit': '0', 'wait': 'nan'}))
+            assert False
+        except aiohttp.ClientResponseError as e:
+            if e.status != 400:
+                raise
+
+    def test_batch_status_completed_after(self):
+        b = self.client.create_batch()
+        j1 = b.create_job('alpine', ['true'])
+        j2 = b.create_job('alpine', ['sleep', '10'])
+        b = b.submit()
+        j1.wait()
+
+        async_batch = b._async_batch
+        status = async_to_blocking(async_batch.status(completed_after=0))
+        assert [j['job_id'] for j in status['jobs']] == [j1.job_id], status
+        n_completed = status['n_completed']
+
+        j2.wait()
+        status = async_to_blocking(async_batch.status(completed_after=n_completed))
+        assert [j['job_id'] for j in status['jobs']] == [j2.job_id], status
+
     def test_batch_status(self):
         b1 = self.client.create_batch()
         b1.create_job('alpine', ['true'])
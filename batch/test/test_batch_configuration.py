@@ -0,0 +1,19 @@
+import importlib
+
+import pytest
+
+import batch.batch_configuration
+
+
+def load_weights(monkeypatch, weights):
+    monkeypatch.setenv('POD_QUEUE_USER_WEIGHTS', weights)
+    return importlib.reload(batch.batch_configuration).POD_QUEUE_USER_WEIGHTS
+
+
+def test_pod_queue_user_weights(monkeypatch):
+    assert load_weights(monkeypatch, '{"a": 2, "b": 0.5}') == {'a': 2, 'b': 0.5}
+    for weights in ['{"a": 0}', '{"a": -1}', '{"a": "2"}', '{"a": true}', '{"a": NaN}', '{"a": Infinity}', '[1]']:
+        with pytest.raises(ValueError):
+            load_weights(monkeypatch, weights)
+    monkeypatch.delenv('POD_QUEUE_USER_WEIGHTS')
+    importlib.reload(batch.batch_configuration)
@@ -0,0 +1,25 @@
+from batch.dag import DAGIndex
+
+
+def test_fan_in_ready_after_last_parent():
+    index = DAGIndex()
+    index.add_batch(1)
+    for job_id in range(1, 101):
+        index.add_job(1, job_id, [])
+    index.add_job(1, 101, list(range(1, 101)))
+
+    for parent_id in range(1, 100):
+        assert index.parent_complete(1, parent_id) == []
+    assert index.parent_complete(1, 100) == [101]
+    assert index.parent_complete(1, 100) == []
+    assert index.parent_complete(1, 101) == []
+
+
+def test_unindexed_batch():
+    index = DAGIndex()
+    index.add_job(2, 2, [1])
+    assert index.parent_complete(2, 1) is None
+
+    index.add_batch(3)
+    index.remove_batch(3)
+    assert index.parent_complete(3, 1) is None
@@ -0,0 +1,31 @@
+import asyncio
+
+from batch.notifier import StateNotifier
+
+
+def run(coro):
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+def test_notify_wakes_subscribers_of_key():
+    notifier = StateNotifier()
+
+    async def main():
+        with notifier.subscribe(('job', 1, 1)) as job_1, notifier.subscribe(('job', 1, 2)) as job_2:
+            asyncio.get_event_loop().call_later(0.01, notifier.notify, ('job', 1, 1))
+            assert await job_1.wait(5)
+            assert not await job_2.wait(0.01)
+        assert not notifier._subscribers
+
+    run(main())
+
+
+def test_notify_before_wait_is_not_missed():
+    notifier = StateNotifier()
+
+    async def main():
+        with notifier.subscribe(('batch', 1)) as subscription:
+            notifier.notify(('batch', 1))
+            assert await subscription.wait(0)
+
+    run(main())
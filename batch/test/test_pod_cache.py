@@ -0,0 +1,84 @@
+import asyncio
+import concurrent.futures
+from types import SimpleNamespace
+
+from batch.pod_cache import PodCache, ResourceVersionExpired
+
+
+def make_pod(name, resource_version, phase, exit_code=None):
+    terminated = SimpleNamespace(exit_code=exit_code) if exit_code is not None else None
+    state = SimpleNamespace(terminated=terminated, running=None if terminated else True, waiting=None)
+    return SimpleNamespace(
+        metadata=SimpleNamespace(name=name, resource_version=resource_version),
+        status=SimpleNamespace(phase=phase, reason=None, init_container_statuses=[],
+                               container_statuses=[SimpleNamespace(name='main', state=state)]))
+
+
+class FakePodCache(PodCache):
+    def __init__(self, pods, events):
+        super().__init__(concurrent.futures.ThreadPoolExecutor(), self, 'ns', 'app=batch-job', self.changed)
+        self.listed = pods
+        self.events = events
+        self.changes = []
+
+    def list_namespaced_pod(self, namespace, label_selector):
+        return SimpleNamespace(items=self.listed, metadata=SimpleNamespace(resource_version='10'))
+
+    def _stream(self):
+        return iter(self.events)
+
+    async def changed(self, pod):
+        self.changes.append((pod.metadata.name, pod.metadata.resource_version))
+
+
+def test_watch_only_passes_on_state_changes():
+    cache = FakePodCache(
+        [make_pod('a', '1', 'Running'), make_pod('b', '2', 'Running')],
+        [{'type': 'MODIFIED', 'object': make_pod('a', '11', 'Running')},
+         {'type': 'MODIFIED', 'object': make_pod('a', '12', 'Succeeded', exit_code=0)},
+         {'type': 'DELETED', 'object': make_pod('b', '13', 'Running')}])
+
+    async def run():
+        await cache.relist()
+        await cache.watch()
+    asyncio.get_event_loop().run_until_complete(run())
+
+    assert cache.changes == [('a', '1'), ('b', '2'), ('a', '12'), ('b', '13')]
+    assert cache.pod_names() == {'a'}
+    assert cache.resource_version == '13'
+
+
+def test_expired_resource_version():
+    cache = FakePodCache([], [{'type': 'ERROR', 'object': None, 'raw_object': {'code': 410, 'message': 'too old'}}])
+    cache.resource_version = '5'
+    try:
+        asyncio.get_event_loop().run_until_complete(cache.watch())
+        assert False
+    except ResourceVersionExpired:
+        pass
+
+
+def test_failed_changes_are_retried():
+    cache = FakePodCache([], [{'type': 'ADDED', 'object': make_pod('a', '11', 'Running')},
+                              {'type': 'MODIFIED', 'object': make_pod('a', '12', 'Running')}])
+    fail = [True]
+
+    async def changed(pod):
+        cache.changes.append((pod.metadata.name, pod.metadata.resource_version))
+        if fail[0]:
+            raise ValueError('database is down')
+    cache.on_change = changed
+
+    async def run():
+        await cache.relist()
+        await cache.watch()
+        assert cache.failed.keys() == {'a'}
+        fail[0] = False
+        await cache.retry_failed()
+        await cache.retry_failed()
+    asyncio.get_event_loop().run_until_complete(run())
+
+    # the unchanged update is passed on because the first one failed, and
+    # the pod is retried once after the failures stop
+    assert cache.changes == [('a', '11'), ('a', '12'), ('a', '12')]
+    assert not cache.failed
@@ -0,0 +1,58 @@
+import asyncio
+from types import SimpleNamespace
+
+from batch.throttler import FairShareQueue
+
+
+def make_job(user, batch_id, job_id, priority=None):
+    attributes = {'priority': str(priority)} if priority is not None else None
+    return SimpleNamespace(user=user, batch_id=batch_id, job_id=job_id, attributes=attributes)
+
+
+def drain(queue):
+    jobs = []
+    while queue.qsize() > 0:
+        job = queue.get_nowait()
+        jobs.append((job.user, job.batch_id, job.job_id))
+    return jobs
+
+
+def test_users_share_fairly():
+    queue = FairShareQueue(1000)
+    for i in range(100):
+        queue.put_nowait(make_job('big', 1, i))
+    queue.put_nowait(make_job('small', 2, 0))
+    queue.put_nowait(make_job('small', 2, 1))
+
+    jobs = drain(queue)
+    assert jobs[:4] == [('big', 1, 0), ('small', 2, 0), ('big', 1, 1), ('small', 2, 1)]
+    assert len(jobs) == 102
+
+
+def test_user_weights_batches_and_priority():
+    queue = FairShareQueue(1000, user_weights={'a': 2})
+    for i in range(3):
+        queue.put_nowait(make_job('a', 1, i))
+    queue.put_nowait(make_job('a', 2, 0))
+    queue.put_nowait(make_job('a', 2, 1, priority=5))
+    for i in range(3):
+        queue.put_nowait(make_job('b', 3, i))
+
+    assert drain(queue) == [
+        ('a', 1, 0), ('a', 2, 1), ('b', 3, 0),
+        ('a', 1, 1), ('a', 2, 0), ('b', 3, 1),
+        ('a', 1, 2), ('b', 3, 2)]
+
+
+def test_full_and_get():
+    queue = FairShareQueue(1)
+    queue.put_nowait(make_job('a', 1, 0))
+    assert queue.full()
+    try:
+        queue.put_nowait(make_job('a', 1, 1))
+        assert False
+    except asyncio.QueueFull:
+        pass
+    job = asyncio.get_event_loop().run_until_complete(queue.get())
+    assert job.job_id == 0
+    assert not queue.full()
@@ -1,5 +1,10 @@
 import abc
+import asyncio
+import collections
+import gzip
+import hashlib
 import os
+import threading
 
 from hail.utils.java import *
 from hail.expr.types import dtype
@@ -7,17 +12,29 @@ from hail.expr.table_type import *
 from hail.expr.matrix_type import *
 from hail.expr.blockmatrix_type import *
 from hail.ir.renderer import Renderer
+from hail.backend.codec import decode_value, encode_value, n_values_at_least
 from hail.table import Table
 from hail.matrixtable import MatrixTable
 
+import aiohttp
 import requests
 
 import pyspark
 
+# results are shipped from the JVM in Hail's native binary encoding and
+# decoded directly into Python values, see hail.backend.codec
+_result_codec = 'unblockedUncompressed'
+
+# literals with at least this many values are shipped to the JVM in the same
+# encoding rather than as JSON inside the IR string
+_encoded_literal_threshold = 10_000
+# Java IRs of the most recently used encoded literals are kept for reuse
+_encoded_literal_cache_size = 32
+
 
 class Backend(abc.ABC):
     @abc.abstractmethod
-    def execute(self, ir, timed=False):
+    def execute(self, ir, timed=False, _lazy=False):
         return
 
     @abc.abstractmethod
@@ -85,10 +102,37 @@ class Backend(abc.ABC):
     def fs(self):
         pass
 
+    def _encoded_literal_jir(self, typ, value):
+        """Returns a Java IR for the literal `value` of type `typ`, shipped to
+        the JVM encoded, or ``None`` if it should be rendered inline.
+
+        Literals with the same type and value share one Java IR."""
+        return None
+
+
+def _encoded_literal_jir(jbackend, literal_jirs, typ, value):
+    if not n_values_at_least(value, _encoded_literal_threshold):
+        return None
+    try:
+        ptype_string, buf = encode_value(typ, value)
+    except NotImplementedError:
+        return None
+    key = (ptype_string, hashlib.sha256(buf).digest())
+    jir = literal_jirs.get(key)
+    if jir is None:
+        jir = jbackend.decodeLiteral(ptype_string, buf, _result_codec)
+        literal_jirs[key] = jir
+        if len(literal_jirs) > _encoded_literal_cache_size:
+            literal_jirs.popitem(last=False)
+    else:
+        literal_jirs.move_to_end(key)
+    return jir
+
 
 class SparkBackend(Backend):
     def __init__(self):
         self._fs = None
+        self._literal_jirs = collections.OrderedDict()
 
     @property
     def fs(self):
@@ -104,10 +148,13 @@ class SparkBackend(Backend):
             ir._jir = ir.parse(r(ir), ir_map=r.jirs)
         return ir._jir
 
-    def execute(self, ir, timed=False):
-        result = json.loads(Env.hc()._jhc.backend().executeJSON(self._to_java_ir(ir)))
-        value = ir.typ._from_json(result['value'])
-        timings = result['timings']
+    def _encoded_literal_jir(self, typ, value):
+        return _encoded_literal_jir(Env.hc()._jhc.backend(), self._literal_jirs, typ, value)
+
+    def execute(self, ir, timed=False, _lazy=False):
+        result = Env.hc()._jhc.backend().executeEncode(self._to_java_ir(ir), _result_codec)
+        value = decode_value(ir.typ, result._1(), result._2(), lazy=_lazy)
+        timings = json.loads(result._3())
 
         return (value, timings) if timed else value
 
@@ -189,7 +236,7 @@ class SparkBackend(Backend):
 
 class LocalBackend(Backend):
     def __init__(self):
-        pass
+        self._literal_jirs = collections.OrderedDict()
 
     def _to_java_ir(self, ir):
         if not hasattr(ir, '_jir'):
@@ -198,14 +245,29 @@ class LocalBackend(Backend):
             ir._jir = ir.parse(r(ir), ir_map=r.jirs)
         return ir._jir
 
-    def execute(self, ir, timed=False):
-        result = json.loads(Env.hail().expr.ir.LocalBackend.executeJSON(self._to_java_ir(ir)))
-        value = ir.typ._from_json(result['value'])
-        timings = result['timings']
+    def _encoded_literal_jir(self, typ, value):
+        return _encoded_literal_jir(Env.hail().expr.ir.LocalBackend, self._literal_jirs, typ, value)
+
+    def execute(self, ir, timed=False, _lazy=False):
+        result = Env.hail().expr.ir.LocalBackend.executeEncode(self._to_java_ir(ir), _result_codec)
+        value = decode_value(ir.typ, result._1(), result._2(), lazy=_lazy)
+        timings = json.loads(result._3())
         return (value, timings) if timed else value
 
 
 class ServiceBackend(Backend):
+    """Backend that sends IR to the Hail API server.
+
+    Requests share a pool of keep-alive connections, bodies larger than
+    `_gzip_threshold` bytes are gzipped, and types are cached by rendered
+    IR, so building a pipeline does not ask the server for the same type
+    twice. The ``async_*_type`` methods issue type requests on an
+    :mod:`aiohttp` session so independent requests can run concurrently.
+    """
+
+    _gzip_threshold = 1024
+    _type_cache_size = 4096
+
     def __init__(self, url, token=None, token_file=None):
         if token_file is not None and token is not None:
             raise ValueError('set only one of token_file and token')
@@ -223,6 +285,13 @@ class ServiceBackend(Backend):
                 token = f.read()
         self.cookies = {'user': token}
 
+        self._session = requests.Session()
+        self._session.cookies.update(self.cookies)
+        self._async_session = None
+        self._async_loop = None
+        self._type_cache = collections.OrderedDict()
+        self._type_cache_lock = threading.Lock()
+
         self._fs = None
 
     @property
@@ -232,20 +301,41 @@ class ServiceBackend(Backend):
             self._fs = GoogleCloudStorageFS()
         return self._fs
 
+    def close(self):
+        self._session.close()
+
+    async def async_close(self):
+        if self._async_session is not None:
+            await self._async_session.close()
+            self._async_session = None
+
     def _render(self, ir):
         r = Renderer()
         assert len(r.jirs) == 0
         return r(ir)
 
-    def execute(self, ir, timed=False):
-        code = self._render(ir)
-        resp = requests.post(f'{self.url}/execute', json=code, cookies=self.cookies)
+    def _encode_body(self, body):
+        data = json.dumps(body).encode('utf-8')
+        headers = {'Content-Type': 'application/json'}
+        if len(data) > self._gzip_threshold:
+            data = gzip.compress(data)
+            headers['Content-Encoding'] = 'gzip'
+        return data, headers
+
+    def _request(self, method, path, body):
+        data, headers = self._encode_body(body)
+        resp = self._session.request(method, f'{self.url}{path}', data=data, headers=headers)
         if resp.status_code == 400:
             resp_json = resp.json()
             raise FatalError(resp_json['message'])
         resp.raise_for_status()
+        return resp
 
-        resp_json = resp.json()
+    def execute(self, ir, timed=False, _lazy=False):
+        # results come back as JSON and are always decoded in full, so
+        # _lazy is ignored
+        code = self._render(ir)
+        resp_json = self._request('POST', '/execute', code).json()
         typ = dtype(resp_json['type'])
         result = json.loads(resp_json['result'])
         value = typ._from_json(result['value'])
@@ -253,41 +343,77 @@ class ServiceBackend(Backend):
 
         return (value, timings) if timed else value
 
-    def _request_type(self, ir, kind):
+    def _cached_type(self, key):
+        with self._type_cache_lock:
+            typ = self._type_cache.get(key)
+            if typ is not None:
+                self._type_cache.move_to_end(key)
+            return typ
+
+    def _cache_type(self, key, typ):
+        with self._type_cache_lock:
+            self._type_cache[key] = typ
+            if len(self._type_cache) > self._type_cache_size:
+                self._type_cache.popitem(last=False)
+        return typ
+
+    def _request_type(self, ir, kind, parse):
         code = self._render(ir)
-        resp = requests.post(f'{self.url}/type/{kind}', json=code, cookies=self.cookies)
-        if resp.status_code == 400:
-            resp_json = resp.json()
-            raise FatalError(resp_json['message'])
-        resp.raise_for_status()
-
-        return resp.json()
+        key = (kind, code)
+        typ = self._cached_type(key)
+        if typ is None:
+            typ = self._cache_type(key, parse(self._request('POST', f'/type/{kind}', code).json()))
+        return typ
 
     def value_type(self, ir):
-        resp = self._request_type(ir, 'value')
-        return dtype(resp)
+        return self._request_type(ir, 'value', dtype)
 
     def table_type(self, tir):
-        resp = self._request_type(tir, 'table')
-        return ttable._from_json(resp)
+        return self._request_type(tir, 'table', ttable._from_json)
 
     def matrix_type(self, mir):
-        resp = self._request_type(mir, 'matrix')
-        return tmatrix._from_json(resp)
+        return self._request_type(mir, 'matrix', tmatrix._from_json)
 
     def blockmatrix_type(self, bmir):
-        resp = self._request_type(bmir, 'blockmatrix')
-        return tblockmatrix._from_json(resp)
+        return self._request_type(bmir, 'blockmatrix', tblockmatrix._from_json)
+
+    async def _async_request_type(self, ir, kind, parse):
+        code = self._render(ir)
+        key = (kind, code)
+        typ = self._cached_type(key)
+        if typ is not None:
+            return typ
+
+        # a session is bound to the event loop it was created on
+        loop = asyncio.get_event_loop()
+        if self._async_session is None or self._async_session.closed or self._async_loop is not loop:
+            self._async_session = aiohttp.ClientSession(cookies=self.cookies)
+            self._async_loop = loop
+        data, headers = self._encode_body(code)
+        async with self._async_session.post(f'{self.url}/type/{kind}', data=data, headers=headers) as resp:
+            if resp.status == 400:
+                resp_json = await resp.json()
+                raise FatalError(resp_json['message'])
+            resp.raise_for_status()
+            return self._cache_type(key, parse(await resp.json()))
+
+    async def async_value_type(self, ir):
+        return await self._async_request_type(ir, 'value', dtype)
+
+    async def async_table_type(self, tir):
+        return await self._async_request_type(tir, 'table', ttable._from_json)
+
+    async def async_matrix_type(self, mir):
+        return await self._async_request_type(mir, 'matrix', tmatrix._from_json)
+
+    async def async_blockmatrix_type(self, bmir):
+        return await self._async_request_type(bmir, 'blockmatrix', tblockmatrix._from_json)
 
     def add_reference(self, config):
-        resp = requests.post(f'{self.url}/references/create', json=config, cookies=self.cookies)
-        if resp.status_code == 400:
-            resp_json = resp.json()
-            raise FatalError(resp_json['message'])
-        resp.raise_for_status()
+        self._request('POST', '/references/create', config)
 
     def from_fasta_file(self, name, fasta_file, index_file, x_contigs, y_contigs, mt_contigs, par):
-        resp = requests.post(f'{self.url}/references/create/fasta', json={
+        self._request('POST', '/references/create/fasta', {
             'name': name,
             'fasta_file': fasta_file,
             'index_file': index_file,
@@ -295,74 +421,29 @@ class ServiceBackend(Backend):
             'y_contigs': y_contigs,
             'mt_contigs': mt_contigs,
             'par': par
-        }, cookies=self.cookies)
-        if resp.status_code == 400:
-            resp_json = resp.json()
-            raise FatalError(resp_json['message'])
-        resp.raise_for_status()
+        })
 
     def remove_reference(self, name):
-        resp = requests.delete(f'{self.url}/references/delete',
-                               json={'name': name},
-                               cookies=self.cookies)
-        if resp.status_code == 400:
-            resp_json = resp.json()
-            raise FatalError(resp_json['message'])
-        resp.raise_for_status()
+        self._request('DELETE', '/references/delete', {'name': name})
 
     def get_reference(self, name):
-        resp = requests.get(f'{self.url}/references/get',
-                            json={'name': name},
-                            cookies=self.cookies)
-        if resp.status_code == 400:
-            resp_json = resp.json()
-            raise FatalError(resp_json['message'])
-        resp.raise_for_status()
-        return resp.json()
+        return self._request('GET', '/references/get', {'name': name}).json()
 
     def add_sequence(self, name, fasta_file, index_file):
-        resp = requests.post(f'{self.url}/references/sequence/set',
-                             json={'name': name, 'fasta_file': fasta_file, 'index_file': index_file},
-                             cookies=self.cookies)
-        if resp.status_code == 400:
-            resp_json = resp.json()
-            raise FatalError(resp_json['message'])
-        resp.raise_for_status()
+        self._request('POST', '/references/sequence/set',
+                      {'name': name, 'fasta_file': fasta_file, 'index_file': index_file})
 
     def remove_sequence(self, name):
-        resp = requests.delete(f'{self.url}/references/sequence/delete',
-                               json={'name': name},
-                               cookies=self.cookies)
-        if resp.status_code == 400:
-            resp_json = resp.json()
-            raise FatalError(resp_json['message'])
-        resp.raise_for_status()
+        self._request('DELETE', '/references/sequence/delete', {'name': name})
 
     def add_liftover(self, name, chain_file, dest_reference_genome):
-        resp = requests.post(f'{self.url}/references/liftover/add',
-                             json={'name': name, 'chain_file': chain_file,
-                                   'dest_reference_genome': dest_reference_genome},
-                             cookies=self.cookies)
-        if resp.status_code == 400:
-            resp_json = resp.json()
-            raise FatalError(resp_json['message'])
-        resp.raise_for_status()
+        self._request('POST', '/references/liftover/add',
+                      {'name': name, 'chain_file': chain_file,
+                       'dest_reference_genome': dest_reference_genome})
 
     def remove_liftover(self, name, dest_reference_genome):
-        resp = requests.delete(f'{self.url}/references/liftover/remove',
-                               json={'name': name, 'dest_reference_genome': dest_reference_genome},
-                               cookies=self.cookies)
-        if resp.status_code == 400:
-            resp_json = resp.json()
-            raise FatalError(resp_json['message'])
-        resp.raise_for_status()
+        self._request('DELETE', '/references/liftover/remove',
+                      {'name': name, 'dest_reference_genome': dest_reference_genome})
 
     def parse_vcf_metadata(self, path):
-        resp = requests.post(f'{self.url}/parse-vcf-metadata',
-                             json={'path': path},
-                             cookies=self.cookies)
-        if resp.status_code == 400:
-            resp_json = resp.json()
-            raise FatalError(resp_json['message'])
-        resp.raise_for_status()
-        return resp.json()
+        return self._request('POST', '/parse-vcf-metadata', {'path': path}).json()
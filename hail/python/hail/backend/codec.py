@@ -0,0 +1,618 @@
+import re
+import struct
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+
+from hail import genetics
+from hail.expr.types import tarray, tset, tdict, tstruct, ttuple, tinterval, tlocus, tndarray, \
+    tint32, tint64, tfloat32, tfloat64, tbool, tstr, tcall, tvoid
+from hail.utils.interval import Interval
+from hail.utils.struct import Struct
+
+_int32 = struct.Struct('<i')
+_int64 = struct.Struct('<q')
+_float32 = struct.Struct('<f')
+_float64 = struct.Struct('<d')
+
+_ptype_token = re.compile(r'\s*(?:(`(?:[^`\\]|\\.)*`)|(\w+)|(\S))')
+
+
+class StructArray(Sequence):
+    """Columnar, lazily materialized array of :class:`.Struct`.
+
+    Field values are held column by column; a :class:`.Struct` is only built
+    when an element is accessed.
+
+    Parameters
+    ----------
+    dtype : :class:`.tstruct`
+        Element type.
+    columns : :obj:`dict` of :obj:`str` to :obj:`list`
+        Values of each field, in row order.
+    missing : :obj:`set` of :obj:`int`
+        Indices of missing elements.
+    n : :obj:`int`
+        Number of elements.
+    """
+
+    def __init__(self, dtype, columns, missing, n):
+        self.dtype = dtype
+        self._columns = columns
+        self._missing = missing
+        self._n = n
+
+    def __len__(self):
+        return self._n
+
+    def _row(self, i):
+        if i in self._missing:
+            return None
+        return Struct(**{f: c[i] for f, c in self._columns.items()})
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self._row(i) for i in range(*item.indices(self._n))]
+        if item < 0:
+            item += self._n
+        if not 0 <= item < self._n:
+            raise IndexError(f'StructArray index out of range: {item}')
+        return self._row(item)
+
+    def __iter__(self):
+        for i in range(self._n):
+            yield self._row(i)
+
+    def __eq__(self, other):
+        return isinstance(other, Sequence) and list(self) == list(other)
+
+    def __repr__(self):
+        return f'StructArray(dtype={self.dtype!r}, n={self._n})'
+
+    def column(self, field):
+        """Values of `field` across all elements, with ``None`` for missing
+        elements.
+
+        Parameters
+        ----------
+        field : :obj:`str`
+
+        Returns
+        -------
+        :obj:`list`
+        """
+        return self._columns[field]
+
+    def to_numpy_columns(self):
+        """Convert each field to a NumPy column, see
+        :meth:`.Table.to_numpy_columns`.
+
+        Returns
+        -------
+        :obj:`dict` of :obj:`str` to :class:`numpy.ndarray` or :obj:`dict`
+        """
+        return {f: _numpy_column(t, self._columns[f]) for f, t in self.dtype.items()}
+
+    def to_arrow_batch(self):
+        """Convert to a :class:`pyarrow.RecordBatch`, see
+        :meth:`.Table.to_arrow`.
+
+        Returns
+        -------
+        :class:`pyarrow.RecordBatch`
+        """
+        import pyarrow as pa
+        arrays = [pa.array([_arrow_value(t, v) for v in self._columns[f]], type=_arrow_type(t))
+                  for f, t in self.dtype.items()]
+        return pa.RecordBatch.from_arrays(arrays, list(self.dtype))
+
+
+_numpy_types = {tint32: np.int32, tint64: np.int64, tfloat32: np.float32, tfloat64: np.float64, tbool: np.bool_}
+
+
+def _struct_fields(t):
+    """Fields of the struct representation of a locus, interval or struct."""
+    if isinstance(t, tlocus):
+        return [('contig', tstr), ('position', tint32)]
+    if isinstance(t, tinterval):
+        return [('start', t.point_type), ('end', t.point_type),
+                ('includes_start', tbool), ('includes_end', tbool)]
+    return list(t.items())
+
+
+def _struct_field_value(v, f):
+    if isinstance(v, Struct):
+        return v[f]
+    return getattr(v, f)
+
+
+def _numpy_column(t, values):
+    """Converts a list of values of type `t` to a NumPy column. Numeric and
+    boolean columns with missing values are masked arrays; structs, loci and
+    intervals are dictionaries of columns."""
+    if t in _numpy_types:
+        mask = np.fromiter((v is None for v in values), dtype=np.bool_, count=len(values))
+        if mask.any():
+            data = np.array([0 if v is None else v for v in values], dtype=_numpy_types[t])
+            return np.ma.masked_array(data, mask=mask)
+        return np.array(values, dtype=_numpy_types[t])
+    if isinstance(t, (tstruct, tlocus, tinterval)):
+        return {f: _numpy_column(ft, [None if v is None else _struct_field_value(v, f) for v in values])
+                for f, ft in _struct_fields(t)}
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+
+def _concatenate_columns(columns):
+    first = columns[0]
+    if isinstance(first, dict):
+        return {f: _concatenate_columns([c[f] for c in columns]) for f in first}
+    if any(isinstance(c, np.ma.MaskedArray) for c in columns):
+        return np.ma.concatenate(columns)
+    return np.concatenate(columns)
+
+
+def _arrow_type(t):
+    import pyarrow as pa
+    if t == tint32:
+        return pa.int32()
+    if t == tint64:
+        return pa.int64()
+    if t == tfloat32:
+        return pa.float32()
+    if t == tfloat64:
+        return pa.float64()
+    if t == tbool:
+        return pa.bool_()
+    if t == tstr:
+        return pa.string()
+    if isinstance(t, (tarray, tset)):
+        return pa.list_(_arrow_type(t.element_type))
+    if isinstance(t, (tstruct, tlocus, tinterval)):
+        return pa.struct([pa.field(f, _arrow_type(ft)) for f, ft in _struct_fields(t)])
+    raise NotImplementedError(f'cannot convert values of type {t} to Arrow')
+
+
+def _arrow_value(t, v):
+    if v is None:
+        return v
+    if isinstance(t, (tarray, tset)):
+        return [_arrow_value(t.element_type, x) for x in v]
+    if isinstance(t, (tstruct, tlocus, tinterval)):
+        return {f: _arrow_value(ft, _struct_field_value(v, f)) for f, ft in _struct_fields(t)}
+    return v
+
+
+class _PTypeParser(object):
+    """Parses the compact physical type strings produced by the JVM into
+    nested ``(required, children)`` pairs. Only requiredness is kept; names,
+    reference genomes and dimensions come from the virtual type."""
+
+    def __init__(self, s):
+        self.tokens = [next(t for t in groups if t) for groups in _ptype_token.findall(s)]
+        self.i = 0
+
+    def _next(self):
+        t = self.tokens[self.i]
+        self.i += 1
+        return t
+
+    def _expect(self, token):
+        t = self._next()
+        if t != token:
+            raise ValueError(f'invalid physical type: expected {token!r}, found {t!r}')
+
+    def _peek(self):
+        return self.tokens[self.i]
+
+    def _types_until(self, close, named=False):
+        children = []
+        while self._peek() != close:
+            if named:
+                self._next()
+                self._expect(':')
+            children.append(self.parse())
+            if self._peek() == ',':
+                self._next()
+        self._next()
+        return children
+
+    def parse(self):
+        required = False
+        if self._peek() == '+':
+            self._next()
+            required = True
+        name = self._next()
+        if name == 'Struct':
+            self._expect('{')
+            return required, self._types_until('}', named=True)
+        if name == 'TupleSubset':
+            self._expect('[')
+            return required, self._types_until(']', named=True)
+        if name == 'Locus':
+            self._expect('(')
+            while self._next() != ')':
+                pass
+            return required, []
+        if name == 'NDArray':
+            self._expect('[')
+            element = self.parse()
+            self._expect(',')
+            self._next()
+            self._expect(']')
+            return required, [element]
+        if name in ('Tuple', 'Array', 'Set', 'Dict', 'Interval'):
+            self._expect('[')
+            return required, self._types_until(']')
+        return required, []
+
+
+def _parse_ptype(s):
+    return _PTypeParser(s).parse()
+
+
+def _read_str(buf, off):
+    n = _int32.unpack_from(buf, off)[0]
+    off += 4
+    return bytes(buf[off:off + n]).decode('utf-8'), off + n
+
+
+def _missing_bits(buf, off, n):
+    nbytes = (n + 7) >> 3
+    bits = buf[off:off + nbytes]
+    return [bool(bits[i >> 3] & (1 << (i & 7))) for i in range(n)], off + nbytes
+
+
+def _fields_decoder(types, ptypes):
+    """Returns a function decoding the missing bytes and values of a struct or
+    tuple, producing a list of field values."""
+    decoders = [_decoder(t, pt) for t, pt in zip(types, ptypes)]
+    optional = [not pt[0] for pt in ptypes]
+    n_optional = sum(optional)
+    n_missing_bytes = (n_optional + 7) >> 3
+
+    def decode(buf, off):
+        moff = off
+        off += n_missing_bytes
+        values = []
+        j = 0
+        for d, opt in zip(decoders, optional):
+            if opt:
+                is_missing = buf[moff + (j >> 3)] & (1 << (j & 7))
+                j += 1
+                if is_missing:
+                    values.append(None)
+                    continue
+            v, off = d(buf, off)
+            values.append(v)
+        return values, off
+
+    return decode
+
+
+def _array_decoder(element_decoder, element_required, unpacker=None):
+    """Returns a function decoding an array to a list. If `unpacker` is given,
+    arrays with no missing elements are decoded in one call."""
+    if unpacker is not None:
+        fmt, size = unpacker
+
+    def decode(buf, off):
+        n = _int32.unpack_from(buf, off)[0]
+        off += 4
+        if element_required:
+            missing = None
+        else:
+            nbytes = (n + 7) >> 3
+            if any(buf[off:off + nbytes]):
+                missing, off = _missing_bits(buf, off, n)
+            else:
+                missing = None
+                off += nbytes
+        if missing is None and unpacker is not None:
+            return list(struct.unpack_from(f'<{n}{fmt}', buf, off)), off + n * size
+        values = []
+        for i in range(n):
+            if missing is not None and missing[i]:
+                values.append(None)
+            else:
+                v, off = element_decoder(buf, off)
+                values.append(v)
+        return values, off
+
+    return decode
+
+
+_unpackers = {tint32: ('i', 4), tint64: ('q', 8), tfloat32: ('f', 4), tfloat64: ('d', 8)}
+
+
+def _decoder(t, pt):
+    """Builds a function ``(buf, off) -> (value, off)`` decoding a present value
+    of virtual type `t` whose physical type (requiredness) is `pt`."""
+    _, children = pt
+    if t == tint32:
+        return lambda buf, off: (_int32.unpack_from(buf, off)[0], off + 4)
+    if t == tint64:
+        return lambda buf, off: (_int64.unpack_from(buf, off)[0], off + 8)
+    if t == tfloat32:
+        return lambda buf, off: (_float32.unpack_from(buf, off)[0], off + 4)
+    if t == tfloat64:
+        return lambda buf, off: (_float64.unpack_from(buf, off)[0], off + 8)
+    if t == tbool:
+        return lambda buf, off: (buf[off] != 0, off + 1)
+    if t == tstr:
+        return _read_str
+    if t == tcall:
+        return lambda buf, off: (genetics.Call._from_java(_int32.unpack_from(buf, off)[0]), off + 4)
+    if isinstance(t, tlocus):
+        rg = t.reference_genome
+
+        def decode_locus(buf, off):
+            contig, off = _read_str(buf, off)
+            position = _int32.unpack_from(buf, off)[0]
+            return genetics.Locus(contig, position, reference_genome=rg), off + 4
+
+        return decode_locus
+    if isinstance(t, tstruct):
+        decode_fields = _fields_decoder(list(t.values()), children)
+        names = list(t)
+
+        def decode_struct(buf, off):
+            values, off = decode_fields(buf, off)
+            return Struct(**dict(zip(names, values))), off
+
+        return decode_struct
+    if isinstance(t, ttuple):
+        decode_fields = _fields_decoder(list(t.types), children)
+
+        def decode_tuple(buf, off):
+            values, off = decode_fields(buf, off)
+            return tuple(values), off
+
+        return decode_tuple
+    if isinstance(t, tinterval):
+        point_pt = children[0]
+        decode_fields = _fields_decoder([t.point_type, t.point_type, tbool, tbool],
+                                        [point_pt, point_pt, (True, []), (True, [])])
+        point_type = t.point_type
+
+        def decode_interval(buf, off):
+            (start, end, includes_start, includes_end), off = decode_fields(buf, off)
+            return Interval(start, end, includes_start, includes_end, point_type=point_type), off
+
+        return decode_interval
+    if isinstance(t, (tarray, tset)):
+        element_pt = children[0]
+        decode_array = _array_decoder(_decoder(t.element_type, element_pt),
+                                      element_pt[0],
+                                      _unpackers.get(t.element_type))
+        if isinstance(t, tarray):
+            return decode_array
+
+        def decode_set(buf, off):
+            values, off = decode_array(buf, off)
+            return set(values), off
+
+        return decode_set
+    if isinstance(t, tdict):
+        decode_entry = _fields_decoder([t.key_type, t.value_type], children)
+        decode_entries = _array_decoder(decode_entry, True)
+
+        def decode_dict(buf, off):
+            entries, off = decode_entries(buf, off)
+            return {k: v for k, v in entries}, off
+
+        return decode_dict
+    if isinstance(t, tndarray):
+        element_pt = children[0]
+        np_type = t.element_type.to_numpy()
+        int64_tuple = (True, [(True, [])] * t.ndim)
+        decode_fields = _fields_decoder(
+            [tint32, tint32, ttuple(*[tint64] * t.ndim), ttuple(*[tint64] * t.ndim), tarray(t.element_type)],
+            [(True, []), (True, []), int64_tuple, int64_tuple, (True, [element_pt])])
+
+        def decode_ndarray(buf, off):
+            (_, _, shape, strides, data), off = decode_fields(buf, off)
+            return np.ndarray(shape=shape, buffer=np.array(data, dtype=np_type), strides=strides, dtype=np_type), off
+
+        return decode_ndarray
+    raise NotImplementedError(f'cannot decode values of type {t}')
+
+
+def _struct_array_decoder(t, pt):
+    """Decodes an array of structs into a :class:`StructArray`."""
+    element_t = t.element_type
+    element_required, field_pts = pt[1][0]
+    names = list(element_t)
+    decode_fields = _fields_decoder(list(element_t.values()), field_pts)
+
+    def decode(buf, off):
+        n = _int32.unpack_from(buf, off)[0]
+        off += 4
+        if element_required:
+            missing = [False] * n
+        else:
+            missing, off = _missing_bits(buf, off, n)
+        columns = [[] for _ in names]
+        missing_rows = set()
+        for i in range(n):
+            if missing[i]:
+                missing_rows.add(i)
+                for c in columns:
+                    c.append(None)
+            else:
+                values, off = decode_fields(buf, off)
+                for c, v in zip(columns, values):
+                    c.append(v)
+        return StructArray(element_t, dict(zip(names, columns)), missing_rows, n), off
+
+    return decode
+
+
+def decode_value(typ, ptype_string, buf, lazy=False):
+    """Decodes a value of type `typ` encoded with the ``unblockedUncompressed``
+    codec as the single field of a tuple of physical type `ptype_string`.
+
+    If `lazy` is true and `typ` is an array of structs, the result is a
+    :class:`StructArray`.
+    """
+    if typ == tvoid:
+        return None
+    buf = memoryview(buf)
+    (_, [pt]) = _parse_ptype(ptype_string)
+    # the single-field tuple has one missing byte unless its field is required
+    off = 0
+    if not pt[0]:
+        if buf[0] & 1:
+            return None
+        off = 1
+    if lazy and isinstance(typ, tarray) and isinstance(typ.element_type, tstruct):
+        decode = _struct_array_decoder(typ, pt)
+    else:
+        decode = _decoder(typ, pt)
+    value, _ = decode(buf, off)
+    return value
+
+
+def _fields_encoder(types):
+    """Returns a function encoding the values of a struct or tuple whose fields
+    are all optional."""
+    encoders = [_encoder(t) for t in types]
+    n_missing_bytes = (len(types) + 7) >> 3
+
+    def encode(values, out):
+        moff = len(out)
+        out += bytes(n_missing_bytes)
+        for i, (e, v) in enumerate(zip(encoders, values)):
+            if v is None:
+                out[moff + (i >> 3)] |= 1 << (i & 7)
+            else:
+                e(v, out)
+
+    return encode
+
+
+def _array_encoder(element_encoder, element_required, packer=None):
+    """Returns a function encoding a collection as an array. If `packer` is
+    given, collections with no missing elements are encoded in one call."""
+
+    def encode(values, out):
+        values = list(values)
+        n = len(values)
+        out += _int32.pack(n)
+        if not element_required:
+            missing = bytearray((n + 7) >> 3)
+            has_missing = False
+            for i, v in enumerate(values):
+                if v is None:
+                    missing[i >> 3] |= 1 << (i & 7)
+                    has_missing = True
+            out += missing
+            if not has_missing and packer is not None:
+                out += struct.pack(f'<{n}{packer}', *values)
+                return
+        for v in values:
+            if v is not None:
+                element_encoder(v, out)
+
+    return encode
+
+
+def _write_str(s, out):
+    b = s.encode('utf-8')
+    out += _int32.pack(len(b))
+    out += b
+
+
+def _encoder(t):
+    """Builds a function ``(value, out)`` appending the encoding of a present
+    value of virtual type `t`, in its canonical physical type, to the
+    :obj:`bytearray` `out`."""
+    if t == tint32:
+        return lambda v, out: out.extend(_int32.pack(v))
+    if t == tint64:
+        return lambda v, out: out.extend(_int64.pack(v))
+    if t == tfloat32:
+        return lambda v, out: out.extend(_float32.pack(v))
+    if t == tfloat64:
+        return lambda v, out: out.extend(_float64.pack(v))
+    if t == tbool:
+        return lambda v, out: out.append(1 if v else 0)
+    if t == tstr:
+        return _write_str
+    if t == tcall:
+        return lambda v, out: out.extend(_int32.pack(v._call))
+    if isinstance(t, tlocus):
+        def encode_locus(v, out):
+            _write_str(v.contig, out)
+            out += _int32.pack(v.position)
+
+        return encode_locus
+    if isinstance(t, tstruct):
+        encode_fields = _fields_encoder(list(t.values()))
+        names = list(t)
+        return lambda v, out: encode_fields([v[f] for f in names], out)
+    if isinstance(t, ttuple):
+        return _fields_encoder(list(t.types))
+    if isinstance(t, tinterval):
+        encode_point = _encoder(t.point_type)
+
+        def encode_interval(v, out):
+            # start and end are optional, includesStart and includesEnd are required
+            missing = 0
+            if v.start is None:
+                missing |= 1
+            if v.end is None:
+                missing |= 2
+            out.append(missing)
+            if v.start is not None:
+                encode_point(v.start, out)
+            if v.end is not None:
+                encode_point(v.end, out)
+            out.append(1 if v.includes_start else 0)
+            out.append(1 if v.includes_end else 0)
+
+        return encode_interval
+    if isinstance(t, (tarray, tset)):
+        packer = _unpackers.get(t.element_type)
+        return _array_encoder(_encoder(t.element_type), False, packer[0] if packer else None)
+    if isinstance(t, tdict):
+        encode_entry = _fields_encoder([t.key_type, t.value_type])
+        encode_entries = _array_encoder(encode_entry, True)
+        return lambda v, out: encode_entries(v.items(), out)
+    raise NotImplementedError(f'cannot encode values of type {t}')
+
+
+def encode_value(typ, value):
+    """Encodes a present value of type `typ` with the ``unblockedUncompressed``
+    codec as the single field of a tuple.
+
+    Returns
+    -------
+    (:obj:`str`, :obj:`bytes`)
+        The physical type of the tuple and the encoded bytes.
+    """
+    encode = _encoder(typ)
+    out = bytearray(1)
+    encode(value, out)
+    return f'Tuple[{typ._parsable_string()}]', bytes(out)
+
+
+def n_values_at_least(value, n):
+    """Whether `value`, counting the elements of nested collections, holds at
+    least `n` values."""
+    count = 0
+    stack = [value]
+    while stack:
+        v = stack.pop()
+        if isinstance(v, Mapping):
+            count += len(v)
+            if count >= n:
+                return True
+            stack.extend(v.values())
+        elif isinstance(v, (list, tuple, set, frozenset)):
+            count += len(v)
+            if count >= n:
+                return True
+            stack.extend(v)
+    return False
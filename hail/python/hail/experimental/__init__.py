@@ -9,7 +9,7 @@ from .datasets import load_dataset
 from .import_gtf import import_gtf, get_gene_intervals
 from .write_multiple import write_matrix_tables, block_matrices_tofiles, export_block_matrices
 from .export_entries_by_col import export_entries_by_col
-from .densify import densify
+from .densify import densify, compute_reference_block_index
 from .sparse_split_multi import sparse_split_multi
 from .function import define_function
 from .ldscsim import simulate_phenotypes
@@ -38,6 +38,7 @@ __all__ = ['ld_score',
            'export_block_matrices',
            'export_entries_by_col',
            'densify',
+           'compute_reference_block_index',
            'sparse_split_multi',
            'define_function',
            'simulate_phenotypes',
@@ -7,5 +7,8 @@ def encode(expression, codec='default'):
 
 
 def decode(typ, ptype_string, bytes, codec='default'):
+    if codec == 'unblockedUncompressed':
+        from hail.backend.codec import decode_value
+        return decode_value(typ, ptype_string, bytes)
     return typ._from_json(
         Env.hc()._jhc.backend().decodeToJSON(ptype_string, bytes, codec))
@@ -1,14 +1,89 @@
 import hail as hl
 
-def densify(sparse_mt):
+
+def _check_sparse(sparse_mt, caller):
+    if list(sparse_mt.row_key)[0] != 'locus' or not isinstance(sparse_mt.locus.dtype, hl.tlocus):
+        raise ValueError("first row key field must be named 'locus' and have type 'locus'")
+    if 'END' not in sparse_mt.entry or sparse_mt.END.dtype != hl.tint32:
+        raise ValueError(f"'{caller}' requires 'END' entry field of type 'int32'")
+
+
+def compute_reference_block_index(sparse_mt, window_size=1_000_000):
+    """Compute the maximum reference block end of each window of a sparse
+    MatrixTable.
+
+    The result is small and can be written once and passed to
+    :func:`.densify` to densify regions without scanning the whole dataset.
+
+    Parameters
+    ----------
+    sparse_mt : :class:`.MatrixTable`
+        Sparse MatrixTable, as required by :func:`.densify`.
+    window_size : :obj:`int`
+        Number of bases per window.
+
+    Returns
+    -------
+    :class:`.Table`
+        Table keyed by ``contig`` and ``window``, the position of the window
+        divided by `window_size`, with field ``max_end``, the largest ``END``
+        of the entries of rows in the window, and global field
+        ``window_size``.
+    """
+    _check_sparse(sparse_mt, 'compute_reference_block_index')
+    rows = sparse_mt.select_rows(max_end=hl.agg.max(sparse_mt.END)).rows()
+    rows = rows.filter(hl.is_defined(rows.max_end))
+    index = rows.group_by(contig=rows.locus.contig,
+                          window=rows.locus.position // window_size).aggregate(max_end=hl.agg.max(rows.max_end))
+    return index.select_globals(window_size=window_size)
+
+
+def _region_starts(intervals, index):
+    """Returns each interval of `intervals` extended back to the start of the
+    first window of `index` with a reference block that reaches it."""
+    window_size = hl.eval(index.index_globals().window_size)
+    windows = {}
+    for w in index.collect():
+        windows.setdefault(w.contig, []).append((w.window, w.max_end))
+
+    extended = []
+    for interval in intervals:
+        start = interval.start
+        first = start.position
+        for window, max_end in sorted(windows.get(start.contig, [])):
+            if window * window_size > first:
+                break
+            if max_end >= first:
+                first = max(1, window * window_size)
+                break
+        extended.append(hl.Interval(hl.Locus(start.contig, first, start.reference_genome),
+                                    interval.end,
+                                    includes_start=True,
+                                    includes_end=interval.includes_end))
+    return extended
+
+
+def densify(sparse_mt, intervals=None, reference_block_index=None):
     """Convert sparse MatrixTable to a dense one.
 
+    If `intervals` is set, only the rows in `intervals` are densified. Each
+    interval is extended back to the first row whose reference blocks can
+    reach it, as found in `reference_block_index`, and only the rows of the
+    extended intervals are read. Computing the index takes a pass over the
+    entries, so for repeated queries compute it once with
+    :func:`.compute_reference_block_index` and write it.
+
     Parameters
     ----------
     sparse_mt : :class:`.MatrixTable`
         Sparse MatrixTable to densify.  The first row key field must
         be named ``locus`` and have type ``locus``.  Must have an
         ``END`` entry field of type ``int32``.
+    intervals : :obj:`list` of :class:`.Interval`, optional
+        Locus intervals to densify. By default, all rows are densified.
+    reference_block_index : :class:`.Table`, optional
+        Result of :func:`.compute_reference_block_index` on `sparse_mt`. Only used
+        with `intervals`. Computed if not set.
 
     Returns
     -------
@@ -16,12 +91,14 @@ def densify(sparse_mt):
         The densified MatrixTable.  The ``END`` entry field is dropped.
 
     """
-    if list(sparse_mt.row_key)[0] != 'locus' or not isinstance(sparse_mt.locus.dtype, hl.tlocus):
-        raise ValueError("first row key field must be named 'locus' and have type 'locus'")
-    if 'END' not in sparse_mt.entry or sparse_mt.END.dtype != hl.tint32:
-        raise ValueError("'densify' requires 'END' entry field of type 'int32'")
+    _check_sparse(sparse_mt, 'densify')
     col_key_fields = list(sparse_mt.col_key)
 
+    if intervals is not None:
+        if reference_block_index is None:
+            reference_block_index = compute_reference_block_index(sparse_mt)
+        sparse_mt = hl.filter_intervals(sparse_mt, _region_starts(intervals, reference_block_index))
+
     mt = sparse_mt
     mt = sparse_mt.annotate_entries(__contig = mt.locus.contig)
     t = mt._localize_entries('__entries', '__cols')
@@ -44,4 +121,7 @@ def densify(sparse_mt):
                 hl.range(0, hl.len(t.__entries)))))
     mt = t._unlocalize_entries('__entries', '__cols', col_key_fields)
     mt = mt.drop('__contig', 'END')
+
+    if intervals is not None:
+        mt = hl.filter_intervals(mt, intervals)
     return mt
@@ -1,11 +1,16 @@
 """A work in progress pipeline to combine (g)VCFs into an alternate format"""
 
+import json
+
 import hail as hl
 from hail import MatrixTable, Table
 from hail.expr import StructExpression
 from hail.expr.expressions import expr_call, expr_array, expr_int32
+from hail.genetics.reference_genome import reference_genome_type
 from hail.ir import Apply, TableKeyBy, TableMapRows, TopLevelReference
-from hail.typecheck import typecheck
+from hail.typecheck import typecheck, sequenceof, nullable, dictof
+from hail.utils import Interval
+from hail.utils.java import info
 
 _transform_rows_function_map = {}
 _merge_function_map = {}
@@ -157,6 +162,142 @@ def combine_gvcfs(mts):
     combined = combine(ts)
     return unlocalize(combined)
 
+
+def partition_intervals(intervals, n_partitions=None):
+    """Plans the partitions of a combiner run from a list of locus intervals,
+    such as calling regions.
+
+    Overlapping intervals are merged, and the result is split into intervals
+    of at most the total length of `intervals` divided by `n_partitions`
+    bases, so partitions are balanced. The partitions are closed intervals of
+    ``struct{locus}``, sorted by locus, as expected by :func:`.import_vcfs`.
+    """
+    spans = []
+    for interval in intervals:
+        start, end = interval.start, interval.end
+        if start.contig != end.contig:
+            raise ValueError(f'partition_intervals: interval {interval} spans more than one contig')
+        first = start.position + (0 if interval.includes_start else 1)
+        last = end.position - (0 if interval.includes_end else 1)
+        if first <= last:
+            spans.append((start.contig, first, last))
+    if not spans:
+        raise ValueError('partition_intervals: no non-empty intervals')
+
+    rg = intervals[0].start.reference_genome
+    spans.sort(key=lambda span: (rg.contigs.index(span[0]), span[1]))
+    merged = [spans[0]]
+    for contig, first, last in spans[1:]:
+        prev_contig, prev_first, prev_last = merged[-1]
+        if contig == prev_contig and first <= prev_last + 1:
+            merged[-1] = (contig, prev_first, max(last, prev_last))
+        else:
+            merged.append((contig, first, last))
+
+    size = None
+    if n_partitions is not None:
+        total = sum(last - first + 1 for _, first, last in merged)
+        size = max(1, -(-total // n_partitions))
+
+    partitions = []
+    for contig, first, last in merged:
+        while first <= last:
+            stop = last if size is None else min(last, first + size - 1)
+            partitions.append(hl.Interval(hl.Struct(locus=hl.Locus(contig, first, rg)),
+                                          hl.Struct(locus=hl.Locus(contig, stop, rg)),
+                                          includes_start=True,
+                                          includes_end=True))
+            first = stop + 1
+    return partitions
+
+
+# INFO fields read by transform_one that are missing from some gVCFs
+_optional_gvcf_info_fields = {'MQ_DP': hl.tint32, 'QUALapprox': hl.tint32, 'VarDP': hl.tint32}
+
+
+def _with_optional_info_fields(mt):
+    missing = {name: hl.null(typ) for name, typ in _optional_gvcf_info_fields.items() if name not in mt.info}
+    if missing:
+        mt = mt.annotate_rows(info=mt.info.annotate(**missing))
+    return mt
+
+
+@typecheck(sample_paths=sequenceof(str),
+           out_file=str,
+           tmp_path=str,
+           intervals=sequenceof(Interval),
+           branch_factor=int,
+           n_partitions=nullable(int),
+           reference_genome=reference_genome_type,
+           contig_recoding=nullable(dictof(str, str)),
+           overwrite=bool)
+def run_combiner(sample_paths, out_file, tmp_path, intervals, *, branch_factor=100, n_partitions=None,
+                 reference_genome='default', contig_recoding=None, overwrite=False):
+    """Combines gVCFs into a sparse matrix table in tiers.
+
+    The first tier imports the gVCFs in groups of at most `branch_factor`,
+    transforms them with :func:`.transform_one`, adding the INFO fields
+    ``MQ_DP``, ``QUALapprox`` and ``VarDP`` as missing where a gVCF does not
+    have them, and combines each group with
+    :func:`.combine_gvcfs`. Each later tier combines groups of at most
+    `branch_factor` of the matrix tables of the tier before it, until one
+    remains, which is written to `out_file`. So no step opens more than
+    `branch_factor` inputs at once.
+
+    Every tier is partitioned by :func:`.partition_intervals` of `intervals`
+    and `n_partitions`, and its matrix tables are checkpointed under
+    `tmp_path`. Rerunning with the same arguments after a failure skips the
+    matrix tables that were completely written. `tmp_path` may be deleted once
+    `out_file` is written.
+    """
+    if not sample_paths:
+        raise ValueError('run_combiner: no gVCFs to combine')
+    if branch_factor < 2:
+        raise ValueError(f'run_combiner: branch_factor must be at least 2, found {branch_factor}')
+    tmp_path = tmp_path.rstrip('/')
+    partitions = partition_intervals(intervals, n_partitions)
+
+    plan = json.dumps({'sample_paths': list(sample_paths),
+                       'branch_factor': branch_factor,
+                       'partitions': [str(p) for p in partitions]})
+    plan_path = f'{tmp_path}/plan.json'
+    if hl.hadoop_exists(plan_path):
+        with hl.hadoop_open(plan_path) as f:
+            if f.read() != plan:
+                raise ValueError(f"run_combiner: '{tmp_path}' holds the results of a combiner run with "
+                                 f"other inputs or parameters; use another tmp_path")
+    else:
+        with hl.hadoop_open(plan_path, 'w') as f:
+            f.write(plan)
+
+    inputs = list(sample_paths)
+    tier = 0
+    while True:
+        # groups differ in size by at most one, so each tier is balanced
+        n_groups = -(-len(inputs) // branch_factor)
+        groups = [inputs[i * len(inputs) // n_groups:(i + 1) * len(inputs) // n_groups] for i in range(n_groups)]
+        final = n_groups == 1
+        outputs = [out_file] if final else [f'{tmp_path}/tier-{tier}/{i}.mt' for i in range(n_groups)]
+        info(f'run_combiner: tier {tier} combines {len(inputs)} inputs into {len(outputs)}')
+
+        for group, output in zip(groups, outputs):
+            if not final and hl.hadoop_exists(f'{output}/_SUCCESS'):
+                info(f'run_combiner: found {output}, skipping')
+                continue
+            if tier == 0:
+                mts = [transform_one(_with_optional_info_fields(mt))
+                       for mt in hl.import_vcfs(group, partitions, reference_genome=reference_genome,
+                                                contig_recoding=contig_recoding, array_elements_required=False)]
+            else:
+                mts = [hl.read_matrix_table(path, _intervals=partitions) for path in group]
+            combine_gvcfs(mts).write(output, overwrite=overwrite or not final)
+
+        if final:
+            return
+        inputs = outputs
+        tier += 1
+
+
 @typecheck(lgt=expr_call, la=expr_array(expr_int32))
 def lgt_to_gt(lgt, la):
     """A method for transforming Local GT and Local Alleles into the true GT"""
@@ -71,7 +71,7 @@ class ExprCoercer(TypeChecker):
 
     def check(self, x: Any, caller: str, param: str) -> Any:
         try:
-            return self.coerce(to_expr(x))
+            return self.coerce(x)
         except ExpressionException as e:
             raise TypecheckFailure from e
 
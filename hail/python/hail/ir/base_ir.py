@@ -1,4 +1,5 @@
 import abc
+import weakref
 
 from typing import List
 
@@ -6,10 +7,74 @@ from hail.utils.java import Env
 from .renderer import Renderer, Renderable, RenderableStr
 
 
-class BaseIR(Renderable):
+class IRInternTable(object):
+    """Hash-consing table of closed IRs.
+
+    Structurally equal IRs that do not depend on their context (no
+    :class:`.Ref` or :class:`.Join` below them) are shared: the first instance
+    constructed is returned for every later equal one. Entries are held
+    weakly.
+    """
+
+    def __init__(self):
+        self._table = {}
+
+    def __len__(self):
+        return sum(len(refs) for refs in self._table.values())
+
+    def _remove(self, h, ref):
+        refs = self._table.get(h)
+        if refs is not None:
+            refs.remove(ref)
+            if not refs:
+                del self._table[h]
+
+    def intern(self, x):
+        if x._uses_context:
+            return x
+        h = hash(x)
+        refs = self._table.setdefault(h, [])
+        for ref in refs:
+            y = ref()
+            if y is not None and y == x:
+                return y
+        refs.append(weakref.ref(x, lambda ref, h=h: self._remove(h, ref)))
+        return x
+
+
+_intern_table = None
+
+
+def set_ir_interning(enabled):
+    """Enable or disable sharing of structurally equal closed IRs as they are
+    constructed."""
+    global _intern_table
+    _intern_table = IRInternTable() if enabled else None
+
+
+class _InterningIRMeta(type):
+    def __call__(cls, *args, **kwargs):
+        x = super().__call__(*args, **kwargs)
+        if _intern_table is not None:
+            return _intern_table.intern(x)
+        return x
+
+
+class BaseIR(Renderable, metaclass=_InterningIRMeta):
+    # nodes whose type or meaning depends on where they appear, and so must
+    # not be shared between IRs
+    _context_dependent = False
+
     def __init__(self, *children):
         super().__init__()
         self._type = None
+        self._hash = None
+        # renderings cached by renderers with stop_at_jir false and true,
+        # which differ below nodes with a JavaIR
+        self._rendered = None
+        self._rendered_jir = None
+        self._uses_context = self._context_dependent or \
+            any(isinstance(c, BaseIR) and c._uses_context for c in children)
         self.children = children
 
     def __str__(self):
@@ -49,7 +114,12 @@ class BaseIR(Renderable):
         return
 
     def __eq__(self, other):
-        return isinstance(other, self.__class__) and self.children == other.children and self._eq(other)
+        if self is other:
+            return True
+        return isinstance(other, self.__class__) and \
+            hash(self) == hash(other) and \
+            self.children == other.children and \
+            self._eq(other)
 
     def __ne__(self, other):
         return not self == other
@@ -68,8 +138,24 @@ class BaseIR(Renderable):
         """
         return True
 
+    def _compute_hash(self):
+        return hash((self.__class__, self.head_str(), tuple(hash(c) for c in self.children)))
+
     def __hash__(self):
-        return 31 + hash(str(self))
+        if self._hash is None:
+            # hash unhashed descendants bottom-up without recursing, so deep
+            # pipelines do not hit the recursion limit
+            stack = [self]
+            while stack:
+                x = stack[-1]
+                pending = [c for c in x.children if isinstance(c, BaseIR) and c._hash is None]
+                if pending:
+                    stack.extend(pending)
+                else:
+                    stack.pop()
+                    if x._hash is None:
+                        x._hash = x._compute_hash()
+        return self._hash
 
 
 class IR(BaseIR):
@@ -314,6 +314,8 @@ class AggLet(IR):
 
 
 class Ref(IR):
+    _context_dependent = True
+
     @typecheck_method(name=str)
     def __init__(self, name):
         super().__init__()
@@ -1916,6 +1918,20 @@ class BlockMatrixToValueApply(IR):
         self._type = tfloat64
 
 
+def _hashable_value(x):
+    """A hashable stand-in for the Python value `x` that is equal for equal
+    values, independent of the iteration order of sets and dicts."""
+    if isinstance(x, (set, frozenset)):
+        return frozenset(_hashable_value(e) for e in x)
+    if isinstance(x, dict):
+        return frozenset((_hashable_value(k), _hashable_value(v)) for k, v in x.items())
+    if isinstance(x, (list, tuple)):
+        return tuple(_hashable_value(e) for e in x)
+    if isinstance(x, hail.utils.Struct):
+        return frozenset((k, _hashable_value(v)) for k, v in x._fields.items())
+    return x
+
+
 class Literal(IR):
     @typecheck_method(typ=hail_type,
                       value=anytype)
@@ -1923,23 +1939,49 @@ class Literal(IR):
         super(Literal, self).__init__()
         self._typ: 'hail.HailType' = typ
         self.value = value
+        self._head_str = None
+        self._encode = True
 
     def copy(self):
         return Literal(self._typ, self.value)
 
+    def render_head(self, r):
+        # renderers targeting the JVM reference large literals shipped
+        # separately in binary, rather than parsing them from JSON
+        if r.stop_at_jir and self._encode:
+            jir = Env.backend()._encoded_literal_jir(self._typ, self.value)
+            if jir is None:
+                self._encode = False
+            else:
+                self._jir = jir
+                return f'(JavaIR {r.add_jir(jir)}'
+        return super().render_head(r)
+
     def head_str(self):
-        return f'{self._typ._parsable_string()} {dump_json(self._typ._convert_to_json_na(self.value))}'
+        if self._head_str is None:
+            self._head_str = f'{self._typ._parsable_string()} {dump_json(self._typ._convert_to_json_na(self.value))}'
+        return self._head_str
 
     def _eq(self, other):
         return other._typ == self._typ and \
                other.value == self.value
 
+    def _compute_hash(self):
+        # the head string of equal sets and dicts depends on their order, so
+        # the value itself is hashed
+        try:
+            value_hash = hash(_hashable_value(self.value))
+        except TypeError:
+            value_hash = 0
+        return hash((Literal, self._typ, value_hash))
+
     def _compute_type(self, env, agg_env):
         self._type = self._typ
 
 
 class Join(IR):
     _idx = 0
+    _context_dependent = True
 
     @typecheck_method(virtual_ir=IR,
                       temp_vars=sequenceof(str),
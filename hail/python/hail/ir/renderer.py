@@ -1,6 +1,6 @@
 from hail import ir
 import abc
-from typing import Sequence, List
+from typing import Sequence, List, Optional
 
 
 class Renderable(object):
@@ -50,11 +50,17 @@ class ParensRenderer(Renderable):
 
 
 class RenderableQueue(object):
-    def __init__(self, elements: Sequence[Renderable], tail: str):
+    def __init__(self, elements: Sequence[Renderable], tail: str,
+                 owner: Optional[Renderable] = None, start: int = 0, n_jirs: int = 0):
         self._elements = elements
         self._elements_len = len(elements)
         self.tail = tail
         self._idx = 0
+        # the renderable whose children these are, where its rendering
+        # starts in the builder, and how many jirs had been added before it
+        self.owner = owner
+        self.start = start
+        self.n_jirs = n_jirs
 
     def exhausted(self):
         return self._elements_len == self._idx
@@ -88,6 +94,29 @@ class RQStack(object):
         return self._idx < 0
 
 
+class RenderedRope(object):
+    """The cached rendering of an IR: a sequence of strings and the ropes of
+    its cached children, so shared subtrees are stored once."""
+
+    __slots__ = ['parts']
+
+    def __init__(self, parts: List):
+        self.parts = parts
+
+    def __str__(self):
+        builder = []
+        stack = [iter(self.parts)]
+        while stack:
+            part = next(stack[-1], None)
+            if part is None:
+                stack.pop()
+            elif isinstance(part, RenderedRope):
+                stack.append(iter(part.parts))
+            else:
+                builder.append(part)
+        return ''.join(builder)
+
+
 class Renderer(object):
     def __init__(self, stop_at_jir=False):
         self.stop_at_jir = stop_at_jir
@@ -101,6 +130,14 @@ class Renderer(object):
         return jir_id
 
     def __call__(self, x: 'Renderable'):
+        return str(self._render(x))
+
+    def _cached(self, x):
+        # renderings for the JVM refer to encoded literals and JavaIRs where
+        # str renders them in full, so each mode has its own cache
+        return x._rendered_jir if self.stop_at_jir else x._rendered
+
+    def _render(self, x: 'Renderable') -> RenderedRope:
         stack = RQStack()
         builder = []
 
@@ -118,19 +155,33 @@ class Renderer(object):
                     else:
                         assert isinstance(x, ir.IR)
                         builder.append(f'(JavaIR {jir_id})')
+                elif isinstance(x, ir.BaseIR) and self._cached(x) is not None:
+                    builder.append(self._cached(x))
                 else:
+                    start = len(builder)
+                    n_jirs = self.count
                     head = x.render_head(self)
                     if head != '':
-                        builder.append(x.render_head(self))
-                    stack.push(RenderableQueue(x.render_children(self), x.render_tail(self)))
+                        builder.append(head)
+                    stack.push(RenderableQueue(x.render_children(self), x.render_tail(self), x, start, n_jirs))
                 x = None
             else:
                 top = stack.peek()
                 if top.exhausted():
                     stack.pop()
                     builder.append(top.tail)
+                    # cache the rendering of IRs whose subtree does not refer
+                    # to jirs, which are only meaningful to this renderer
+                    if isinstance(top.owner, ir.BaseIR) and top.n_jirs == self.count:
+                        rope = RenderedRope(builder[top.start:])
+                        del builder[top.start:]
+                        builder.append(rope)
+                        if self.stop_at_jir:
+                            top.owner._rendered_jir = rope
+                        else:
+                            top.owner._rendered = rope
                 else:
                     builder.append(' ')
                     x = top.pop()
 
-        return ''.join(builder)
+        return RenderedRope(builder)
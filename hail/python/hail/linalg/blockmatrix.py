@@ -1,6 +1,10 @@
+import mmap
 import os
+import shutil
 
 import itertools
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 import numpy as np
 import re
 import scipy.linalg as spla
@@ -18,7 +22,8 @@ from hail.ir.blockmatrix_reader import BlockMatrixNativeReader, BlockMatrixBinar
 from hail.ir.blockmatrix_writer import BlockMatrixBinaryWriter, BlockMatrixNativeWriter, BlockMatrixRectanglesWriter
 from hail.table import Table
 from hail.typecheck import *
-from hail.utils import new_temp_file, new_local_temp_file, local_path_uri, storage_level
+from hail.utils import new_temp_file, new_local_temp_file, new_local_temp_dir, local_path_uri, uri_path, \
+    storage_level
 from hail.utils.java import Env, jarray, joption
 
 block_matrix_type = lazy()
@@ -281,7 +286,8 @@ class BlockMatrix(object):
         func:`numpy.tofile` to be a valid binary input to :meth:`.fromfile`.
         This is not checked.
 
-        The number of entries must be less than :math:`2^{31}`.
+        The number of entries in each row of blocks, that is `n_cols` times
+        the block size, must be less than :math:`2^{31}`.
 
         Parameters
         ----------
@@ -323,7 +329,10 @@ class BlockMatrix(object):
         -----
         The ndarray must have two dimensions, each of non-zero size.
 
-        The number of entries must be less than :math:`2^{31}`.
+        The ndarray may be a :class:`numpy.memmap`. A C-contiguous float64
+        memmap of an entire file is read in place when this method is called,
+        and other ndarrays are converted to float64 a chunk of rows at a time,
+        so the ndarray is not copied in full.
 
         Parameters
         ----------
@@ -343,12 +352,15 @@ class BlockMatrix(object):
             raise ValueError(f'from_numpy: ndarray dimensions must be non-zero, found shape {ndarray.shape}')
 
         nd = _ndarray_as_2d(ndarray)
-        nd = _ndarray_as_float64(nd)
         n_rows, n_cols = nd.shape
 
-        path = new_local_temp_file()
-        uri = local_path_uri(path)
-        nd.tofile(path)
+        uri = local_path_uri(_ndarray_tofile(nd))
+        if _is_file_memmap(nd):
+            # the blocks are read from the memmap's own file now rather than
+            # when the block matrix is evaluated, so later writes to the
+            # memmap do not change it
+            return BlockMatrix._from_java(Env.hail().linalg.BlockMatrix.fromDoublesFile(
+                Env.hc()._jhc, uri, n_rows, n_cols, block_size))
         return cls.fromfile(uri, n_rows, n_cols, block_size)
 
     @classmethod
@@ -1113,8 +1125,8 @@ class BlockMatrix(object):
         writer = BlockMatrixBinaryWriter(uri)
         Env.backend().execute(BlockMatrixWrite(self._bmir, writer))
 
-    @typecheck_method(_force_blocking=bool)
-    def to_numpy(self, _force_blocking=False):
+    @typecheck_method(_force_blocking=bool, _memmap_path=nullable(str))
+    def to_numpy(self, _force_blocking=False, _memmap_path=None):
         """Collects the block matrix into a `NumPy ndarray
         <https://docs.scipy.org/doc/numpy/reference/generated/numpy.ndarray.html>`__.
 
@@ -1132,15 +1144,17 @@ class BlockMatrix(object):
         :class:`numpy.ndarray`
         """
 
-        if self.n_rows * self.n_cols > 1 << 31 or _force_blocking:
+        if self.n_rows * self.n_cols >= 1 << 31 or _force_blocking:
             path = new_temp_file()
             self.export_blocks(path, binary=True)
-            return BlockMatrix.rectangles_to_numpy(path, binary=True)
+            return BlockMatrix.rectangles_to_numpy(path, binary=True, _memmap_path=_memmap_path)
 
-        path = new_local_temp_file()
+        path = new_local_temp_file() if _memmap_path is None else _memmap_path
         uri = local_path_uri(path)
         self.tofile(uri)
-        return np.fromfile(path).reshape((self.n_rows, self.n_cols))
+        if _memmap_path is None:
+            return np.fromfile(path).reshape((self.n_rows, self.n_cols))
+        return np.memmap(path, dtype=np.float64, mode='r+', shape=(self.n_rows, self.n_cols))
 
     @property
     def is_sparse(self):
@@ -2053,8 +2067,8 @@ class BlockMatrix(object):
         self.export_rectangles(path_out, rectangles, delimiter, binary)
 
     @staticmethod
-    @typecheck(path=str, binary=bool)
-    def rectangles_to_numpy(path, binary=False):
+    @typecheck(path=str, binary=bool, _n_threads=int, _memmap_path=nullable(str))
+    def rectangles_to_numpy(path, binary=False, _n_threads=16, _memmap_path=None):
         """Instantiates a NumPy ndarray from files of rectangles written out using
         :meth:`.export_rectangles` or :meth:`.export_blocks`. For any given
         dimension, the ndarray will have length equal to the upper bound of that dimension
@@ -2113,17 +2127,29 @@ class BlockMatrix(object):
         n_rows = max(rects, key=lambda r: r[2])[2]
         n_cols = max(rects, key=lambda r: r[4])[4]
 
-        nd = np.zeros(shape=(n_rows, n_cols))
-        f = new_local_temp_file()
-        uri = local_path_uri(f)
-        for rect, file_path in zip(rects, rect_files):
-            hl.utils.hadoop_copy(file_path, uri)
+        if _memmap_path is None:
+            nd = np.zeros(shape=(n_rows, n_cols))
+        else:
+            nd = np.memmap(_memmap_path, dtype=np.float64, mode='w+', shape=(n_rows, n_cols))
+
+        # a pool of threads, which bounds the reads in flight, reads each
+        # rectangle straight into its slice of nd; overlapping rectangles hold
+        # the same entries, so the order of the writes does not matter
+        def read_rect(rect, file_path):
+            out = nd[rect[1]:rect[2], rect[3]:rect[4]]
             if binary:
-                rect_data = np.reshape(np.fromfile(f), (rect[2]-rect[1], rect[4]-rect[3]))
+                _read_binary_rectangle(file_path, out)
             else:
-                rect_data = np.loadtxt(f, ndmin=2)
-            nd[rect[1]:rect[2], rect[3]:rect[4]] = rect_data
+                with _local_rectangle_file(file_path) as local_path:
+                    out[:, :] = np.loadtxt(local_path, ndmin=2)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(_n_threads, len(rects)))) as executor:
+            futures = [executor.submit(read_rect, rect, file_path) for rect, file_path in zip(rects, rect_files)]
+            for future in as_completed(futures):
+                future.result()
 
+        if _memmap_path is not None:
+            nd.flush()
         return nd
 
     @typecheck_method(compute_uv=bool,
@@ -2374,14 +2400,45 @@ def _ndarray_as_float64(nd):
     return nd
 
 
+_tofile_chunk_size = 1 << 22
+
+
+def _is_file_memmap(nd):
+    """Whether `nd` is a C-contiguous float64 :class:`numpy.memmap` of an
+    entire file, whose file can be read as is."""
+    return (isinstance(nd, np.memmap) and isinstance(nd.base, mmap.mmap) and nd.dtype == np.float64
+            and nd.flags.c_contiguous and nd.offset == 0 and os.path.getsize(nd.filename) == nd.nbytes)
+
+
+def _ndarray_tofile(nd):
+    """Returns the path of a local file holding the entries of `nd` as float64
+    in row-major order.
+
+    The file of a memmap for which :func:`_is_file_memmap` holds is used in
+    place, so it must be read before the memmap is written to again.
+    Otherwise, the entries are converted and written a chunk of rows at a
+    time."""
+    if _is_file_memmap(nd):
+        nd.flush()
+        return nd.filename
+
+    if nd.ndim == 1:
+        nd = nd.reshape(-1, 1)
+    n_rows, n_cols = nd.shape
+    rows_per_chunk = max(1, _tofile_chunk_size // n_cols)
+
+    path = new_local_temp_file()
+    with open(path, 'wb') as f:
+        for start in range(0, n_rows, rows_per_chunk):
+            _ndarray_as_float64(nd[start:start + rows_per_chunk]).tofile(f)
+    return path
+
+
 def _jarray_from_ndarray(nd):
     if nd.size >= (1 << 31):
         raise ValueError(f'size of ndarray must be less than 2^31, found {nd.size}')
 
-    nd = _ndarray_as_float64(nd)
-    path = new_local_temp_file()
-    uri = local_path_uri(path)
-    nd.tofile(path)
+    uri = local_path_uri(_ndarray_tofile(nd))
     return Env.hail().utils.richUtils.RichArray.importFromDoubles(Env.hc()._jhc, uri, nd.size)
 
 
@@ -2398,6 +2455,46 @@ def _breeze_fromfile(uri, n_rows, n_cols):
     return Env.hail().utils.richUtils.RichDenseMatrixDouble.importFromDoubles(Env.hc()._jhc, uri, n_rows, n_cols, True)
 
 
+_rectangle_buffer_size = 1 << 20
+
+
+@contextmanager
+def _local_rectangle_file(file_path):
+    """Yields a local path holding the rectangle file at `file_path`.
+
+    Files not already on the local filesystem are first copied to a local
+    temporary file by the JVM, so the bytes are read natively rather than
+    through py4j."""
+    if file_path.startswith('file:'):
+        yield uri_path(file_path)
+        return
+    temp_dir = new_local_temp_dir()
+    try:
+        local_path = os.path.join(temp_dir, 'rectangle')
+        hl.utils.hadoop_copy(file_path, local_path_uri(local_path))
+        yield local_path
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def _read_binary_rectangle(file_path, out):
+    """Reads a rectangle written by :meth:`.BlockMatrix.export_rectangles`
+    with ``binary=True`` into `out`, one row at a time, from a local copy of
+    the file (see :func:`_local_rectangle_file`)."""
+    n_rows, n_cols = out.shape
+    with _local_rectangle_file(file_path) as local_path:
+        with open(local_path, 'rb', buffering=_rectangle_buffer_size) as f:
+            for i in range(n_rows):
+                row = memoryview(out[i]).cast('B')
+                n_read = 0
+                while n_read < len(row):
+                    n = f.readinto(row[n_read:])
+                    if not n:
+                        raise ValueError(f'rectangle file {file_path} is shorter than its '
+                                         f'{n_rows} x {n_cols} bounds')
+                    n_read += n
+
+
 def _check_entries_size(n_rows, n_cols):
     n_entries = n_rows * n_cols
     if n_entries >= 1 << 31:
@@ -2409,12 +2506,10 @@ def _breeze_from_ndarray(nd):
         raise ValueError(f'from_numpy: ndarray dimensions must be non-zero, found shape {nd.shape}')
 
     nd = _ndarray_as_2d(nd)
-    nd = _ndarray_as_float64(nd)
     n_rows, n_cols = nd.shape
+    _check_entries_size(n_rows, n_cols)
 
-    path = new_local_temp_file()
-    uri = local_path_uri(path)
-    nd.tofile(path)
+    uri = local_path_uri(_ndarray_tofile(nd))
     return _breeze_fromfile(uri, n_rows, n_cols)
 
 
@@ -5,7 +5,7 @@ from .impex import export_elasticsearch, export_gen, export_bgen, export_plink,
     index_bgen, import_matrix_table
 from .statgen import skat, identity_by_descent, impute_sex, \
     genetic_relatedness_matrix, realized_relationship_matrix, pca, \
-    hwe_normalized_pca, pc_relate, split_multi, filter_alleles, filter_alleles_hts, \
+    hwe_normalized_pca, pc_project, pc_relate, split_multi, filter_alleles, filter_alleles_hts, \
     split_multi_hts, balding_nichols_model, ld_prune, row_correlation, ld_matrix, \
     linear_mixed_model, linear_regression_rows, logistic_regression_rows, poisson_regression_rows, \
     linear_mixed_regression_rows, lambda_gc
@@ -28,6 +28,7 @@ __all__ = ['trio_matrix',
            'realized_relationship_matrix',
            'pca',
            'hwe_normalized_pca',
+           'pc_project',
            'pc_relate',
            'rename_duplicates',
            'split_multi',
@@ -1,3 +1,7 @@
+import hashlib
+import json
+import uuid
+
 import hail as hl
 from collections import Counter
 from pprint import pprint
@@ -465,12 +469,105 @@ def concordance(left, right, *, _localize_global_statistics=True) -> Tuple[List[
     return glob, per_sample.cols(), per_variant.rows()
 
 
+def _annotation_cache_tables(cache, config_hash):
+    """Returns the paths of the complete tables of annotations in `cache` for
+    `config_hash`, leaving out those replaced by a compacted table."""
+    directory = f'{cache}/{config_hash}'
+    if not hl.hadoop_is_dir(directory):
+        return []
+    paths = [f['path'].rstrip('/') for f in hl.hadoop_ls(directory)
+             if f['is_dir'] and hl.hadoop_exists(f"{f['path'].rstrip('/')}/_SUCCESS")]
+    replaced = set()
+    for path in paths:
+        replaced.update(hl.eval(hl.read_table(path).index_globals().replaces))
+    return sorted(path for path in paths if path.split('/')[-1] not in replaced)
+
+
+def _read_annotation_cache_tables(paths):
+    """Returns the union of the annotation tables at `paths` and the CSQ
+    header of the first of them, if any."""
+    tables = [hl.read_table(path) for path in paths]
+    header = None
+    if 'vep_csq_header' in tables[0].globals:
+        header = hl.eval(tables[0].index_globals().vep_csq_header)
+    annotations = tables[0].select_globals()
+    if len(tables) > 1:
+        # concurrent runs may have annotated the same variants
+        annotations = annotations.union(*[t.select_globals() for t in tables[1:]]).distinct()
+    return annotations, header
+
+
+def _write_annotation_cache_table(annotations, header, cache, config_hash, replaces):
+    path = f'{cache}/{config_hash}/{uuid.uuid4().hex}.ht'
+    annotations = annotations.select_globals(replaces=hl.literal(replaces, hl.tarray(hl.tstr)))
+    if header is not None:
+        annotations = annotations.annotate_globals(vep_csq_header=header)
+    annotations.write(path)
+    return path
+
+
+def _cached_annotations(ht, method, config, parameters, annotate, cache):
+    """Returns the table of annotations `annotate(ht)` of the variants of
+    `ht`, reading those of variants already in the cache directory `cache`
+    from there and adding the others to it.
+
+    The cache has a directory for each hash of the configuration file and
+    `parameters`. Each run that annotates new variants writes them as a new
+    table in that directory, so adding to the cache does not rewrite it, and
+    the tables are read together. :func:`_compact_annotation_cache` merges
+    them. The CSQ header of a VEP run, if any, is kept in the global
+    ``vep_csq_header`` of each table.
+    """
+    with hl.hadoop_open(config) as f:
+        config_hash = hashlib.sha256(json.dumps([method, f.read(), parameters]).encode()).hexdigest()
+
+    paths = _annotation_cache_tables(cache, config_hash)
+    if paths:
+        cached, _ = _read_annotation_cache_tables(paths)
+        ht = ht.anti_join(cached)
+
+    n_new = ht.count()
+    info(f'{method.lower()}: {n_new} variants are not in the cache {cache}')
+
+    if not paths or n_new > 0:
+        new = annotate(ht)
+        header = None
+        if 'vep_csq_header' in new.globals:
+            header = hl.eval(new.index_globals().vep_csq_header)
+        if paths and cached.row.dtype != new.row.dtype:
+            raise ValueError(f"{method.lower()}: the annotations of cache '{cache}' have type "
+                             f"{cached.row.dtype}, found {new.row.dtype}; use another cache for "
+                             f"this configuration")
+        paths.append(_write_annotation_cache_table(new, header, cache, config_hash, []))
+
+    annotations, header = _read_annotation_cache_tables(paths)
+    if header is not None:
+        return annotations.select_globals(vep_csq_header=header)
+    return annotations
+
+
+def _compact_annotation_cache(cache):
+    """Merges the tables of annotations of each configuration in the cache
+    directory `cache` into one. The tables that were merged are no longer read
+    and may be deleted."""
+    for f in hl.hadoop_ls(cache):
+        if not f['is_dir']:
+            continue
+        config_hash = f['path'].rstrip('/').split('/')[-1]
+        paths = _annotation_cache_tables(cache, config_hash)
+        if len(paths) > 1:
+            annotations, header = _read_annotation_cache_tables(paths)
+            _write_annotation_cache_table(annotations, header, cache, config_hash,
+                                          [path.split('/')[-1] for path in paths])
+
+
 @typecheck(dataset=oneof(Table, MatrixTable),
            config=str,
            block_size=int,
            name=str,
-           csq=bool)
-def vep(dataset: Union[Table, MatrixTable], config, block_size=1000, name='vep', csq=False):
+           csq=bool,
+           cache=nullable(str))
+def vep(dataset: Union[Table, MatrixTable], config, block_size=1000, name='vep', csq=False, cache=None):
     """Annotate variants with VEP.
 
     .. include:: ../_templates/req_tvariant.rst
@@ -540,6 +637,15 @@ def vep(dataset: Union[Table, MatrixTable], config, block_size=1000, name='vep',
     If csq is ``True``, then the CSQ header string is also added as a global
     field with name ``name + '_csq_header'``.
 
+    **Caching**
+
+    If `cache` is set, the annotations of each variant are saved in the
+    directory at that path, under a hash of the configuration file and `csq`.
+    Only variants that are not already in the cache for the same configuration
+    are sent to VEP, and their annotations are then added to the cache as a new
+    table, without rewriting the annotations already there. Changing the
+    configuration file starts a new set of cached annotations.
+
     Parameters
     ----------
     dataset : :class:`.MatrixTable` or :class:`.Table`
@@ -553,6 +659,8 @@ def vep(dataset: Union[Table, MatrixTable], config, block_size=1000, name='vep',
     csq : :obj:`bool`
         If ``True``, annotates with the VCF CSQ field as a :py:data:`.tstr`.
         If ``False``, annotates as the `vep_json_schema`.
+    cache : :obj:`str`, optional
+        Path of a directory in which to cache annotations.
 
     Returns
     -------
@@ -567,11 +675,17 @@ def vep(dataset: Union[Table, MatrixTable], config, block_size=1000, name='vep',
         require_table_key_variant(dataset, 'vep')
         ht = dataset.select()
 
-    annotations = Table(TableToTableApply(ht._tir,
-                                          {'name': 'VEP',
-                                           'config': config,
-                                           'csq': csq,
-                                           'blockSize': block_size})).persist()
+    def annotate(ht):
+        return Table(TableToTableApply(ht._tir,
+                                       {'name': 'VEP',
+                                        'config': config,
+                                        'csq': csq,
+                                        'blockSize': block_size}))
+
+    if cache is None:
+        annotations = annotate(ht).persist()
+    else:
+        annotations = _cached_annotations(ht, 'VEP', config, {'csq': csq}, annotate, cache)
 
     if csq:
         dataset = dataset.annotate_globals(
@@ -586,8 +700,9 @@ def vep(dataset: Union[Table, MatrixTable], config, block_size=1000, name='vep',
 @typecheck(dataset=oneof(Table, MatrixTable),
            config=str,
            block_size=int,
-           name=str)
-def nirvana(dataset: Union[MatrixTable, Table], config, block_size=500000, name='nirvana'):
+           name=str,
+           cache=nullable(str))
+def nirvana(dataset: Union[MatrixTable, Table], config, block_size=500000, name='nirvana', cache=None):
     """Annotate variants using `Nirvana <https://github.com/Illumina/Nirvana>`_.
 
     .. include:: ../_templates/experimental.rst
@@ -901,6 +1016,9 @@ def nirvana(dataset: Union[MatrixTable, Table], config, block_size=500000, name=
         Number of rows to process per Nirvana invocation.
     name : :obj:`str`
         Name for resulting row field.
+    cache : :obj:`str`, optional
+        Path of a directory in which to cache annotations. Only variants that
+        are not in the cache are sent to Nirvana. See :func:`.vep`.
 
     Returns
     -------
@@ -914,11 +1032,16 @@ def nirvana(dataset: Union[MatrixTable, Table], config, block_size=500000, name=
         require_table_key_variant(dataset, 'nirvana')
         ht = dataset.select()
 
-    annotations = Table(TableToTableApply(ht._tir,
-                                          {'name': 'Nirvana',
-                                           'config': config,
-                                           'blockSize': block_size}
-                                          )).persist()
+    def annotate(ht):
+        return Table(TableToTableApply(ht._tir,
+                                       {'name': 'Nirvana',
+                                        'config': config,
+                                        'blockSize': block_size}))
+
+    if cache is None:
+        annotations = annotate(ht).persist()
+    else:
+        annotations = _cached_annotations(ht, 'Nirvana', config, {}, annotate, cache)
 
     if isinstance(dataset, MatrixTable):
         return dataset.annotate_rows(**{name: annotations[dataset.row_key].nirvana})
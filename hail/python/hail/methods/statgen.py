@@ -1365,8 +1365,13 @@ def _lambda_gc_agg(p_value, approximate=True):
 
 @typecheck(call_expr=expr_call,
            k=int,
-           compute_loadings=bool)
-def hwe_normalized_pca(call_expr, k=10, compute_loadings=False) -> Tuple[List[float], Table, Table]:
+           compute_loadings=bool,
+           method=enumeration('svd', 'randomized'),
+           oversampling=int,
+           n_iterations=int,
+           block_size=nullable(int))
+def hwe_normalized_pca(call_expr, k=10, compute_loadings=False, *, method='svd', oversampling=10,
+                       n_iterations=2, block_size=None) -> Tuple[List[float], Table, Table]:
     r"""Run principal component analysis (PCA) on the Hardy-Weinberg-normalized
     genotype call matrix.
 
@@ -1416,6 +1421,14 @@ def hwe_normalized_pca(call_expr, k=10, compute_loadings=False) -> Tuple[List[fl
         Number of principal components.
     compute_loadings : :obj:`bool`
         If ``True``, compute row loadings.
+    method : :obj:`str`
+        ``'svd'`` or ``'randomized'``. See :func:`.pca`.
+    oversampling : :obj:`int`
+        Number of extra dimensions sampled by the randomized method.
+    n_iterations : :obj:`int`
+        Number of power iterations of the randomized method.
+    block_size : :obj:`int`, optional
+        Block size of the block matrix used by the randomized method.
 
     Returns
     -------
@@ -1442,13 +1455,22 @@ def hwe_normalized_pca(call_expr, k=10, compute_loadings=False) -> Tuple[List[fl
 
     return pca(normalized_gt,
                k,
-               compute_loadings)
+               compute_loadings,
+               method=method,
+               oversampling=oversampling,
+               n_iterations=n_iterations,
+               block_size=block_size)
 
 
 @typecheck(entry_expr=expr_float64,
            k=int,
-           compute_loadings=bool)
-def pca(entry_expr, k=10, compute_loadings=False) -> Tuple[List[float], Table, Table]:
+           compute_loadings=bool,
+           method=enumeration('svd', 'randomized'),
+           oversampling=int,
+           n_iterations=int,
+           block_size=nullable(int))
+def pca(entry_expr, k=10, compute_loadings=False, *, method='svd', oversampling=10,
+        n_iterations=2, block_size=None) -> Tuple[List[float], Table, Table]:
     r"""Run principal component analysis (PCA) on numeric columns derived from a
     matrix table.
 
@@ -1514,6 +1536,21 @@ def pca(entry_expr, k=10, compute_loadings=False) -> Tuple[List[float], Table, T
     The eigenvalues are returned in descending order, with scores and loadings
     given the corresponding array order.
 
+    By default, the SVD is computed exactly. With ``method='randomized'``, it
+    is instead approximated by randomized block Krylov iteration (block
+    Lanczos) on a :class:`.BlockMatrix` of the entries: starting from
+    ``k + oversampling`` random vectors, each of the `n_iterations` power
+    iterations multiplies the current block by :math:`MM^T` (or :math:`M^TM`,
+    whichever is smaller), and the SVD is computed from the projection of
+    :math:`M` onto the span of all the blocks. This takes ``2 * n_iterations
+    + 3`` passes over the entries, all local work is on matrices with only
+    :math:`(k + \mathrm{oversampling})(n\_iterations + 1)` columns, and is much
+    faster than the exact SVD when `k` is small relative to the size of the
+    matrix. The relative error :math:`\lVert M - U_k S_k V_k^T \rVert_F /
+    \lVert M \rVert_F` of the rank-`k` approximation is logged. More
+    iterations or oversampling improve the accuracy of the leading
+    components.
+
     Parameters
     ----------
     entry_expr : :class:`.Expression`
@@ -1522,6 +1559,17 @@ def pca(entry_expr, k=10, compute_loadings=False) -> Tuple[List[float], Table, T
         Number of principal components.
     compute_loadings : :obj:`bool`
         If ``True``, compute row loadings.
+    method : :obj:`str`
+        ``'svd'`` to compute the SVD exactly or ``'randomized'`` to
+        approximate it by randomized block Krylov iteration.
+    oversampling : :obj:`int`
+        Number of random vectors in addition to `k` used by the randomized
+        method.
+    n_iterations : :obj:`int`
+        Number of power iterations of the randomized method.
+    block_size : :obj:`int`, optional
+        Block size of the block matrix used by the randomized method.
+        Default given by :meth:`.BlockMatrix.default_block_size`.
 
     Returns
     -------
@@ -1530,6 +1578,9 @@ def pca(entry_expr, k=10, compute_loadings=False) -> Tuple[List[float], Table, T
     """
     check_entry_indexed('pca/entry_expr', entry_expr)
 
+    if method == 'randomized':
+        return _randomized_pca(entry_expr, k, compute_loadings, oversampling, n_iterations, block_size)
+
     mt = matrix_table_source('pca/entry_expr', entry_expr)
 
     #  FIXME: remove once select_entries on a field is free
@@ -1554,15 +1605,156 @@ def pca(entry_expr, k=10, compute_loadings=False) -> Tuple[List[float], Table, T
     return hl.eval(g.eigenvalues), scores, None if t is None else t.drop('eigenvalues', 'scores')
 
 
+def _randomized_pca(entry_expr, k, compute_loadings, oversampling, n_iterations, block_size):
+    mt = matrix_table_source('pca/entry_expr', entry_expr)
+    if k < 1:
+        raise ValueError(f'pca: k must be positive, found {k}')
+    if oversampling < 0 or n_iterations < 0:
+        raise ValueError(f'pca: oversampling and n_iterations must be non-negative, '
+                         f'found {oversampling} and {n_iterations}')
+
+    # a is the transpose of M: variants by samples
+    a = BlockMatrix.from_entry_expr(entry_expr, block_size=block_size)
+    n_rows, n_cols = a.shape
+    if k > min(n_rows, n_cols):
+        raise ValueError(f'pca: k must be at most the number of rows and columns, {min(n_rows, n_cols)}, found {k}')
+
+    # the Krylov blocks are kept locally, so they span the smaller dimension
+    transposed = n_rows > n_cols
+    x = a.T if transposed else a
+    u, s, v = _block_krylov_svd(x, k, min(k + oversampling, n_rows, n_cols), n_iterations)
+    if transposed:
+        u, v = v, u
+
+    squared_norm = (a ** 2).sum()
+    error = math.sqrt(max(0.0, 1 - np.sum(s ** 2) / squared_norm)) if squared_norm > 0 else 0.0
+    info(f'pca: randomized PCA made {2 * n_iterations + 3} passes over the data; relative Frobenius error '
+         f'of the rank {k} approximation is {error:.4g}')
+
+    scores = mt.add_col_index('__col_idx').cols()
+    scores = scores.select(scores=hl.literal((v * s).tolist(), tarray(tarray(tfloat64)))[scores.__col_idx])
+    scores = scores.select_globals()
+
+    loadings = None
+    if compute_loadings:
+        loadings = mt.add_row_index('__row_idx').rows()
+        loadings = loadings.select(loadings=hl.literal(u.tolist(), tarray(tarray(tfloat64)))[loadings.__row_idx])
+        loadings = loadings.select_globals()
+
+    return (s ** 2).tolist(), scores, loadings
+
+
+def _block_krylov_svd(x, k, block_width, n_iterations):
+    r"""Returns the leading `k` singular triplets of the block matrix `x` as
+    numpy arrays `u`, `s`, `v`, approximated from the span of the blocks
+    :math:`X\Omega, (XX^T)X\Omega, \ldots, (XX^T)^q X\Omega` for a random
+    `block_width`-column :math:`\Omega`."""
+    n_rows, n_cols = x.shape
+
+    def orthonormalize(nd):
+        return np.linalg.qr(nd)[0]
+
+    def multiply(bm, nd):
+        return (bm @ BlockMatrix.from_numpy(nd, x.block_size)).to_numpy()
+
+    omega = BlockMatrix.random(n_cols, block_width, block_size=x.block_size, seed=Env.next_seed())
+    blocks = [orthonormalize((x @ omega).to_numpy())]
+    for _ in range(n_iterations):
+        z = orthonormalize(multiply(x.T, blocks[-1]))
+        blocks.append(orthonormalize(multiply(x, z)))
+    q = orthonormalize(np.hstack(blocks))
+
+    # x is approximately q q^T x = q (x^T q)^T
+    w, s, ut = np.linalg.svd(multiply(x.T, q), full_matrices=False)
+    return q @ ut.T[:, :k], s[:k], w[:, :k]
+
+
+@typecheck(call_expr=expr_call,
+           loadings_expr=expr_array(expr_float64),
+           af_expr=expr_float64)
+def pc_project(call_expr, loadings_expr, af_expr) -> Table:
+    r"""Project samples onto the principal components computed by
+    :func:`.hwe_normalized_pca`.
+
+    Examples
+    --------
+
+    Compute loadings and allele frequencies on one dataset:
+
+    >>> _, _, loadings = hl.hwe_normalized_pca(dataset.GT, k=5, compute_loadings=True)
+    >>> dataset = dataset.annotate_rows(af=hl.agg.mean(dataset.GT.n_alt_alleles()) / 2)
+    >>> loadings = loadings.annotate(af=dataset.rows()[loadings.key].af)
+
+    and compute the scores of the samples of another:
+
+    >>> scores = hl.pc_project(dataset.GT, loadings.loadings, loadings.af)
+
+    Notes
+    -----
+    Genotypes are normalized as in :func:`.hwe_normalized_pca`, using the
+    alternate allele frequency of each variant in the samples on which the
+    loadings were computed, and the number of variants in the loadings table.
+    The scores of a sample are the sum over variants of its normalized
+    genotypes times the loadings, so projecting the samples on which the
+    loadings were computed gives their scores from
+    :func:`.hwe_normalized_pca`.
+
+    As in :func:`.hwe_normalized_pca`, missing genotypes contribute zero to
+    the scores. So do variants in the loadings table that are not in the
+    dataset of `call_expr`.
+
+    The scores are computed in a single aggregation over the entries.
+
+    Parameters
+    ----------
+    call_expr : :class:`.CallExpression`
+        Entry-indexed call expression of the samples to project.
+    loadings_expr : :class:`.ArrayNumericExpression`
+        Field of a table keyed by the row key of the dataset of `call_expr`,
+        such as the loadings table of :func:`.hwe_normalized_pca`, with the
+        loadings of each variant.
+    af_expr : :class:`.Float64Expression`
+        Field of the table of `loadings_expr` with the alternate allele
+        frequency of each variant.
+
+    Returns
+    -------
+    :class:`.Table`
+        Table with the column key of the dataset of `call_expr` as key and a
+        field `scores` of type ``array<float64>``.
+    """
+    mt = matrix_table_source('pc_project/call_expr', call_expr)
+    check_entry_indexed('pc_project/call_expr', call_expr)
+
+    loadings = loadings_expr._indices.source
+    if not isinstance(loadings, Table) or loadings_expr._indices != loadings._row_indices:
+        raise ValueError("pc_project: 'loadings_expr' must be a row field of a table")
+    if af_expr._indices != loadings._row_indices:
+        raise ValueError("pc_project: 'af_expr' must be a row field of the table of 'loadings_expr'")
+
+    n_variants = loadings.count()
+    loadings = loadings.select(__loadings=loadings_expr, __af=af_expr)
+    loadings = loadings.filter(hl.is_defined(loadings.__loadings) & (loadings.__af > 0) & (loadings.__af < 1))
+
+    mt = mt._annotate_all(row_exprs={'__loadings': loadings[mt.row_key].__loadings,
+                                     '__af': loadings[mt.row_key].__af},
+                          entry_exprs={'__gt': call_expr.n_alt_alleles()})
+    mt = mt.filter_rows(hl.is_defined(mt.__loadings))
+
+    normalized_gt = hl.or_else((mt.__gt - 2 * mt.__af) / hl.sqrt(n_variants * 2 * mt.__af * (1 - mt.__af)), 0.0)
+    return mt.select_cols(scores=agg.array_sum(mt.__loadings * normalized_gt)).cols().select_globals()
+
+
 @typecheck(call_expr=expr_call,
            min_individual_maf=numeric,
            k=nullable(int),
            scores_expr=nullable(expr_array(expr_float64)),
            min_kinship=nullable(numeric),
            statistics=enumeration('kin', 'kin2', 'kin20', 'all'),
-           block_size=nullable(int))
+           block_size=nullable(int),
+           pca_method=enumeration('svd', 'randomized'))
 def pc_relate(call_expr, min_individual_maf, *, k=None, scores_expr=None,
-              min_kinship=None, statistics="all", block_size=None) -> Table:
+              min_kinship=None, statistics="all", block_size=None, pca_method='svd') -> Table:
     r"""Compute relatedness estimates between individuals using a variant of the
     PC-Relate method.
 
@@ -1820,6 +2012,9 @@ def pc_relate(call_expr, min_individual_maf, *, k=None, scores_expr=None,
     block_size : :obj:`int`, optional
         Block size of block matrices used in the algorithm.
         Default given by :meth:`.BlockMatrix.default_block_size`.
+    pca_method : :obj:`str`
+        Method used to compute the scores if `k` is set: ``'svd'`` or
+        ``'randomized'``. See :func:`.pca`.
 
     Returns
     -------
@@ -1829,7 +2024,8 @@ def pc_relate(call_expr, min_individual_maf, *, k=None, scores_expr=None,
     mt = matrix_table_source('pc_relate/call_expr', call_expr)
 
     if k and scores_expr is None:
-        _, scores, _ = hwe_normalized_pca(call_expr, k, compute_loadings=False)
+        _, scores, _ = hwe_normalized_pca(call_expr, k, compute_loadings=False, method=pca_method,
+                                          block_size=block_size)
         scores_expr = scores[mt.col_key].scores
     elif not k and scores_expr is not None:
         analyze('pc_relate/scores_expr', scores_expr, mt._col_indices)
@@ -743,16 +743,25 @@ class LinearMixedModel(object):
 
         return Table._from_java(self._scala_model.fit(jpa_t, maybe_ja_t))
 
-    @typecheck_method(pa=np.ndarray, a=nullable(np.ndarray), return_pandas=bool)
-    def fit_alternatives_numpy(self, pa, a=None, return_pandas=False):
+    @typecheck_method(pa=np.ndarray,
+                      a=nullable(np.ndarray),
+                      return_pandas=bool,
+                      block_size=int,
+                      n_threads=int)
+    def fit_alternatives_numpy(self, pa, a=None, return_pandas=False, block_size=4096, n_threads=1):
         r"""Fit and test alternative model for each augmented design matrix.
 
         Notes
         -----
-        This Python-only implementation runs serially on master. See
+        This Python-only implementation runs on master. See
         the scalable implementation :meth:`fit_alternatives` for documentation
         of the returned table.
 
+        Alternatives are fit `block_size` columns at a time with matrix
+        products, using the Schur complement of the null model's
+        :math:`X^T D X` in place of a linear solve per column. Blocks are fit
+        on a pool of `n_threads` threads.
+
         Parameters
         ----------
         pa: :class:`ndarray`
@@ -764,12 +773,18 @@ class LinearMixedModel(object):
             Required for low-rank inference.
         return_pandas: :obj:`bool`
             If true, return pandas dataframe. If false, return Hail table.
+        block_size: :obj:`int`
+            Number of alternatives to fit at once.
+        n_threads: :obj:`int`
+            Number of threads fitting blocks of alternatives.
 
         Returns
         -------
         :class:`.Table` or :class:`.pandas.DataFrame`
             Table of results for each augmented design matrix.
         """
+        from concurrent.futures import ThreadPoolExecutor
+
         self._check_dof(self.f + 1)
 
         if not self._fitted:
@@ -780,48 +795,78 @@ class LinearMixedModel(object):
 
         if self.low_rank:
             assert a.shape[0] == self.n and a.shape[1] == n_cols
-            data = [(i,) + self._fit_alternative_numpy(pa[:, i], a[:, i]) for i in range(n_cols)]
+
+        if block_size < 1:
+            raise ValueError(f'block_size must be positive, found {block_size}')
+        if n_threads < 1:
+            raise ValueError(f'n_threads must be positive, found {n_threads}')
+
+        starts = range(0, n_cols, block_size)
+
+        def fit_block(start):
+            stop = start + block_size
+            return self._fit_alternatives_block_numpy(pa[:, start:stop],
+                                                      a[:, start:stop] if self.low_rank else None)
+
+        if n_threads == 1:
+            results = [fit_block(start) for start in starts]
         else:
-            data = [(i,) + self._fit_alternative_numpy(pa[:, i], None) for i in range(n_cols)]
+            with ThreadPoolExecutor(max_workers=n_threads) as executor:
+                results = list(executor.map(fit_block, starts))
 
-        df = pd.DataFrame.from_records(data, columns=['idx', 'beta', 'sigma_sq', 'chi_sq', 'p_value'])
+        columns = ['beta', 'sigma_sq', 'chi_sq', 'p_value']
+        df = pd.DataFrame({'idx': np.arange(n_cols),
+                           **{c: np.concatenate([r[i] for r in results]) if results else np.zeros(0)
+                              for i, c in enumerate(columns)}})
 
         if return_pandas:
             return df
         else:
             return Table.from_pandas(df, key='idx')
 
-    def _fit_alternative_numpy(self, pa, a):
-        from scipy.linalg import solve, LinAlgError
+    def _fit_alternatives_block_numpy(self, pa, a):
+        from scipy.linalg import cho_factor, cho_solve, LinAlgError
         from scipy.stats.distributions import chi2
 
         gamma = self.gamma
-        dpa = self._d_alt * pa
+        dpa = self._d_alt[:, np.newaxis] * pa
 
-        # single thread => no need to copy
-        ydy = self._ydy_alt
-        xdy = self._xdy_alt
-        xdx = self._xdx_alt
+        # the alternative's X^T D X is [[c, b^T], [b, xdx]] and its X^T D y is
+        # [v, xdy], with xdx and xdy those of the null model
+        xdy = self._xdy_alt[1:]
+        xdx = self._xdx_alt[1:, 1:]
 
         if self.low_rank:
-            xdy[0] = self.py @ dpa + gamma * (self.y @ a)
-            xdx[0, 0] = pa @ dpa + gamma * (a @ a)
-            xdx[0, 1:] = self.px.T @ dpa + gamma * (self.x.T @ a)
+            v = self.py @ dpa + gamma * (self.y @ a)
+            c = np.einsum('ij,ij->j', pa, dpa) + gamma * np.einsum('ij,ij->j', a, a)
+            b = self.px.T @ dpa + gamma * (self.x.T @ a)
         else:
-            xdy[0] = self.py @ dpa
-            xdx[0, 0] = pa @ dpa
-            xdx[0, 1:] = self.px.T @ dpa
+            v = self.py @ dpa
+            c = np.einsum('ij,ij->j', pa, dpa)
+            b = self.px.T @ dpa
 
+        nans = np.full(pa.shape[1], float('nan'))
         try:
-            beta = solve(xdx, xdy, assume_a='pos')  # only uses upper triangle
-            residual_sq = ydy - xdy.T @ beta
-            sigma_sq = residual_sq / self._dof_alt
-            chi_sq = self.n * np.log(self._residual_sq / residual_sq)  # division => precision
-            p_value = chi2.sf(chi_sq, 1)
-
-            return beta[0], sigma_sq, chi_sq, p_value
+            xdx_factor = cho_factor(xdx)
         except LinAlgError:
-            return tuple(4 * [float('nan')])
+            return nans, nans, nans, nans
+        w = cho_solve(xdx_factor, xdy)
+        z = cho_solve(xdx_factor, b)
+
+        # the Schur complement of xdx, positive if and only if the alternative's
+        # X^T D X is positive definite; an alternative collinear with the
+        # covariates leaves only rounding error, relative to c
+        schur = c - np.einsum('ij,ij->j', b, z)
+        schur = np.where(schur > c * 1e-12, schur, float('nan'))
+        numerator = v - b.T @ w
+
+        beta = numerator / schur
+        residual_sq = (self._ydy_alt - xdy @ w) - numerator * beta
+        sigma_sq = residual_sq / self._dof_alt
+        chi_sq = self.n * np.log(self._residual_sq / residual_sq)  # division => precision
+        p_value = chi2.sf(chi_sq, 1)
+
+        return beta, sigma_sq, chi_sq, p_value
 
     def _set_scala_model(self):
         from hail.utils.java import Env
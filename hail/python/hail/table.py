@@ -1796,8 +1796,8 @@ class Table(ExprContainer):
         """
         return Env.backend().unpersist_table(self)
 
-    @typecheck_method(_localize=bool)
-    def collect(self, _localize=True):
+    @typecheck_method(_localize=bool, _lazy=bool)
+    def collect(self, _localize=True, _lazy=False):
         """Collect the rows of the table into a local list.
 
         Examples
@@ -1824,7 +1824,7 @@ class Table(ExprContainer):
         ir = GetField(TableCollect(self._tir), 'rows')
         e = construct_expr(ir, hl.tarray(self.row.dtype))
         if _localize:
-            return Env.backend().execute(e._ir)
+            return Env.backend().execute(e._ir, _lazy=_lazy)
         else:
             return e
 
@@ -3022,6 +3022,95 @@ class Table(ExprContainer):
         """
         return Env.spark_backend('to_pandas').to_pandas(self, flatten)
 
+    def _collect_column_batches(self, partitions_per_batch):
+        t = self
+        n = t.n_partitions()
+        if n > partitions_per_batch and not isinstance(t._tir, TableRead):
+            # each batch would otherwise run the whole pipeline again
+            t = t.checkpoint(new_temp_file(suffix='ht'))
+            n = t.n_partitions()
+        t = t.expand_types()
+        for start in range(0, n, partitions_per_batch):
+            parts = list(range(start, min(n, start + partitions_per_batch)))
+            yield t._filter_partitions(parts).collect(_lazy=True)
+
+    @typecheck_method(partitions_per_batch=int)
+    def to_numpy_columns(self, partitions_per_batch=16):
+        """Collect the rows of the table into one NumPy array per field.
+
+        Examples
+        --------
+
+        >>> columns = table1.to_numpy_columns()
+        >>> ht_mean = columns['HT'].mean()
+
+        Notes
+        -----
+        Rows are collected in batches of `partitions_per_batch` partitions
+        using Hail's binary encoding, without going through Spark. A table that
+        is not read directly from disk and has more than one batch is first
+        written to a temporary file, so that it is only computed once. Types
+        are expanded as in :meth:`expand_types`, so loci, intervals and calls
+        become structs.
+
+        Numeric and boolean fields become arrays of the corresponding NumPy
+        dtype, or :class:`numpy.ma.MaskedArray` if any value is missing. String
+        and array fields become arrays of Python objects. Struct fields become
+        a :obj:`dict` mapping each nested field to its column.
+
+        Parameters
+        ----------
+        partitions_per_batch : :obj:`int`
+            Number of partitions to collect at once.
+
+        Returns
+        -------
+        :obj:`dict` of :obj:`str` to :class:`numpy.ndarray` or :obj:`dict`
+        """
+        from hail.backend.codec import _concatenate_columns
+
+        batches = [rows.to_numpy_columns() for rows in self._collect_column_batches(partitions_per_batch)]
+        if not batches:
+            from hail.backend.codec import StructArray
+            row_type = self.expand_types().row.dtype
+            return StructArray(row_type, {f: [] for f in row_type}, set(), 0).to_numpy_columns()
+        return {f: _concatenate_columns([b[f] for b in batches]) for f in batches[0]}
+
+    @typecheck_method(partitions_per_batch=int)
+    def to_arrow(self, partitions_per_batch=16):
+        """Converts this table to an Arrow table.
+
+        Examples
+        --------
+
+        >>> arrow_table = table1.to_arrow() # doctest: +SKIP
+
+        Notes
+        -----
+        Requires the ``pyarrow`` package. Each batch of `partitions_per_batch`
+        partitions is collected using Hail's binary encoding and becomes one
+        record batch. Types are expanded as in :meth:`expand_types`, so loci,
+        intervals and calls become struct columns. As in
+        :meth:`to_numpy_columns`, a table that is not read directly from disk
+        is first written to a temporary file.
+
+        Parameters
+        ----------
+        partitions_per_batch : :obj:`int`
+            Number of partitions per record batch.
+
+        Returns
+        -------
+        :class:`pyarrow.Table`
+        """
+        import pyarrow as pa
+        from hail.backend.codec import _arrow_type
+
+        schema = pa.schema([pa.field(f, _arrow_type(t)) for f, t in self.expand_types().row.dtype.items()])
+        return pa.Table.from_batches(
+            [rows.to_arrow_batch() for rows in self._collect_column_batches(partitions_per_batch)],
+            schema=schema)
+
     @staticmethod
     @typecheck(df=pandas.DataFrame,
                key=oneof(str, sequenceof(str)))
@@ -2,7 +2,7 @@ import re
 import inspect
 import abc
 import collections
-from decorator import decorator
+from decorator import decorate
 
 
 class TypecheckFailure(Exception):
@@ -477,71 +477,110 @@ def check_meta(f, checks, is_method):
         f.__checked = True
 
 
-def check_all(f, args, kwargs, checks, is_method):
-    spec = get_signature(f)
-    check_meta(f, checks, is_method)
-    name = f.__name__
-    arg_list = list(args)
-
-    args_ = []
-    kwargs_ = {}
-
-    has_varargs = any(param.kind == param.VAR_POSITIONAL for param in spec.parameters.values())
-    n_pos_args = len(
-        list(filter(
-            lambda p: p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD),
-            spec.parameters.values())))
-    if not has_varargs and len(args) > n_pos_args:
-        raise TypeError(f"'{name}' takes {n_pos_args} positional arguments, found {len(args)}")
-
-    for i, (arg_name, param) in enumerate(spec.parameters.items()):
-        if i == 0 and is_method:
-            if not isinstance(arg_list[0], object):
-                raise RuntimeError("no class found as first argument. Did you mean to use 'typecheck' "
-                                   "instead of 'typecheck_method'?")
-            args_.append(args[i])
-            continue
-        checker = checks[arg_name]
-        assert isinstance(param, inspect.Parameter)
-        if param.kind in (param.POSITIONAL_ONLY, param.POSITIONAL_OR_KEYWORD, param.KEYWORD_ONLY):
+def _identity_types(checker):
+    """Returns the types whose values `checker` accepts unchanged, if that is
+    all it accepts, so that the check is a single :func:`isinstance`."""
+    if isinstance(checker, LiteralChecker):
+        return checker.t,
+    if isinstance(checker, AnyChecker):
+        return object,
+    if isinstance(checker, ExactlyTypeChecker) and checker.v is None and checker.reference_equality:
+        return type(None),
+    if isinstance(checker, MultipleTypeChecker):
+        types = []
+        for c in checker.checkers:
+            ts = _identity_types(c)
+            if ts is None:
+                return None
+            types.extend(ts)
+        return tuple(types)
+    return None
+
+
+class CheckPlan(object):
+    """Argument checking of one typechecked function, computed once from its
+    signature and checkers."""
+
+    def __init__(self, f, checks, is_method):
+        check_meta(f, checks, is_method)
+        spec = get_signature(f)
+        self.name = f.__name__
+        self.is_method = is_method
+
+        params = list(spec.parameters.values())
+        self.n_pos_args = len([p for p in params if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)])
+        self.has_varargs = any(p.kind == p.VAR_POSITIONAL for p in params)
+
+        def step(i, param):
+            checker = checks[param.name]
+            return i, param.name, param.default, checker, checker.check, _identity_types(checker)
+
+        self.positional = []
+        self.varargs = None
+        self.keyword_only = []
+        self.varkw = None
+        for i, param in enumerate(params):
+            if i == 0 and is_method:
+                continue
+            if param.kind in (param.POSITIONAL_ONLY, param.POSITIONAL_OR_KEYWORD):
+                self.positional.append(step(i, param))
+            elif param.kind == param.VAR_POSITIONAL:
+                self.varargs = step(i, param)
+            elif param.kind == param.KEYWORD_ONLY:
+                self.keyword_only.append(step(i, param))
+            else:
+                assert param.kind == param.VAR_KEYWORD
+                self.varkw = step(i, param)
+
+    def _failure(self, arg_name, checker, arg):
+        return TypeError("{fname}: parameter '{argname}': "
+                         "expected {expected}, found {found}".format(
+            fname=self.name,
+            argname=arg_name,
+            expected=checker.expects(),
+            found=checker.format(arg)
+        ))
+
+    def check(self, args, kwargs):
+        name = self.name
+        n_args = len(args)
+        if not self.has_varargs and n_args > self.n_pos_args:
+            raise TypeError(f"'{name}' takes {self.n_pos_args} positional arguments, found {n_args}")
+
+        if self.is_method:
+            args_ = [args[0]]
+        else:
+            args_ = []
+        kwargs_ = {}
+
+        for i, arg_name, default, checker, check, types in self.positional:
+            if i < n_args:
+                arg = args[i]
+            elif arg_name in kwargs:
+                arg = kwargs.pop(arg_name)
+            elif default is inspect.Parameter.empty:
+                raise TypeError(f'Expected {self.n_pos_args} positional arguments, '
+                                f'found {n_args}')
+            else:
+                arg = default
+            if types is not None and isinstance(arg, types):
+                args_.append(arg)
+                continue
             try:
-                if param.kind in (param.POSITIONAL_ONLY, param.POSITIONAL_OR_KEYWORD):
-                    # must be positional
-                    if i < len(args):
-                        arg = args[i]
-                        args_.append(checker.check(arg, name, arg_name))
-                    # passed as keyword
-                    else:
-                        if arg_name in kwargs:
-                            arg = kwargs.pop(arg_name)
-                        else:
-                            if param.default is inspect._empty:
-                                raise TypeError(f'Expected {n_pos_args} positional arguments, '
-                                                f'found {len(args)}')
-                            arg = param.default
-                        args_.append(checker.check(arg, name, arg_name))
-                else:
-                    if arg_name in kwargs:
-                        arg = kwargs.pop(arg_name)
-                    else:
-                        if param.default is inspect._empty:
-                            raise TypeError(f"{name}() missing required keyword-only argument '{arg_name}'")
-                        arg = param.default
-                    kwargs_[arg_name] = checker.check(arg, name, arg_name)
+                args_.append(check(arg, name, arg_name))
             except TypecheckFailure as e:
-                raise TypeError("{fname}: parameter '{argname}': "
-                                "expected {expected}, found {found}".format(
-                    fname=name,
-                    argname=arg_name,
-                    expected=checker.expects(),
-                    found=checker.format(arg)
-                )) from e
-        elif param.kind == param.VAR_POSITIONAL:
+                raise self._failure(arg_name, checker, arg) from e
+
+        if self.varargs is not None:
+            i, arg_name, _, checker, check, types = self.varargs
             # consume the rest of the positional arguments
             varargs = args[i:]
             for j, arg in enumerate(varargs):
+                if types is not None and isinstance(arg, types):
+                    args_.append(arg)
+                    continue
                 try:
-                    args_.append(checker.check(arg, name, arg_name))
+                    args_.append(check(arg, name, arg_name))
                 except TypecheckFailure as e:
                     raise TypeError("{fname}: parameter '*{argname}' (arg {idx} of {tot}): "
                                     "expected {expected}, found {found}".format(
@@ -552,12 +591,31 @@ def check_all(f, args, kwargs, checks, is_method):
                         expected=checker.expects(),
                         found=checker.format(arg)
                     )) from e
-        else:
-            assert param.kind == param.VAR_KEYWORD
+
+        for _, arg_name, default, checker, check, types in self.keyword_only:
+            if arg_name in kwargs:
+                arg = kwargs.pop(arg_name)
+            elif default is inspect.Parameter.empty:
+                raise TypeError(f"{name}() missing required keyword-only argument '{arg_name}'")
+            else:
+                arg = default
+            if types is not None and isinstance(arg, types):
+                kwargs_[arg_name] = arg
+                continue
+            try:
+                kwargs_[arg_name] = check(arg, name, arg_name)
+            except TypecheckFailure as e:
+                raise self._failure(arg_name, checker, arg) from e
+
+        if self.varkw is not None:
+            _, arg_name, _, checker, check, types = self.varkw
             # kwargs now holds all variable kwargs
             for kwarg_name, arg in kwargs.items():
+                if types is not None and isinstance(arg, types):
+                    kwargs_[kwarg_name] = arg
+                    continue
                 try:
-                    kwargs_[kwarg_name] = checker.check(arg, name, arg_name)
+                    kwargs_[kwarg_name] = check(arg, name, arg_name)
                 except TypecheckFailure as e:
                     raise TypeError("{fname}: keyword argument '{argname}': "
                                     "expected {expected}, found {found}".format(
@@ -565,7 +623,11 @@ def check_all(f, args, kwargs, checks, is_method):
                         argname=kwarg_name,
                         expected=checker.expects(),
                         found=checker.format(arg))) from e
-    return args_, kwargs_
+        return args_, kwargs_
+
+
+def check_all(f, args, kwargs, checks, is_method):
+    return CheckPlan(f, checks, is_method).check(args, kwargs)
 
 
 def typecheck_method(**checkers):
@@ -579,9 +641,18 @@ def typecheck(**checkers):
 def _make_dec(checkers, is_method):
     checkers = {k: only(v) for k, v in checkers.items()}
 
-    @decorator
-    def wrapper(__original_func, *args, **kwargs):
-        args_, kwargs_ = check_all(__original_func, args, kwargs, checkers, is_method=is_method)
-        return __original_func(*args_, **kwargs_)
+    def dec(f):
+        # the plan is made on the first call, so that checkers of lazy types
+        # and signature errors don't fail at import
+        plan = None
+
+        def wrapper(__original_func, *args, **kwargs):
+            nonlocal plan
+            if plan is None:
+                plan = CheckPlan(__original_func, checkers, is_method)
+            args_, kwargs_ = plan.check(args, kwargs)
+            return __original_func(*args_, **kwargs_)
+
+        return decorate(f, wrapper)
 
-    return wrapper
+    return dec
@@ -1,3 +1,4 @@
+import collections
 import math
 import random
 import asyncio
@@ -10,6 +11,8 @@ from .globals import complete_states
 
 job_array_size = 50
 max_job_submit_attempts = 3
+# the server holds a request with a wait parameter open for at most this long
+long_poll_seconds = 50
 
 
 def filter_params(complete, success, attributes):
@@ -30,6 +33,44 @@ def filter_params(complete, success, attributes):
     return params
 
 
+class Backoff:
+    def __init__(self):
+        self.i = 0
+
+    async def sleep(self):
+        j = random.randrange(math.floor(1.1 ** self.i))
+        await asyncio.sleep(0.100 * j)
+        # max 44.5s
+        if self.i < 64:
+            self.i = self.i + 1
+
+
+async def poll_until(poll, done):
+    """Call `poll` until `done` is true of the status it returns.
+
+    `poll` is called with the number of seconds the server may wait for a
+    change before responding. Servers that do not support waiting respond
+    immediately, and are polled with randomized exponential backoff, as
+    they are if a long poll times out.
+    """
+    backoff = Backoff()
+    wait = long_poll_seconds
+    loop = asyncio.get_event_loop()
+    while True:
+        start = loop.time()
+        try:
+            status = await poll(wait)
+        except asyncio.TimeoutError:
+            if wait is None:
+                raise
+            wait = None
+            continue
+        if done(status):
+            return status
+        if wait is None or loop.time() - start < wait / 2:
+            await backoff.sleep()
+
+
 class Job:
     @staticmethod
     def exit_code(job_status):
@@ -193,20 +234,16 @@ class SubmittedJob:
         state = self._status['state']
         return state in complete_states
 
-    async def status(self):
-        self._status = await self._batch._client._get(f'/api/v1alpha/batches/{self.batch_id}/jobs/{self.job_id}')
+    async def status(self, wait=None):
+        self._status = await self._batch._client._get(f'/api/v1alpha/batches/{self.batch_id}/jobs/{self.job_id}',
+                                                      wait=wait)
         return self._status
 
     async def wait(self):
-        i = 0
-        while True:
-            if await self.is_complete():
-                return self._status
-            j = random.randrange(math.floor(1.1 ** i))
-            await asyncio.sleep(0.100 * j)
-            # max 44.5s
-            if i < 64:
-                i = i + 1
+        if self._status and self._status['state'] in complete_states:
+            return self._status
+        return await poll_until(lambda wait: self.status(wait=wait),
+                                lambda status: status['state'] in complete_states)
 
     async def log(self):
         return await self._batch._client._get(f'/api/v1alpha/batches/{self.batch_id}/jobs/{self.job_id}/log')
@@ -224,7 +261,7 @@ class Batch:
     async def cancel(self):
         await self._client._patch(f'/api/v1alpha/batches/{self.id}/cancel')
 
-    async def status(self, limit=None, offset=None):
+    async def status(self, limit=None, offset=None, wait=None, n_completed=None, completed_after=None):
         params = None
         if limit is not None:
             if not params:
@@ -234,19 +271,20 @@ class Batch:
             if limit is None:
                 raise ValueError("cannot define 'offset' without a 'limit'")
             params['offset'] = str(offset)
-        return await self._client._get(f'/api/v1alpha/batches/{self.id}', params=params)
+        if n_completed is not None:
+            if not params:
+                params = {}
+            params['n_completed'] = str(n_completed)
+        if completed_after is not None:
+            if not params:
+                params = {}
+            params['completed_after'] = str(completed_after)
+        return await self._client._get(f'/api/v1alpha/batches/{self.id}', params=params, wait=wait)
 
     async def wait(self):
-        i = 0
-        while True:
-            status = await self.status(limit=0)
-            if status['complete']:
-                return await self.status()
-            j = random.randrange(math.floor(1.1 ** i))
-            await asyncio.sleep(0.100 * j)
-            # max 44.5s
-            if i < 64:
-                i = i + 1
+        await poll_until(lambda wait: self.status(limit=0, wait=wait),
+                         lambda status: status['complete'])
+        return await self.status()
 
     async def delete(self):
         await self._client._delete(f'/api/v1alpha/batches/{self.id}')
@@ -450,9 +488,13 @@ class BatchClient:
         headers['Authorization'] = f'Bearer {token}'
         self._headers = headers
 
-    async def _get(self, path, params=None):
+    async def _get(self, path, params=None, wait=None):
+        kwargs = {}
+        if wait is not None:
+            params = dict(params or {}, wait=str(wait))
+            kwargs['timeout'] = aiohttp.ClientTimeout(total=wait + 30)
         response = await self._session.get(
-            self.url + path, params=params, cookies=self._cookies, headers=self._headers)
+            self.url + path, params=params, cookies=self._cookies, headers=self._headers, **kwargs)
         return await response.json()
 
     async def _post(self, path, json=None):
@@ -501,3 +543,83 @@ class BatchClient:
     async def close(self):
         await self._session.close()
         self._session = None
+
+
+async def _watch_batch(batch, jobs, on_complete):
+    pending = {job.job_id: job for job in jobs}
+    backoff = Backoff()
+    # only the jobs that completed since the last read are listed
+    n_completed = 0
+    read_all = False
+    while True:
+        if read_all:
+            status = await batch.status()
+        else:
+            status = await batch.status(completed_after=n_completed)
+        for job_status in status['jobs']:
+            if job_status['state'] in complete_states:
+                job = pending.pop(job_status['job_id'], None)
+                if job is not None:
+                    job._job._status = job_status
+                    on_complete(job)
+        if not pending:
+            return
+        if read_all:
+            raise ValueError(f'jobs {sorted(pending)} are not complete jobs of complete batch {batch.id}')
+        if status['complete']:
+            # jobs that completed before the server recorded the order in
+            # which jobs complete are only listed by a full read
+            read_all = True
+        elif 'n_completed' in status:
+            n_completed = status['n_completed']
+            await poll_until(lambda wait: batch.status(limit=0, wait=wait, n_completed=n_completed),
+                             lambda status: status['complete'] or status['n_completed'] != n_completed)
+        else:
+            await backoff.sleep()
+
+
+async def as_completed(jobs):
+    """Yield the submitted `jobs` as they complete.
+
+    The jobs of each batch are watched together: the batch is long polled
+    until more of its jobs are complete, then the statuses of the jobs that
+    completed since the last read are fetched in one request, so waiting on
+    many jobs neither takes a request per job nor reads every job each time.
+    """
+    by_batch = collections.defaultdict(dict)
+    for job in jobs:
+        by_batch[job.batch_id][job.job_id] = job
+    n_jobs = sum(len(batch_jobs) for batch_jobs in by_batch.values())
+
+    completed = asyncio.Queue()
+
+    async def watch(batch_jobs):
+        try:
+            batch = next(iter(batch_jobs))._job._batch
+            await _watch_batch(batch, batch_jobs, completed.put_nowait)
+        except Exception as err:  # pylint: disable=W0703
+            completed.put_nowait(err)
+
+    watchers = [asyncio.ensure_future(watch(list(batch_jobs.values())))
+                for batch_jobs in by_batch.values()]
+    try:
+        for _ in range(n_jobs):
+            job = await completed.get()
+            if isinstance(job, Exception):
+                raise job
+            yield job
+    finally:
+        for watcher in watchers:
+            watcher.cancel()
+
+
+async def wait_any(jobs):
+    """Wait for the first of the submitted `jobs` to complete and return
+    it."""
+    completed = as_completed(jobs)
+    try:
+        async for job in completed:
+            return job
+        raise ValueError('cannot wait on an empty list of jobs')
+    finally:
+        await completed.aclose()
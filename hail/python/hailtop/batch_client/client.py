@@ -134,6 +134,24 @@ class BatchBuilder:
         return Batch.from_async_batch(async_batch)
 
 
+def as_completed(jobs):
+    completed = aioclient.as_completed([job._async_job for job in jobs])
+    try:
+        while True:
+            try:
+                async_job = async_to_blocking(completed.__anext__())
+            except StopAsyncIteration:
+                return
+            yield Job.from_async_job(async_job)
+    finally:
+        async_to_blocking(completed.aclose())
+
+
+def wait_any(jobs):
+    async_job = async_to_blocking(aioclient.wait_any([job._async_job for job in jobs]))
+    return Job.from_async_job(async_job)
+
+
 class BatchClient:
     def __init__(self, session=None, url=None, token_file=None, token=None, headers=None):
         if session is None:
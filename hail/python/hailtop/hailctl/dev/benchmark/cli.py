@@ -19,6 +19,11 @@ def print_help():
         help='Compare Hail benchmarks.',
         description='Run Hail benchmarks.')
 
+    subparsers.add_parser(
+        'history',
+        help='Record Hail benchmark runs and report trends.',
+        description='Record Hail benchmark runs and report trends.')
+
     main_parser.print_help()
 
 
@@ -35,6 +40,9 @@ def main(args):
         elif module == 'compare':
             from .compare import cli
             cli.main(args)
+        elif module == 'history':
+            from .history import cli
+            cli.main(args)
         elif module in ('-h', '--help', 'help'):
             print_help()
         else:
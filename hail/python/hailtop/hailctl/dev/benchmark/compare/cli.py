@@ -1,4 +1,5 @@
 import argparse
+import sys
 
 from .compare import compare
 
@@ -12,7 +13,21 @@ def main(args_):
     parser.add_argument('run2',
                         type=str,
                         help='Second benchmarking run.')
+    parser.add_argument('--alpha',
+                        type=float,
+                        default=0.05,
+                        help='Significance level of the rank-sum test for a regression.')
+    parser.add_argument('--threshold',
+                        type=float,
+                        default=0.05,
+                        help='Smallest relative slowdown of the median reported as a regression.')
+    parser.add_argument('--n-bootstrap',
+                        type=int,
+                        default=1000,
+                        help='Number of bootstrap samples for the confidence intervals.')
 
     args = parser.parse_args(args_)
 
-    compare(args.run1, args.run2)
+    regressions = compare(args.run1, args.run2, args.alpha, args.threshold, args.n_bootstrap)
+    if regressions:
+        sys.exit(1)
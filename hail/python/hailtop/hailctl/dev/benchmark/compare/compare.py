@@ -2,6 +2,7 @@ import json
 import os
 import sys
 
+from scipy.stats import mannwhitneyu
 from scipy.stats.mstats import gmean
 import numpy as np
 
@@ -27,7 +28,34 @@ def fmt_time(x, size):
     return f'{x:.3f}'.rjust(size)
 
 
-def compare(run1, run2):
+def bootstrap_ratio_ci(times1, times2, n_bootstrap=1000, confidence=0.95, seed=0):
+    """Bootstrap confidence interval of the ratio of the median of `times2`
+    to the median of `times1`."""
+    rng = np.random.RandomState(seed)
+    times1 = np.asarray(times1)
+    times2 = np.asarray(times2)
+    medians1 = np.median(rng.choice(times1, (n_bootstrap, len(times1))), axis=1)
+    medians2 = np.median(rng.choice(times2, (n_bootstrap, len(times2))), axis=1)
+    tail = (1 - confidence) / 2
+    return tuple(np.quantile(medians2 / medians1, [tail, 1 - tail]))
+
+
+def slower_p_value(times1, times2):
+    """One-sided Mann-Whitney U (rank-sum) test p-value of `times2` being
+    slower than `times1`."""
+    if len(set(times1) | set(times2)) == 1:
+        return 1.0
+    return mannwhitneyu(times1, times2, alternative='less').pvalue
+
+
+def is_regression(ratio, p_value, alpha, threshold):
+    return p_value <= alpha and ratio > 1 + threshold
+
+
+def compare(run1, run2, alpha=0.05, threshold=0.05, n_bootstrap=1000):
+    """Compare two benchmark runs and return the names of the benchmarks
+    with confirmed regressions: those more than `threshold` slower by the
+    ratio of medians whose rank-sum p-value is at most `alpha`."""
     data1 = load_file(run1)
     data2 = load_file(run2)
 
@@ -56,7 +84,9 @@ def compare(run1, run2):
             continue
         run1_med = d1['median']
         run2_med = d2['median']
-        comparison.append((name, run1_med, run2_med))
+        ci = bootstrap_ratio_ci(d1['times'], d2['times'], n_bootstrap)
+        p_value = slower_p_value(d1['times'], d2['times'])
+        comparison.append((name, run1_med, run2_med, ci, p_value))
 
     if failed_1:
         sys.stderr.write(f"Failed benchmarks in run 1:" + ''.join(f'\n    {t}' for t in failed_1) + '\n')
@@ -64,20 +94,29 @@ def compare(run1, run2):
         sys.stderr.write(f"Failed benchmarks in run 2:" + ''.join(f'\n    {t}' for t in failed_2) + '\n')
     comparison = sorted(comparison, key=lambda x: x[2] / x[1], reverse=True)
 
-    longest_name = max(len(name) for name, _, _ in comparison)
+    longest_name = max(len(name) for name, _, _, _, _ in comparison)
 
     comps = []
-
-    def format(name, ratio, t1, t2):
-        return f'{name:>{longest_name}}   {ratio:>8}   {t1:>7}   {t2:>7}'
-
-    print(format('Name', 'Ratio', 'Time 1', 'Time 2'))
-    print(format('----', '-----', '------', '------'))
-    for name, r1, r2 in comparison:
-        comps.append(r2 / r1)
-        print(format(name, fmt_diff(r2 / r1), fmt_time(r1, 7), fmt_time(r2, 7)))
+    regressions = []
+
+    def format(name, ratio, ci, p, t1, t2, flag):
+        return f'{name:>{longest_name}}   {ratio:>8}   {ci:>15}   {p:>6}   {t1:>7}   {t2:>7}   {flag}'
+
+    print(format('Name', 'Ratio', '95% CI', 'p', 'Time 1', 'Time 2', ''))
+    print(format('----', '-----', '------', '-', '------', '------', ''))
+    for name, r1, r2, (lo, hi), p_value in comparison:
+        ratio = r2 / r1
+        comps.append(ratio)
+        regression = is_regression(ratio, p_value, alpha, threshold)
+        if regression:
+            regressions.append(name)
+        print(format(name, fmt_diff(ratio), f'{fmt_diff(lo)}-{fmt_diff(hi)}', f'{p_value:.3f}',
+                     fmt_time(r1, 7), fmt_time(r2, 7), 'REGRESSION' if regression else ''))
 
     print('----------------------')
     print(f'Geometric mean: {fmt_diff(gmean(comps))}')
     print(f'Simple mean: {fmt_diff(np.mean(comps))}')
     print(f'Median:  {fmt_diff(np.median(comps))}')
+    if regressions:
+        print(f'Regressions (p <= {alpha}, slower by more than {fmt_diff(threshold)}): {len(regressions)}')
+    return regressions
@@ -0,0 +1,49 @@
+import argparse
+import sys
+
+from .history import add, report, default_history_dir
+
+
+def main(args_):
+    parser = argparse.ArgumentParser(
+        prog='hailctl dev benchmark history',
+        description='Record benchmark runs and report trends across them.')
+    parser.add_argument('--dir', '-d',
+                        type=str,
+                        default=default_history_dir(),
+                        help='History directory. Defaults to $HAIL_BENCHMARK_HISTORY_DIR or ~/.hail/benchmark-history.')
+    subparsers = parser.add_subparsers(dest='command')
+
+    add_parser = subparsers.add_parser('add', help='Add a JSON benchmark run to the history.')
+    add_parser.add_argument('run',
+                            type=str,
+                            help='Benchmarking run.')
+    add_parser.add_argument('--label', '-l',
+                            type=str,
+                            help='Label of the run, for example the commit. Defaults to the Hail version.')
+
+    report_parser = subparsers.add_parser('report', help='Report benchmark times across the runs in the history.')
+    report_parser.add_argument('--pattern', '-k', type=str, required=False,
+                               help='Only report benchmarks that substring match the pattern.')
+    report_parser.add_argument('--last', '-n',
+                               type=int,
+                               default=10,
+                               help='Number of most recent runs to report.')
+    report_parser.add_argument('--alpha',
+                               type=float,
+                               default=0.05,
+                               help='Significance level of the rank-sum test for a regression.')
+    report_parser.add_argument('--threshold',
+                               type=float,
+                               default=0.05,
+                               help='Smallest relative slowdown of the median reported as a regression.')
+
+    args = parser.parse_args(args_)
+
+    if args.command == 'add':
+        print(add(args.dir, args.run, args.label))
+    elif args.command == 'report':
+        report(args.dir, args.pattern, args.last, args.alpha, args.threshold)
+    else:
+        parser.print_help()
+        sys.exit(1)
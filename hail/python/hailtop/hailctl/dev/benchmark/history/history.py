@@ -0,0 +1,96 @@
+import datetime
+import json
+import os
+import re
+
+import numpy as np
+
+from ..compare.compare import load_file, fmt_diff, fmt_time, slower_p_value, is_regression
+
+
+def default_history_dir():
+    return os.environ.get('HAIL_BENCHMARK_HISTORY_DIR',
+                          os.path.expanduser('~/.hail/benchmark-history'))
+
+
+def add(history_dir, run, label=None):
+    """Add the benchmark run `run` to the history in `history_dir`.
+
+    Runs are never modified or replaced once added. Returns the path of the
+    new entry."""
+    with open(run, 'r') as f:
+        data = json.load(f)
+    config = data['config']
+    if label is None:
+        label = config.get('version', os.path.basename(run))
+    config['label'] = label
+
+    os.makedirs(history_dir, exist_ok=True)
+    timestamp = datetime.datetime.now().strftime('%Y%m%dT%H%M%S%f')
+    safe_label = re.sub(r'[^A-Za-z0-9_.-]', '_', label)
+    path = os.path.join(history_dir, f'{timestamp}-{safe_label}.json')
+    with open(path, 'x') as f:
+        json.dump(data, f)
+    return path
+
+
+def load_history(history_dir):
+    """Returns the (label, benchmarks) pairs of the runs in `history_dir`,
+    oldest first."""
+    if not os.path.isdir(history_dir):
+        return []
+    runs = []
+    for file in sorted(os.listdir(history_dir)):
+        if file.endswith('.json'):
+            path = os.path.join(history_dir, file)
+            with open(path, 'r') as f:
+                label = json.load(f)['config'].get('label', file)
+            runs.append((label, load_file(path)))
+    return runs
+
+
+def report(history_dir, pattern=None, last=10, alpha=0.05, threshold=0.05):
+    """Print the median time of each benchmark in the last `last` runs of
+    the history, and the change from the first to the last of them.
+
+    A ``*`` marks a run that is a confirmed regression from the run before
+    it, as in ``hailctl dev benchmark compare``."""
+    runs = load_history(history_dir)[-last:]
+    if not runs:
+        raise ValueError(f'no benchmark runs in {history_dir}')
+
+    regex = re.compile(pattern) if pattern else None
+    names = sorted({name
+                    for _, benchmarks in runs
+                    for name in benchmarks
+                    if regex is None or regex.search(name)})
+    if not names:
+        raise ValueError(f'pattern {pattern!r} matched no benchmarks')
+
+    longest_name = max(len(name) for name in names + ['Name'])
+    width = max(9, *(len(label) for label, _ in runs))
+
+    def format(name, cells, change):
+        return f'{name:>{longest_name}}   ' + '   '.join(f'{c:>{width}}' for c in cells) + f'   {change:>8}'
+
+    print(format('Name', [label for label, _ in runs], 'Change'))
+    print(format('----', ['-' * len(label) for label, _ in runs], '------'))
+    for name in names:
+        cells = []
+        medians = []
+        previous = None
+        for _, benchmarks in runs:
+            b = benchmarks.get(name)
+            if b is None or b.get('failed'):
+                cells.append('-' if b is None else 'failed')
+                continue
+            flag = ' '
+            if previous is not None:
+                ratio = b['median'] / previous['median']
+                if is_regression(ratio, slower_p_value(previous['times'], b['times']), alpha, threshold):
+                    flag = '*'
+            cells.append(fmt_time(b['median'], width - 1) + flag)
+            medians.append(b['median'])
+            previous = b
+        change = fmt_diff(medians[-1] / medians[0]) if len(medians) > 1 else ''
+        print(format(name, cells, change))
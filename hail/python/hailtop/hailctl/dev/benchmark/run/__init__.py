@@ -1,4 +1,6 @@
 from .utils import run_all, run_pattern, run_list, initialize
+# importing the benchmark modules registers their benchmarks
+from . import table_benchmarks, matrix_table_benchmarks, methods_benchmarks, ir_benchmarks  # noqa: F401
 
 __all__ = [
     'run_all',
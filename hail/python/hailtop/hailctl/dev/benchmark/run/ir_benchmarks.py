@@ -0,0 +1,48 @@
+import hail as hl
+from hail.expr.expressions import expr_int32
+from hail.typecheck import typecheck, nullable
+
+from .utils import benchmark
+
+
+@benchmark
+def ir_deep_annotate_construction():
+    ht = hl.utils.range_table(10)
+    for i in range(1_000):
+        ht = ht.annotate(**{f'x_{i}': ht.idx + i})
+
+
+@benchmark
+def ir_deep_annotate_render():
+    ht = hl.utils.range_table(10)
+    for i in range(250):
+        ht = ht.annotate(**{f'x_{i}': ht.idx + i})
+        str(ht._tir)
+
+
+@benchmark
+def ir_wide_annotate_render():
+    ht = hl.utils.range_table(10)
+    ht = ht.annotate(**{f'x_{i}': ht.idx * i for i in range(5_000)})
+    for _ in range(10):
+        str(ht._tir)
+
+
+@benchmark
+def ir_large_literal_render():
+    lit = hl.literal(list(range(1_000_000)))
+    ht = hl.utils.range_table(10)
+    for i in range(10):
+        ht = ht.annotate(**{f'x_{i}': lit[ht.idx]})
+        str(ht._tir)
+
+
+@benchmark
+def python_typecheck_call_overhead():
+    @typecheck(x=int, y=nullable(str), z=expr_int32)
+    def f(x, y=None, *, z=0):
+        pass
+
+    z = hl.int32(5)
+    for i in range(100_000):
+        f(i, 'a', z=z)
@@ -59,3 +59,23 @@ def concordance():
     _, r, c = hl.methods.qc.concordance(mt, mt, _localize_global_statistics=False)
     r._force_count()
     c._force_count()
+
+
+_rectangles_path = None
+
+
+def _binary_rectangles():
+    # written once per process, so later iterations time only the read
+    global _rectangles_path
+    if _rectangles_path is None:
+        bm = hl.linalg.BlockMatrix.random(4096, 4096, block_size=1024)
+        path = hl.utils.new_temp_file(suffix='rectangles')
+        rectangles = [[i, i + 1024, j, j + 1024] for i in range(0, 4096, 1024) for j in range(0, 4096, 1024)]
+        bm.export_rectangles(path, rectangles, binary=True)
+        _rectangles_path = path
+    return _rectangles_path
+
+
+@benchmark
+def block_matrix_rectangles_to_numpy():
+    hl.linalg.BlockMatrix.rectangles_to_numpy(_binary_rectangles(), binary=True)
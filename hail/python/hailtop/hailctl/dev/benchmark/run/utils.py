@@ -1,4 +1,5 @@
 import os
+import resource as _resource
 import sys
 import timeit
 import re
@@ -7,6 +8,7 @@ from urllib.request import urlretrieve
 import numpy as np
 
 import hail as hl
+from hail.utils.java import Env
 
 
 def resource(filename):
@@ -107,16 +109,121 @@ def initialize(args):
     hl.utils.range_table(1)._force_count()
 
 
+def _proc_status_kb(pid, field):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _reset_peak_rss(pid):
+    # writing 5 to clear_refs resets the peak resident set size (Linux only)
+    try:
+        with open(f'/proc/{pid}/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+class Profiler:
+    """Collects the per-stage timings of the queries a benchmark executes and
+    the memory, garbage collection and I/O of the Python and JVM processes
+    while it runs."""
+
+    def __init__(self):
+        self.stages = {}
+        self.n_queries = 0
+        self._backend = None
+
+    def _timed_execute(self, ir, timed=False, _lazy=False):
+        value, timings = type(self._backend).execute(self._backend, ir, timed=True, _lazy=_lazy)
+        self.n_queries += 1
+        for stage, timing in timings.items():
+            self.stages[stage] = self.stages.get(stage, 0) + timing['nano'] / 1e9
+        return (value, timings) if timed else value
+
+    @staticmethod
+    def _jvm_pid():
+        name = Env.jvm().java.lang.management.ManagementFactory.getRuntimeMXBean().getName()
+        return int(name.split('@')[0])
+
+    @staticmethod
+    def _gc():
+        beans = Env.jvm().java.lang.management.ManagementFactory.getGarbageCollectorMXBeans()
+        return (sum(max(bean.getCollectionTime(), 0) for bean in beans),
+                sum(max(bean.getCollectionCount(), 0) for bean in beans))
+
+    @staticmethod
+    def _io():
+        stats = Env.jvm().org.apache.hadoop.fs.FileSystem.getAllStatistics()
+        return (sum(s.getBytesRead() for s in stats),
+                sum(s.getBytesWritten() for s in stats))
+
+    def __enter__(self):
+        self._backend = Env.backend()
+        self._backend.execute = self._timed_execute
+
+        management = Env.jvm().java.lang.management.ManagementFactory
+        for pool in management.getMemoryPoolMXBeans():
+            pool.resetPeakUsage()
+        self.jvm_pid = self._jvm_pid()
+        _reset_peak_rss('self')
+        _reset_peak_rss(self.jvm_pid)
+        self._gc_start = self._gc()
+        self._io_start = self._io()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        del self._backend.execute
+        gc_end = self._gc()
+        io_end = self._io()
+
+        management = Env.jvm().java.lang.management.ManagementFactory
+        heap_pools = [pool for pool in management.getMemoryPoolMXBeans()
+                      if pool.getType().toString() == 'Heap memory']
+
+        python_peak_rss = _proc_status_kb('self', 'VmHWM')
+        if python_peak_rss is None:
+            # peak over the life of the process; in bytes on macOS
+            python_peak_rss = _resource.getrusage(_resource.RUSAGE_SELF).ru_maxrss
+            if sys.platform != 'darwin':
+                python_peak_rss *= 1024
+        else:
+            python_peak_rss *= 1024
+        jvm_peak_rss = _proc_status_kb(self.jvm_pid, 'VmHWM')
+
+        self.profile = {
+            'stages': self.stages,
+            'n_queries': self.n_queries,
+            'python_peak_rss': python_peak_rss,
+            'jvm_peak_rss': jvm_peak_rss * 1024 if jvm_peak_rss is not None else None,
+            'jvm_peak_heap': sum(pool.getPeakUsage().getUsed() for pool in heap_pools),
+            'gc_time': (gc_end[0] - self._gc_start[0]) / 1000,
+            'gc_count': gc_end[1] - self._gc_start[1],
+            'bytes_read': io_end[0] - self._io_start[0],
+            'bytes_written': io_end[1] - self._io_start[1]
+        }
+
+
 def _run(benchmark: Benchmark, config: RunConfig, context):
     if config.verbose:
         print(f'{context}Running {benchmark.name}...', file=sys.stderr)
     times = []
+    profiles = []
     for i in range(config.n_iter):
         try:
-            time = timeit.Timer(lambda: benchmark.run()).timeit(1)  # pylint: disable=unnecessary-lambda
+            with Profiler() as profiler:
+                time = timeit.Timer(lambda: benchmark.run()).timeit(1)  # pylint: disable=unnecessary-lambda
             times.append(time)
+            profiles.append(profiler.profile)
             if config.verbose:
                 print(f'    run {i + 1}: {time:.2f}', file=sys.stderr)
+                for stage, t in profiler.profile['stages'].items():
+                    print(f'        {stage}: {t:.2f}', file=sys.stderr)
         except Exception as e:  # pylint: disable=broad-except
             if config.verbose:
                 print(f'    run ${i + 1}: Caught exception: {e}')
@@ -128,7 +235,8 @@ def _run(benchmark: Benchmark, config: RunConfig, context):
                     'mean': np.mean(times),
                     'median': np.median(times),
                     'stdev': np.std(times),
-                    'times': times})
+                    'times': times,
+                    'profiles': profiles})
 
 
 def run_all(config: RunConfig):
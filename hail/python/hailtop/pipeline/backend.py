@@ -1,15 +1,120 @@
 import abc
+import hashlib
+import json
 import os
+import re
 import subprocess as sp
+import threading
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from shlex import quote as shq
 import aiohttp
 from hailtop.batch_client.client import BatchClient, Job
 
-from .resource import InputResourceFile, TaskResourceFile
+from .resource import ResourceFile, InputResourceFile, TaskResourceFile, ResourceGroup
 from .utils import PipelineException
 
 
+def _parse_cpu(cpu):
+    """Returns the number of cores of a task's CPU requirement, such as ``2``,
+    ``'0.5'`` or ``'500m'``."""
+    if cpu is None:
+        return 1
+    cpu = str(cpu)
+    if cpu.endswith('m'):
+        return float(cpu[:-1]) / 1000
+    return float(cpu)
+
+
+_memory_units = {'': 1, 'K': 1024 ** -2, 'M': 1024 ** -1, 'G': 1, 'T': 1024}
+
+
+def _parse_memory(memory):
+    """Returns the GB of a task's memory requirement, such as ``5``, ``'5'``,
+    ``'500M'`` or ``'5Gi'``."""
+    if memory is None:
+        return 0
+    match = re.fullmatch(r'\s*([0-9.]+)\s*([KMGT]?)i?B?\s*', str(memory))
+    if match is None:
+        raise PipelineException(f"invalid memory requirement '{memory}'")
+    value, unit = match.groups()
+    return float(value) * _memory_units[unit]
+
+
+def _resource_names(task):
+    """Returns a map from each resource file declared by `task` to a name that
+    does not change between runs of the pipeline."""
+    names = {}
+    for name, r in task._resources.items():
+        if isinstance(r, ResourceGroup):
+            for identifier, rf in r._resources.items():
+                names[rf] = f'{name}.{identifier}'
+        else:
+            names[r] = name
+    return names
+
+
+def _call_cache_keys(tasks, resource_map, input_hash):
+    """Returns a map from each task in `tasks`, which must be in topological
+    order, to the key of its results in a call cache.
+
+    The key is a hash of the task's image and command, where each resource in
+    the command is replaced by the hash of the input file it refers to or by
+    the key of the task that outputs it and its name in that task, and of the
+    keys of the tasks it depends on.
+    """
+    keys = {}
+    names = {}
+
+    def token(task, r):
+        if isinstance(r, ResourceGroup):
+            if r._source is None:
+                return 'inputs(' + ','.join(f'{identifier}={token(task, rf)}'
+                                            for identifier, rf in sorted(r._resources.items())) + ')'
+            source = 'self' if r._source is task else keys[r._source]
+            name = next(n for n, x in r._source._resources.items() if x is r)
+            return f'{source}:{name}'
+        if isinstance(r, InputResourceFile):
+            return 'input:' + input_hash(r._input_path)
+        assert isinstance(r, TaskResourceFile)
+        source = 'self' if r._source is task else keys[r._source]
+        return f'{source}:{names[r._source][r]}'
+
+    pattern = f"({ResourceFile._regex_pattern})|({ResourceGroup._regex_pattern})"
+    for task in tasks:
+        names[task] = _resource_names(task)
+        command = [re.sub(pattern, lambda m: token(task, resource_map[m.group()]), cmd)  # pylint: disable=W0640
+                   for cmd in task._command]
+        dependencies = sorted(keys[t] for t in task._dependencies)
+        key = json.dumps({'image': task._image, 'command': command, 'dependencies': dependencies})
+        keys[task] = hashlib.sha256(key.encode()).hexdigest()
+    return keys
+
+
+def _call_cache_outputs(task):
+    """Returns a map from name to the output files of `task` that must be
+    restored on a call cache hit."""
+    names = _resource_names(task)
+    return {names[r]: r for r in task._internal_outputs | task._external_outputs
+            if isinstance(r, TaskResourceFile)}
+
+
+# written to a call cache entry once all of the task's outputs are saved, so
+# tasks without output files have entries too
+_call_cache_marker = '_SUCCESS'
+
+
+def _gcs_hash(path):
+    """Returns the hashes GCS stores for the object at `path` or, if `path` is a
+    directory, a listing of its objects with their sizes and update times."""
+    try:
+        stat = sp.check_output(['gsutil', 'stat', path], universal_newlines=True)
+        return ','.join(line.strip() for line in stat.splitlines() if line.strip().startswith('Hash'))
+    except sp.CalledProcessError:
+        return sp.check_output(['gsutil', 'ls', '-l', '-r', path], universal_newlines=True)
+
+
 class Backend:
     @abc.abstractmethod
     def _run(self, pipeline, dry_run, verbose, delete_scratch_on_exit):
@@ -20,6 +125,18 @@ class LocalBackend(Backend):
     """
     Backend that executes pipelines on a local computer.
 
+    Tasks run as soon as the tasks they depend on have succeeded, concurrently
+    as long as the sum of their CPU and memory requirements fits within
+    `max_cpu` and `max_memory`. Tasks without a CPU requirement are counted as
+    using one core. A failed task does not stop tasks that do not depend on it.
+
+    If `call_cache_dir` is set, the outputs of each task that succeeds are
+    saved there, keyed on the task's image, its command and the contents of
+    the files it reads. A task whose key is already in the cache is not run;
+    its outputs are copied from the cache instead. Tasks are assumed to be
+    deterministic: outputs that should be recomputed require a change to the
+    command or `call_cache_dir`.
+
     Examples
     --------
 
@@ -38,10 +155,21 @@ class LocalBackend(Backend):
         Additional flags to pass to `docker run`. Only used if a task specifies
         a docker image. This option will override the value set by the environment
         variable `HAIL_PIPELINE_EXTRA_DOCKER_RUN_FLAGS`.
+    max_cpu: :obj:`float`, optional
+        Number of cores running tasks may use in total. Defaults to the number
+        of cores of this computer.
+    max_memory: :obj:`float`, optional
+        Memory in GB running tasks may use in total. Defaults to the memory of
+        this computer.
+    call_cache_dir: :obj:`str`, optional
+        Local directory in which to cache task outputs. No outputs are cached
+        if not set.
     """
 
-    def __init__(self, tmp_dir='/tmp/', gsa_key_file=None, extra_docker_run_flags=None):
+    def __init__(self, tmp_dir='/tmp/', gsa_key_file=None, extra_docker_run_flags=None,
+                 max_cpu=None, max_memory=None, call_cache_dir=None):
         self._tmp_dir = tmp_dir
+        self._call_cache_dir = os.path.abspath(call_cache_dir) if call_cache_dir is not None else None
 
         flags = ''
 
@@ -57,15 +185,24 @@ class LocalBackend(Backend):
 
         self._extra_docker_run_flags = flags
 
+        if max_cpu is None:
+            max_cpu = os.cpu_count() or 1
+        if max_memory is None:
+            max_memory = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') / 1024 ** 3
+        self._max_cpu = max_cpu
+        self._max_memory = max_memory
+
+        self._input_hashes = None
+
     def _run(self, pipeline, dry_run, verbose, delete_scratch_on_exit):  # pylint: disable=R0915
         tmpdir = self._get_scratch_dir()
 
-        script = ['#!/bin/bash',
-                  'set -e' + 'x' if verbose else '',
-                  '\n',
-                  '# change cd to tmp directory',
-                  f"cd {tmpdir}",
-                  '\n']
+        preamble = ['#!/bin/bash',
+                    'set -e' + ('x' if verbose else ''),
+                    '\n',
+                    '# change cd to tmp directory',
+                    f"cd {tmpdir}",
+                    '\n']
 
         copied_input_resource_files = set()
         os.makedirs(tmpdir + 'inputs/', exist_ok=True)
@@ -106,18 +243,42 @@ class LocalBackend(Backend):
             return [f'{_cp(dest)} {r._get_path(tmpdir)} {shq(dest)}'
                     for dest in r._output_paths]
 
+        # input files are copied before any task runs, so tasks sharing an
+        # input can run concurrently
+        setup = []
         write_inputs = [x for r in pipeline._input_resources for x in copy_external_output(r)]
         if write_inputs:
-            script += ["# Write input resources to output destinations"]
-            script += write_inputs
-            script += ['\n']
+            setup += ["# Write input resources to output destinations"]
+            setup += write_inputs
+            setup += ['\n']
 
+        cache_keys = {}
+        if self._call_cache_dir is not None:
+            os.makedirs(self._call_cache_dir, exist_ok=True)
+            cache_keys = _call_cache_keys(pipeline._tasks, pipeline._resource_map, self._input_hash)
+            self._save_input_hashes()
+
+        task_scripts = {}
         for task in pipeline._tasks:
             os.makedirs(tmpdir + task._uid + '/', exist_ok=True)
 
-            script.append(f"# {task._uid} {task.name if task.name else ''}")
+            setup += [x for r in task._inputs for x in copy_input(task, r)]
+
+            script = [f"# {task._uid} {task.name if task.name else ''}"]
 
-            script += [x for r in task._inputs for x in copy_input(task, r)]
+            if task in cache_keys:
+                cache_dir = f'{self._call_cache_dir}/{cache_keys[task]}'
+                outputs = _call_cache_outputs(task)
+                if os.path.exists(f'{cache_dir}/{_call_cache_marker}'):
+                    if verbose:
+                        print(f'Restoring outputs of task {task._uid} from {cache_dir}')
+                    script += ['# restore outputs from the call cache']
+                    script += [f'cp -R {shq(cache_dir + "/" + name)} {r._get_path(tmpdir)}'
+                               for name, r in outputs.items()]
+                    script += [x for r in task._external_outputs for x in copy_external_output(r)]
+                    script += ['\n']
+                    task_scripts[task] = script
+                    continue
 
             resource_defs = [r._declare(tmpdir) for r in task._mentioned]
 
@@ -140,25 +301,166 @@ class LocalBackend(Backend):
                 script += resource_defs
                 script += task._command
 
+            if task in cache_keys:
+                cache_dir = f'{self._call_cache_dir}/{cache_keys[task]}'
+                # outputs are gathered in a temporary directory that is moved
+                # into place, so a cache entry is either complete or absent
+                script += ['# save outputs to the call cache',
+                           f'__CACHE_TMP__=$(mktemp -d {shq(self._call_cache_dir)}/.tmp-XXXXXXXX)']
+                script += [f'if [ -e {r._get_path(tmpdir)} ]; then '
+                           f'cp -R {r._get_path(tmpdir)} "$__CACHE_TMP__"/{shq(name)}; fi'
+                           for r, name in _resource_names(task).items()]
+                script += [f'touch "$__CACHE_TMP__"/{_call_cache_marker}',
+                           f'if [ -e {shq(cache_dir)} ]; then rm -rf "$__CACHE_TMP__"; '
+                           f'else mv "$__CACHE_TMP__" {shq(cache_dir)}; fi']
+
             script += [x for r in task._external_outputs for x in copy_external_output(r)]
             script += ['\n']
+            task_scripts[task] = script
+
+        setup_script = "\n".join(preamble + setup)
+        task_scripts = {task: "\n".join(preamble + script) for task, script in task_scripts.items()}
 
-        script = "\n".join(script)
         if dry_run:
-            print(script)
-        else:
+            print(setup_script)
+            for task in pipeline._tasks:
+                print(task_scripts[task])
+            return
+
+        try:
             try:
-                sp.check_output(script, shell=True)
+                sp.check_output(setup_script, shell=True)
             except sp.CalledProcessError as e:
                 print(e)
                 print(e.output)
                 raise
-            finally:
-                if delete_scratch_on_exit:
-                    sp.run(f'rm -rf {tmpdir}', shell=True)
+
+            self._run_tasks(pipeline._tasks, task_scripts, tmpdir, verbose)
+        finally:
+            if delete_scratch_on_exit:
+                sp.run(f'rm -rf {tmpdir}', shell=True)
 
         print('Pipeline completed successfully!')
 
+    def _run_tasks(self, tasks, task_scripts, tmpdir, verbose):
+        """Runs `tasks`, in topological order, as their dependencies succeed and
+        their requirements fit in the CPU and memory budget."""
+        print_lock = threading.Lock()
+
+        def label(task):
+            return f'{task._uid} ({task.name})' if task.name else task._uid
+
+        def run_task(task):
+            start = time.time()
+            output = []
+            with open(f'{tmpdir}{task._uid}/log', 'w') as log:
+                proc = sp.Popen(task_scripts[task], shell=True, stdout=sp.PIPE, stderr=sp.STDOUT,
+                                universal_newlines=True)
+                for line in proc.stdout:
+                    log.write(line)
+                    output.append(line)
+                    if verbose:
+                        with print_lock:
+                            print(f'[{label(task)}] {line}', end='')
+                returncode = proc.wait()
+            return returncode, ''.join(output), time.time() - start
+
+        waiting = list(tasks)
+        state = {}
+        running = {}
+        used_cpu = 0
+        used_memory = 0
+        failures = []
+
+        with ThreadPoolExecutor(max_workers=max(1, len(tasks))) as executor:
+            while waiting or running:
+                still_waiting = []
+                for task in waiting:
+                    dependency_states = [state.get(t) for t in task._dependencies]
+                    if any(s in ('failed', 'cancelled') for s in dependency_states):
+                        state[task] = 'cancelled'
+                        print(f'Task {label(task)} cancelled: a dependency did not succeed')
+                        continue
+
+                    cpu = _parse_cpu(task._cpu)
+                    memory = _parse_memory(task._memory)
+                    # a task requiring more than the budget runs alone
+                    fits = (used_cpu + cpu <= self._max_cpu and used_memory + memory <= self._max_memory) \
+                        or not running
+                    if all(s == 'succeeded' for s in dependency_states) and fits:
+                        running[executor.submit(run_task, task)] = (task, cpu, memory)
+                        used_cpu += cpu
+                        used_memory += memory
+                    else:
+                        still_waiting.append(task)
+                waiting = still_waiting
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task, cpu, memory = running.pop(future)
+                    used_cpu -= cpu
+                    used_memory -= memory
+                    returncode, output, elapsed = future.result()
+                    if returncode == 0:
+                        state[task] = 'succeeded'
+                        print(f'Task {label(task)} succeeded in {elapsed:.2f}s')
+                    else:
+                        state[task] = 'failed'
+                        failures.append(sp.CalledProcessError(returncode, task_scripts[task], output))
+                        print(f'Task {label(task)} failed with exit code {returncode} in {elapsed:.2f}s:')
+                        print(output)
+
+        if failures:
+            raise failures[0]
+
+    def _input_hash(self, path):
+        """Returns a hash of the contents of the input file or directory at
+        `path`.
+
+        Hashes of local files are kept in the call cache, keyed on their path,
+        size and modification time, so unchanged files are not read again.
+        """
+        if path.startswith('gs://'):
+            return hashlib.sha256(_gcs_hash(path).encode()).hexdigest()
+
+        path = os.path.realpath(path)
+        if os.path.isdir(path):
+            listing = [(os.path.relpath(os.path.join(root, file), path),
+                        self._input_hash(os.path.join(root, file)))
+                       for root, _, files in os.walk(path) for file in files]
+            return hashlib.sha256(json.dumps(sorted(listing)).encode()).hexdigest()
+
+        stat = os.stat(path)
+        if self._input_hashes is None:
+            try:
+                with open(f'{self._call_cache_dir}/.input-hashes.json') as f:
+                    self._input_hashes = json.load(f)
+            except (OSError, ValueError):
+                self._input_hashes = {}
+        entry = self._input_hashes.get(path)
+        if entry is not None and entry[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return entry[2]
+
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                sha.update(block)
+        digest = sha.hexdigest()
+        self._input_hashes[path] = [stat.st_size, stat.st_mtime_ns, digest]
+        return digest
+
+    def _save_input_hashes(self):
+        if self._input_hashes is None:
+            return
+        index_path = f'{self._call_cache_dir}/.input-hashes.json'
+        tmp_path = f'{index_path}.{uuid.uuid4().hex[:8]}'
+        with open(tmp_path, 'w') as f:
+            json.dump(self._input_hashes, f)
+        os.replace(tmp_path, index_path)
+
     def _get_scratch_dir(self):
         def _get_random_name():
             directory = self._tmp_dir + '/pipeline-{}/'.format(uuid.uuid4().hex[:12])
@@ -185,9 +487,15 @@ class BatchBackend(Backend):
     ----------
     url: :obj:`str`
         URL to batch server.
+    call_cache_dir: :obj:`str`, optional
+        Google Storage path, such as `gs://my-bucket/pipeline-cache`, in which
+        to cache task outputs. Tasks whose image, command and input files are
+        unchanged since they last succeeded copy their outputs from the cache
+        instead of running their command. No outputs are cached if not set.
     """
 
-    def __init__(self, url):
+    def __init__(self, url, call_cache_dir=None):
+        self._call_cache_dir = call_cache_dir.rstrip('/') if call_cache_dir is not None else None
         session = aiohttp.ClientSession(
             raise_for_status=True,
             timeout=aiohttp.ClientTimeout(total=60))
@@ -256,6 +564,19 @@ class BatchBackend(Backend):
                 jobs_to_command[j] = write_cmd
                 n_jobs_submitted += 1
 
+        cache_keys = {}
+        cached = {}
+        if self._call_cache_dir is not None:
+            input_hashes = {}
+
+            def input_hash(path):
+                if path not in input_hashes:
+                    input_hashes[path] = hashlib.sha256(_gcs_hash(path).encode()).hexdigest()
+                return input_hashes[path]
+
+            cache_keys = _call_cache_keys(pipeline._tasks, pipeline._resource_map, input_hash)
+            cached = self._cached_outputs(set(cache_keys.values()))
+
         for task in pipeline._tasks:
             inputs = [x for r in task._inputs for x in copy_input(r)]
 
@@ -264,15 +585,38 @@ class BatchBackend(Backend):
                 used_remote_tmpdir = True
             outputs += [x for r in task._external_outputs for x in copy_external_output(r)]
 
+            task_command = [cmd.strip() for cmd in task._command]
+            image = task._image
+
+            if task in cache_keys:
+                cache_dir = f'{self._call_cache_dir}/{cache_keys[task]}'
+                cache_outputs = _call_cache_outputs(task)
+                if _call_cache_marker in cached.get(cache_keys[task], ()):
+                    if verbose:
+                        print(f'Restoring outputs of task {task._uid} from {cache_dir}')
+                    # the cached outputs are copied in as the job's inputs and
+                    # then out like the outputs of the task's command
+                    inputs = [(f'{cache_dir}/{name}', r._get_path(local_tmpdir))
+                              for name, r in cache_outputs.items()]
+                    task_command = ['true']
+                    image = default_image
+                else:
+                    # the marker is created once the command succeeds and
+                    # copied last, after the outputs
+                    marker = f'{local_tmpdir}/{task._uid}/{_call_cache_marker}'
+                    task_command = task_command + [f'touch {shq(marker)}']
+                    outputs += [(r._get_path(local_tmpdir), f'{cache_dir}/{name}')
+                                for name, r in cache_outputs.items()]
+                    outputs += [(marker, f'{cache_dir}/{_call_cache_marker}')]
+
             resource_defs = [r._declare(directory=local_tmpdir) for r in task._mentioned]
 
-            if task._image is None:
+            if image is None:
                 if verbose:
                     print(f"Using image '{default_image}' since no image was specified.")
 
             make_local_tmpdir = f'mkdir -p {local_tmpdir}/{task._uid}/; '
             defs = '; '.join(resource_defs) + '; ' if resource_defs else ''
-            task_command = [cmd.strip() for cmd in task._command]
 
             cmd = bash_flags + make_local_tmpdir + defs + " && ".join(task_command)
             if dry_run:
@@ -292,7 +636,7 @@ class BatchBackend(Backend):
             if task._memory:
                 resources['requests']['memory'] = task._memory
 
-            j = batch.create_job(image=task._image if task._image else default_image,
+            j = batch.create_job(image=image if image else default_image,
                                  command=['/bin/bash', '-c', cmd],
                                  parents=parents,
                                  attributes=attributes,
@@ -352,3 +696,24 @@ class BatchBackend(Backend):
                 f"  Log:\t{log}\n")
 
         raise PipelineException(fail_msg)
+
+    def _cached_outputs(self, keys):
+        """Returns a map from each of `keys` with an entry in the call cache to
+        the names of the outputs in the entry."""
+        if not keys:
+            return {}
+        urls = [f'{self._call_cache_dir}/{key}/' for key in sorted(keys)]
+        # gsutil exits with an error if any of the entries does not exist but
+        # still lists the others
+        listing = sp.run(['gsutil', 'ls'] + urls, stdout=sp.PIPE, stderr=sp.DEVNULL,
+                         universal_newlines=True).stdout
+        cached = {}
+        prefix = self._call_cache_dir + '/'
+        for line in listing.splitlines():
+            # with several urls, gsutil heads each listing with 'url:'
+            if line.startswith(prefix) and not line.endswith(':'):
+                key, _, name = line[len(prefix):].partition('/')
+                name = name.rstrip('/')
+                if name:
+                    cached.setdefault(key, set()).add(name)
+        return cached
@@ -332,3 +332,38 @@ class Tests(unittest.TestCase):
             a = arrs[i]
             a2 = np.loadtxt(f'{prefix}/files/{i}.tsv')
             self.assertTrue(np.array_equal(a, a2))
+
+    def test_decode_unblocked_uncompressed(self):
+        values = [
+            hl.literal(5),
+            hl.literal(hl.null(hl.tint64)),
+            hl.literal([1.5, None, -2.0]),
+            hl.literal({'a': [1, 2], 'b': None}),
+            hl.literal({hl.Struct(x='foo', y=True), hl.Struct(x=None, y=False)}),
+            hl.locus('1', 100),
+            hl.call(0, 1, phased=True),
+            hl.interval(1, 5, includes_end=True),
+            hl.tuple([hl.null(hl.tstr), 'bar', 3.25]),
+        ]
+        for v in values:
+            ptype, bytes = hl.experimental.encode(v, 'unblockedUncompressed')
+            self.assertEqual(hl.experimental.decode(v.dtype, ptype, bytes, 'unblockedUncompressed'),
+                             hl.eval(v))
+
+    def test_densify_intervals(self):
+        # each sample has a reference block starting every 25 rows and
+        # lasting 30 bases, some reaching across a window boundary
+        mt = hl.utils.range_matrix_table(200, 3)
+        mt = mt.key_rows_by(locus=hl.locus('1', mt.row_idx * 10 + 1)).key_cols_by(s=hl.str(mt.col_idx))
+        mt = mt.select_entries(
+            END=hl.or_missing((mt.row_idx + 5 * mt.col_idx) % 25 == 0, mt.locus.position + 300),
+            x=mt.row_idx)
+        mt = mt.select_entries(mt.END, x=hl.or_missing(hl.is_defined(mt.END) | (mt.row_idx % 7 == 0), mt.x))
+        mt = mt.filter_entries(hl.is_defined(mt.x))
+
+        index = hl.experimental.compute_reference_block_index(mt, window_size=100)
+        intervals = [hl.parse_locus_interval('1:1001-1100'), hl.parse_locus_interval('1:1751-1800')]
+        expected = hl.filter_intervals(hl.experimental.densify(mt), intervals)
+        for idx in [index, None]:
+            actual = hl.experimental.densify(mt, intervals, idx)
+            assert actual.entries().collect() == expected.entries().collect()
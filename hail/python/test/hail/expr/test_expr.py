@@ -2773,6 +2773,12 @@ class Tests(unittest.TestCase):
         self.assertEqual(hl.eval(hl.literal(hl.set(['A','B']))), {'A', 'B'})
         self.assertEqual(hl.eval(hl.literal({hl.str('A'), hl.str('B')})), {'A', 'B'})
 
+    def test_large_literal(self):
+        d = {f'gene{i}': (i / 2 if i % 7 else None) for i in range(20_000)}
+        s = hl.struct(x=hl.literal(d), y=hl.literal(dict(d)))
+        self.assertEqual(hl.eval(hl.tuple([s.x['gene3'], s.x['gene7'], s.y.size(), s.x == s.y])),
+                         (1.5, None, 20_000, True))
+
     def test_format(self):
         self.assertEqual(hl.eval(hl.format("%.4f %s %.3e", 0.25, 'hello', 0.114)), '0.2500 hello 1.140e-01')
         self.assertEqual(hl.eval(hl.format("%.4f %d", hl.null(hl.tint32), hl.null(hl.tint32))), 'null null')
@@ -1,7 +1,7 @@
 import unittest
 
 from hail.linalg import BlockMatrix
-from hail.utils import new_temp_file, new_local_temp_dir, local_path_uri, FatalError
+from hail.utils import new_temp_file, new_local_temp_dir, new_local_temp_file, local_path_uri, FatalError
 from ..helpers import *
 import numpy as np
 import tempfile
@@ -162,6 +162,27 @@ class Tests(unittest.TestCase):
 
         self._assert_eq(bm.to_numpy(_force_blocking=True), a)
 
+    def test_from_and_to_numpy_memmap(self):
+        a = np.arange(0, 60, dtype=np.int64).reshape(6, 10)
+
+        mm = np.memmap(new_local_temp_file(), dtype=np.float64, mode='w+', shape=a.shape)
+        mm[:] = a
+        self._assert_eq(BlockMatrix.from_numpy(mm, block_size=4), a)
+        self._assert_eq(BlockMatrix.from_numpy(mm[:, ::3], block_size=4), a[:, ::3])
+        self._assert_eq(BlockMatrix.from_numpy(a.T, block_size=4), a.T)
+
+        # the block matrix is a snapshot of the memmap
+        snapshot = BlockMatrix.from_numpy(mm, block_size=4)
+        mm[:] = 0
+        mm.flush()
+        self._assert_eq(snapshot, a)
+
+        bm = BlockMatrix.from_numpy(a, block_size=4)
+        for force_blocking in [False, True]:
+            actual = bm.to_numpy(_force_blocking=force_blocking, _memmap_path=new_local_temp_file())
+            self.assertIsInstance(actual, np.memmap)
+            self._assert_eq(actual, a)
+
     def test_to_table(self):
         schema = hl.tstruct(row_idx=hl.tint64, entries=hl.tarray(hl.tfloat64))
         rows = [{'row_idx': 0, 'entries': [0.0, 1.0]},
@@ -742,6 +763,19 @@ class Tests(unittest.TestCase):
 
         self._assert_eq(nd, actual)
 
+    def test_export_blocks_to_memmap(self):
+        nd = np.arange(0, 80, dtype=float).reshape(8, 10)
+        bm = BlockMatrix.from_numpy(nd, block_size=3)
+
+        bm_path = new_local_temp_dir()
+        bm_uri = local_path_uri(bm_path)
+        bm.export_blocks(bm_uri, binary=True)
+        actual = BlockMatrix.rectangles_to_numpy(bm_path, binary=True, _n_threads=4,
+                                                 _memmap_path=new_local_temp_file())
+
+        self.assertIsInstance(actual, np.memmap)
+        self._assert_eq(nd, actual)
+
     def test_rectangles_to_numpy(self):
         nd = np.array([[1.0, 2.0, 3.0],
                        [4.0, 5.0, 6.0],
@@ -381,6 +381,41 @@ class VCFTests(unittest.TestCase):
         self.assertEqual(len(parts), comb.n_partitions())
         comb._force_count_rows()
 
+    @skip_unless_spark_backend()
+    def test_run_combiner(self):
+        from hail.experimental.vcf_combiner import run_combiner
+        paths = [resource(p) for p in ['gvcfs/HG00096.g.vcf.gz', 'gvcfs/HG00268.g.vcf.gz',
+                                       'gvcfs/HG00096.g.vcf.gz']]
+        intervals = [hl.parse_locus_interval('[chr20:17821257-21144633]', reference_genome='GRCh38')]
+        out_file = new_temp_file(suffix='mt')
+        tmp_path = new_temp_file()
+
+        # with a branch factor of 2, the three gVCFs are combined in two tiers
+        run_combiner(paths, out_file, tmp_path, intervals, branch_factor=2, n_partitions=3,
+                     reference_genome='GRCh38')
+        comb = hl.read_matrix_table(out_file)
+        self.assertEqual(comb.n_partitions(), 3)
+        self.assertEqual(comb.s.collect(), ['HG00096', 'HG00268', 'HG00096'])
+        n_rows = comb.count_rows()
+        self.assertTrue(n_rows > 0)
+        self.assertTrue(hl.hadoop_exists(f'{tmp_path}/tier-0/1.mt/_SUCCESS'))
+
+        # rerunning skips the written first tier and gives the same result
+        run_combiner(paths, out_file, tmp_path, intervals, branch_factor=2, n_partitions=3,
+                     reference_genome='GRCh38', overwrite=True)
+        self.assertEqual(hl.read_matrix_table(out_file).count_rows(), n_rows)
+
+    def test_combiner_partition_intervals(self):
+        from hail.experimental.vcf_combiner import partition_intervals
+        intervals = [hl.parse_locus_interval('[chr20:1001-2000]', reference_genome='GRCh38'),
+                     hl.parse_locus_interval('[chr1:1-1000]', reference_genome='GRCh38'),
+                     hl.parse_locus_interval('[chr20:1501-3000]', reference_genome='GRCh38')]
+        partitions = partition_intervals(intervals, n_partitions=3)
+        self.assertEqual([(p.start.locus.contig, p.start.locus.position, p.end.locus.position) for p in partitions],
+                         [('chr1', 1, 1000), ('chr20', 1001, 2000), ('chr20', 2001, 3000)])
+        assert all(p.includes_start and p.includes_end for p in partitions)
+        self.assertEqual(len(partition_intervals(intervals)), 2)
+
 
 class PLINKTests(unittest.TestCase):
     def test_import_fam(self):
@@ -182,3 +182,40 @@ class Tests(unittest.TestCase):
 
         assert mt.aggregate_cols(hl.agg.all(hl.approx_equal(mt.sample_qc.call_rate, mt.sample_qc.n_called / n_rows)))
         assert mt.aggregate_rows(hl.agg.all(hl.approx_equal(mt.variant_qc.call_rate, mt.variant_qc.n_called / n_cols)))
+
+    def test_vep_cache(self):
+        from hail.methods.qc import _cached_annotations, _compact_annotation_cache
+
+        config = hl.utils.new_local_temp_file()
+        with open(config, 'w') as f:
+            f.write('{}')
+        cache = hl.utils.new_temp_file()
+
+        n_annotated = []
+
+        def annotate(ht):
+            n_annotated.append(ht.count())
+            return ht.annotate(vep=hl.str(ht.locus.position))
+
+        ht = hl.balding_nichols_model(1, 1, 20).rows().select()
+        expected = ht.annotate(vep=hl.str(ht.locus.position))
+
+        annotations = _cached_annotations(ht.head(10), 'VEP', config, {}, annotate, cache)
+        assert annotations.collect() == expected.head(10).collect()
+        annotations = _cached_annotations(ht, 'VEP', config, {}, annotate, cache)
+        assert annotations.collect() == expected.collect()
+        assert n_annotated == [10, 10]
+
+        annotations = _cached_annotations(ht, 'VEP', config, {'csq': True}, annotate, cache)
+        assert annotations.collect() == expected.collect()
+        assert n_annotated == [10, 10, 20]
+
+        config_dirs = [f['path'] for f in hl.hadoop_ls(cache)]
+        assert len(config_dirs) == 2
+        assert sorted(len(hl.hadoop_ls(d)) for d in config_dirs) == [1, 2]
+
+        _compact_annotation_cache(cache)
+        annotations = _cached_annotations(ht, 'VEP', config, {}, annotate, cache)
+        assert annotations.collect() == expected.collect()
+        assert n_annotated == [10, 10, 20]
+        assert [len(hl.hadoop_ls(d)) for d in config_dirs if len(hl.hadoop_ls(d)) > 1] == [3]
@@ -1158,6 +1158,17 @@ class Tests(unittest.TestCase):
         _, _, loadings = hl.hwe_normalized_pca(mt.GT, k=2, compute_loadings=False)
         self.assertEqual(loadings, None)
 
+    def test_pc_project(self):
+        mt = hl.balding_nichols_model(3, 100, 50)
+        mt = mt.annotate_entries(GT=hl.or_missing(hl.rand_bool(0.9), mt.GT)).cache()
+        _, scores, loadings = hl.hwe_normalized_pca(mt.GT, k=3, compute_loadings=True)
+        mt = mt.annotate_rows(af=hl.agg.mean(mt.GT.n_alt_alleles()) / 2)
+        loadings = loadings.annotate(af=mt.rows()[loadings.key].af)
+
+        projected = hl.pc_project(mt.GT, loadings.loadings, loadings.af)
+        self.assertEqual(list(projected.row), ['sample_idx', 'scores'])
+        np.testing.assert_allclose(projected.scores.collect(), scores.scores.collect(), atol=1e-6)
+
     def test_pca_against_numpy(self):
         mt = hl.import_vcf(resource('tiny_m.vcf'))
         mt = mt.filter_rows(hl.len(mt.alleles) == 2)
@@ -1206,6 +1217,25 @@ class Tests(unittest.TestCase):
         check(hail_scores, np_scores)
         check(hail_loadings, np_loadings)
 
+    def test_pca_randomized(self):
+        mt = hl.balding_nichols_model(3, 50, 100)
+        mt = mt.annotate_rows(mean=hl.agg.mean(mt.GT.n_alt_alleles()))
+        x = mt.GT.n_alt_alleles() - mt.mean
+
+        eigen, scores, loadings = hl.pca(x, k=3, compute_loadings=True)
+        r_eigen, r_scores, r_loadings = hl.pca(x, k=3, compute_loadings=True,
+                                               method='randomized', n_iterations=5, block_size=16)
+
+        np.testing.assert_allclose(r_eigen, eigen, rtol=1e-6)
+        self.assertEqual(r_scores.count(), 50)
+        self.assertEqual(r_loadings.count(), 100)
+        np.testing.assert_allclose(np.abs(r_scores.scores.collect()), np.abs(scores.scores.collect()), atol=1e-6)
+        np.testing.assert_allclose(np.abs(r_loadings.loadings.collect()), np.abs(loadings.loadings.collect()),
+                                   atol=1e-6)
+
+        _, _, r_loadings = hl.hwe_normalized_pca(mt.GT, k=2, method='randomized')
+        self.assertEqual(r_loadings, None)
+
     @skip_unless_spark_backend()
     def test_pc_relate_against_R_truth(self):
         mt = hl.import_vcf(resource('pc_relate_bn_input.vcf.bgz'))
@@ -97,6 +97,11 @@ class Tests(unittest.TestCase):
         assert np.allclose(res['beta'], beta_fastlmm)
         assert np.allclose(res['p_value'], pval_hail)
 
+        res = model.fit_alternatives_numpy(pa, return_pandas=True, block_size=2, n_threads=2)
+
+        assert np.allclose(res['beta'], beta_fastlmm)
+        assert np.allclose(res['p_value'], pval_hail)
+
         pa_t_path = utils.new_temp_file(suffix='bm')
         BlockMatrix.from_numpy(pa.T).write(pa_t_path, force_row_major=True)
 
@@ -128,6 +133,11 @@ class Tests(unittest.TestCase):
         assert np.allclose(res['beta'], beta_fastlmm)
         assert np.allclose(res['p_value'], pval_hail)
 
+        res = model.fit_alternatives_numpy(pa, a, return_pandas=True, block_size=2, n_threads=2)
+
+        assert np.allclose(res['beta'], beta_fastlmm)
+        assert np.allclose(res['p_value'], pval_hail)
+
         a_t_path = utils.new_temp_file(suffix='bm')
         BlockMatrix.from_numpy(a.T).write(a_t_path, force_row_major=True)
 
@@ -265,6 +275,31 @@ class Tests(unittest.TestCase):
         self.assertAlmostEqual(stats.beta, beta1[0])
         self.assertAlmostEqual(stats.chi_sq, chi_sq)
 
+    def test_linear_mixed_model_collinear_alternative(self):
+        y = np.array([0.0, 1.0, 8.0, 9.0])
+        x = np.array([[1.0, 0.0],
+                      [1.0, 2.0],
+                      [1.0, 1.0],
+                      [1.0, 4.0]])
+        z = np.array([[0.0, 0.0, 1.0],
+                      [0.0, 1.0, 2.0],
+                      [1.0, 2.0, 4.0],
+                      [2.0, 4.0, 8.0]])
+        # the first alternative is a combination of the covariates
+        a = np.stack([3 * x[:, 0] + 0.7 * x[:, 1], [1.0, 0.0, 1.0, 0.0]], axis=1)
+
+        model, p = LinearMixedModel.from_kinship(y, x, z @ z.T)
+        model.fit(np.log(2.0))
+        res = model.fit_alternatives_numpy(p @ a, return_pandas=True)
+        self.assertTrue(res.loc[0, ['beta', 'sigma_sq', 'chi_sq', 'p_value']].isna().all())
+        self.assertFalse(res.loc[1, ['beta', 'sigma_sq', 'chi_sq', 'p_value']].isna().any())
+
+        model, p = LinearMixedModel.from_random_effects(y, x, z)
+        model.fit(np.log(2.0))
+        res = model.fit_alternatives_numpy(p @ a, a, return_pandas=True)
+        self.assertTrue(res.loc[0, ['beta', 'sigma_sq', 'chi_sq', 'p_value']].isna().all())
+        self.assertFalse(res.loc[1, ['beta', 'sigma_sq', 'chi_sq', 'p_value']].isna().any())
+
     @skip_unless_spark_backend()
     def test_linear_mixed_model_function(self):
         n, f, m = 4, 2, 3
@@ -1,5 +1,6 @@
 import unittest
 
+import numpy as np
 import pandas as pd
 import pyspark.sql
 import pytest
@@ -1012,6 +1013,37 @@ class Tests(unittest.TestCase):
         ht = hl.utils.range_table(10)
         assert hl.eval(ht.collect(_localize=False)) == ht.collect()
 
+    def test_collect_lazy(self):
+        ht = hl.utils.range_table(10)
+        ht = ht.annotate(x=hl.or_missing(ht.idx % 3 != 0, hl.str(ht.idx)))
+        rows = ht.collect(_lazy=True)
+        assert len(rows) == 10
+        assert rows == ht.collect()
+        assert rows[-1] == ht.collect()[-1]
+        assert rows.column('x') == [None if i % 3 == 0 else str(i) for i in range(10)]
+
+    def test_to_numpy_columns(self):
+        ht = hl.utils.range_table(10, n_partitions=4)
+        ht = ht.annotate(x=hl.or_missing(ht.idx % 2 == 0, ht.idx * 0.5),
+                         s=hl.str(ht.idx),
+                         locus=hl.locus('1', ht.idx + 1))
+        columns = ht.to_numpy_columns(partitions_per_batch=3)
+        assert columns['idx'].dtype == np.int32
+        assert list(columns['idx']) == list(range(10))
+        assert isinstance(columns['x'], np.ma.MaskedArray)
+        assert list(columns['x'].mask) == [i % 2 == 1 for i in range(10)]
+        assert list(columns['s']) == [str(i) for i in range(10)]
+        assert list(columns['locus']['position']) == list(range(1, 11))
+
+    def test_to_arrow(self):
+        pytest.importorskip('pyarrow')
+        ht = hl.utils.range_table(10, n_partitions=4)
+        ht = ht.annotate(x=hl.or_missing(ht.idx % 2 == 0, ht.idx), locus=hl.locus('1', ht.idx + 1))
+        at = ht.to_arrow(partitions_per_batch=3)
+        assert at.num_rows == 10
+        assert at.column('x').to_pylist() == [i if i % 2 == 0 else None for i in range(10)]
+        assert at.column('locus').to_pylist()[0] == {'contig': '1', 'position': 1}
+
     def test_take_localize_false(self):
         ht = hl.utils.range_table(10)
         assert hl.eval(ht.take(3, _localize=False)) == ht.take(3)
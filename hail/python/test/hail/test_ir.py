@@ -2,6 +2,7 @@ import unittest
 import hail as hl
 import hail.ir as ir
 from hail.expr import construct_expr
+from hail.ir.base_ir import set_ir_interning
 from hail.utils.java import Env
 from hail.utils import new_temp_file
 from .helpers import *
@@ -133,6 +134,61 @@ class ValueIRTests(unittest.TestCase):
         for x in self.value_irs():
             self.assertEqual(x, x.copy(*x.children))
 
+    def test_hash_matches_copies(self):
+        for x in self.value_irs():
+            self.assertEqual(hash(x), hash(x.copy(*x.children)))
+
+    def test_equal_unordered_literals(self):
+        s1 = ir.Literal(hl.tset(hl.tstr), {'a', 'b', 'c', 'd'})
+        s2 = ir.Literal(hl.tset(hl.tstr), {'d', 'c', 'b', 'a'})
+        self.assertEqual(s1, s2)
+        self.assertEqual(hash(s1), hash(s2))
+        d1 = ir.Literal(hl.tdict(hl.tstr, hl.tint32), {'a': 1, 'b': 2})
+        d2 = ir.Literal(hl.tdict(hl.tstr, hl.tint32), {'b': 2, 'a': 1})
+        self.assertEqual(d1, d2)
+        self.assertEqual(hash(d1), hash(d2))
+        self.assertNotEqual(d1, ir.Literal(hl.tdict(hl.tstr, hl.tint32), {'a': 1, 'b': 3}))
+
+    def test_render_cache(self):
+        for x in self.value_irs():
+            s = str(x)
+            self.assertEqual(s, str(x))
+            y = x.copy(*x.children)
+            self.assertIsNone(y._rendered)
+            self.assertEqual(s, str(y))
+
+    def test_render_cache_per_mode(self):
+        x = ir.I32(5)
+        y = ir.MakeArray([x, ir.I32(6)], hl.tarray(hl.tint32))
+        str(y)
+        # a node that is a JavaIR for the JVM is not inlined from the
+        # rendering cached by str
+        x._jir = object()
+        r = ir.Renderer(stop_at_jir=True)
+        self.assertEqual(r(y), '(MakeArray Array[Int32] (JavaIR m0) (I32 6))')
+        self.assertIs(r.jirs['m0'], x._jir)
+
+
+class IRInterningTests(unittest.TestCase):
+    def setUp(self):
+        set_ir_interning(True)
+
+    def tearDown(self):
+        set_ir_interning(False)
+
+    def test_closed_irs_shared(self):
+        x = ir.MakeArray([ir.I32(1), ir.Str('a')], None)
+        y = ir.MakeArray([ir.I32(1), ir.Str('a')], None)
+        self.assertIs(x, y)
+        self.assertIsNot(x, ir.MakeArray([ir.I32(2), ir.Str('a')], None))
+
+    def test_context_dependent_irs_not_shared(self):
+        x = ir.ApplyBinaryPrimOp('+', ir.Ref('x'), ir.I32(1))
+        y = ir.ApplyBinaryPrimOp('+', ir.Ref('x'), ir.I32(1))
+        self.assertIsNot(x, y)
+        self.assertEqual(x, y)
+        self.assertIs(x.children[1], y.children[1])
+
 
 class TableIRTests(unittest.TestCase):
 
@@ -277,3 +277,15 @@ class Tests(unittest.TestCase):
         f(1)
         with self.assertRaises(TypeError):
             f(1, 2)
+
+    def test_identity_fast_path(self):
+        @typecheck(a=nullable(int), b=oneof(int, str), c=anytype, d=transformed((int, lambda x: x + 1)))
+        def f(a, b, c=None, *, d=0):
+            return a, b, c, d
+
+        self.assertEqual(f(None, 'x'), (None, 'x', None, 1))
+        self.assertEqual(f(1, 2, c=[], d=2), (1, 2, [], 3))
+        with self.assertRaisesRegex(TypeError, "parameter 'b'"):
+            f(1, 2.0)
+        with self.assertRaisesRegex(TypeError, "parameter 'd'"):
+            f(1, 2, d='3')
@@ -1,12 +1,12 @@
 package is.hail.backend
 
-import is.hail.annotations.{Region, SafeRow}
+import is.hail.annotations.{Region, RegionValueBuilder, SafeRow}
 import is.hail.backend.spark.SparkBackend
-import is.hail.expr.ir.{Compilable, Compile, CompileAndEvaluate, ExecuteContext, IR, IRParser, MakeTuple, Pretty, TypeCheck}
+import is.hail.expr.ir.{Compilable, Compile, CompileAndEvaluate, ExecuteContext, IR, IRParser, Literal, MakeTuple, Pretty, TypeCheck}
 import is.hail.io.CodecSpec
 import is.hail.{HailContext, cxx}
 import is.hail.expr.JSONAnnotationImpex
-import is.hail.expr.types.physical.PTuple
+import is.hail.expr.types.physical.{PTuple, PType}
 import is.hail.expr.types.virtual.TVoid
 import is.hail.utils._
 import org.json4s.DefaultFormats
@@ -96,6 +96,29 @@ abstract class Backend {
     Serialization.write(Map("value" -> jsonValue, "timings" -> timings.value))(new DefaultFormats {})
   }
 
+  def executeEncode(ir: IR, codecString: String): (String, Array[Byte], String) = {
+    val codec = CodecSpec.fromShortString(codecString)
+    val t = ir.typ
+    val (value, timings) = execute(ir, optimize = true)
+    timings.logInfo()
+    val timingsJSON = Serialization.write(timings.value)(new DefaultFormats {})
+
+    if (t == TVoid)
+      ("Void", Array.empty[Byte], timingsJSON)
+    else {
+      val pt = PTuple(PType.canonical(t))
+      val bytes = Region.scoped { region =>
+        val rvb = new RegionValueBuilder(region)
+        rvb.start(pt)
+        rvb.startTuple()
+        rvb.addAnnotation(t, value)
+        rvb.endTuple()
+        codec.encode(pt, region, rvb.end())
+      }
+      (pt.parsableString(), bytes, timingsJSON)
+    }
+  }
+
   def encode(ir0: IR, codecString: String): (String, Array[Byte]) = {
     val codec = CodecSpec.fromShortString(codecString)
     val ir = lower(ir0, None, false)
@@ -127,6 +150,17 @@ abstract class Backend {
         pt.fields(0).typ.virtualType))
   }
 
+  def decodeLiteral(
+    ptypeString: String,
+    bytes: Array[Byte],
+    codecString: String
+  ): IR = Region.scoped { region =>
+    val codec = CodecSpec.fromShortString(codecString)
+    val pt = IRParser.parsePType(ptypeString).asInstanceOf[PTuple]
+    val t = pt.fields(0).typ.virtualType
+    Literal.coerce(t, SafeRow(pt, region, codec.decode(pt, bytes, region)).get(0))
+  }
+
   def compileComparisonBinary(op: String, codecName: String, l: String, r: String): Array[Byte] =
     cxx.Compile.compileComparison(
       op, CodecSpec.fromShortString(codecName), IRParser.parsePType(l), IRParser.parsePType(r))
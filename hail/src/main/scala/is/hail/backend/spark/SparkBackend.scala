@@ -15,6 +15,12 @@ import scala.reflect.ClassTag
 
 object SparkBackend {
   def executeJSON(ir: IR): String = HailContext.backend.executeJSON(ir)
+
+  def executeEncode(ir: IR, codecString: String): (String, Array[Byte], String) =
+    HailContext.backend.executeEncode(ir, codecString)
+
+  def decodeLiteral(ptypeString: String, bytes: Array[Byte], codecString: String): IR =
+    HailContext.backend.decodeLiteral(ptypeString, bytes, codecString)
 }
 
 class SparkBroadcastValue[T](bc: Broadcast[T]) extends BroadcastValue[T] with Serializable {
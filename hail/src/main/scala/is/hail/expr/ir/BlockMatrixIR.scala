@@ -107,7 +107,6 @@ case class BlockMatrixNativeReader(path: String) extends BlockMatrixReader {
 
 case class BlockMatrixBinaryReader(path: String, shape: IndexedSeq[Long], blockSize: Int) extends BlockMatrixReader {
   val IndexedSeq(nRows, nCols) = shape
-  BlockMatrixIR.checkFitsIntoArray(nRows, nCols)
 
   override lazy val fullType: BlockMatrixType = {
     val (tensorShape, isRowVector) = BlockMatrixIR.matrixShapeToTensorShape(nRows, nCols)
@@ -115,10 +114,8 @@ case class BlockMatrixBinaryReader(path: String, shape: IndexedSeq[Long], blockS
     BlockMatrixType(TFloat64(), tensorShape, isRowVector, blockSize)
   }
 
-  override def apply(hc: HailContext): BlockMatrix = {
-    val breezeMatrix = RichDenseMatrixDouble.importFromDoubles(hc, path, nRows.toInt, nCols.toInt, rowMajor = true)
-    BlockMatrix.fromBreezeMatrix(hc.sc, breezeMatrix, blockSize)
-  }
+  override def apply(hc: HailContext): BlockMatrix =
+    BlockMatrix.fromDoublesFile(hc, path, nRows, nCols, blockSize)
 }
 
 class BlockMatrixLiteral(value: BlockMatrix) extends BlockMatrixIR {
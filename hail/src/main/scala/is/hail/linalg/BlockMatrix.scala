@@ -7,6 +7,7 @@ import breeze.numerics.{abs => breezeAbs, log => breezeLog, pow => breezePow, sq
 import breeze.stats.distributions.{RandBasis, ThreadLocalRandomGenerator}
 import is.hail._
 import is.hail.annotations._
+import is.hail.backend.BroadcastValue
 import is.hail.expr.Parser
 import is.hail.expr.ir.{CompileAndEvaluate, ExecuteContext, IR, TableValue}
 import is.hail.expr.types._
@@ -119,6 +120,47 @@ object BlockMatrix {
     BlockMatrix(sc, gp, (gp, pi) => (gp.blockCoordinates(pi), localBlocksBc(pi).value))
   }
 
+  // reads a binary file of doubles in row-major order one band of block rows
+  // at a time, so the matrix may have more than Int.MaxValue entries
+  def fromDoublesFile(hc: HailContext, path: String, nRows: Long, nCols: Long, blockSize: Int): M = {
+    val gp = GridPartitioner(blockSize, nRows, nCols)
+    require(nCols * blockSize <= Int.MaxValue,
+      s"Number of values in a block row exceeds Int.MaxValue: ${ nCols * blockSize }")
+
+    val localBlocksBc = new Array[BroadcastValue[BDM[Double]]](gp.numPartitions)
+    hc.sFS.readFile(path) { is =>
+      val in = new DoubleInputBuffer(is, RichArray.defaultBufSize)
+      val band = new Array[Double]((nCols * blockSize).toInt)
+
+      var i = 0
+      while (i < gp.nBlockRows) {
+        val blockNRows = gp.blockRowNRows(i)
+        in.readDoubles(band, 0, (blockNRows * nCols).toInt)
+
+        var j = 0
+        while (j < gp.nBlockCols) {
+          val blockNCols = gp.blockColNCols(j)
+          val jOffset = j * blockSize
+          val data = new Array[Double](blockNRows * blockNCols)
+          var jj = 0
+          while (jj < blockNCols) {
+            var ii = 0
+            while (ii < blockNRows) {
+              data(jj * blockNRows + ii) = band((ii * nCols + jOffset + jj).toInt)
+              ii += 1
+            }
+            jj += 1
+          }
+          localBlocksBc(gp.coordinatesBlock(i, j)) = HailContext.backend.broadcast(new BDM[Double](blockNRows, blockNCols, data))
+          j += 1
+        }
+        i += 1
+      }
+    }
+
+    BlockMatrix(hc.sc, gp, (gp, pi) => (gp.blockCoordinates(pi), localBlocksBc(pi).value))
+  }
+
   def fromIRM(irm: IndexedRowMatrix): M =
     fromIRM(irm, defaultBlockSize)
 
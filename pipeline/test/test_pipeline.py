@@ -2,6 +2,7 @@ import unittest
 import os
 import subprocess as sp
 import tempfile
+import time
 
 from hailtop.pipeline import Pipeline, BatchBackend, LocalBackend, PipelineException
 
@@ -222,6 +223,98 @@ class LocalTests(unittest.TestCase):
 
             assert self.read(output_file.name) == "0\n1\n2"
 
+    def test_isolated_tasks_run_concurrently(self):
+        p = Pipeline(backend=LocalBackend(max_cpu=4))
+        for _ in range(4):
+            t = p.new_task()
+            t.command('sleep 1')
+        start = time.time()
+        p.run()
+        assert time.time() - start < 3
+
+    def test_failed_task_does_not_stop_independent_tasks(self):
+        with tempfile.NamedTemporaryFile('w') as output_file:
+            p = self.pipeline()
+            bad = p.new_task()
+            bad.command(f'false; echo "bad" > {bad.ofile}')
+            downstream = p.new_task()
+            downstream.command(f'cat {bad.ofile} > {downstream.ofile}')
+            p.write_output(downstream.ofile, output_file.name)
+
+            good = p.new_task()
+            good.command(f'echo "good" > {good.ofile}')
+            p.write_output(good.ofile, output_file.name + '.good')
+
+            try:
+                with self.assertRaises(sp.CalledProcessError):
+                    p.run()
+                assert self.read(output_file.name + '.good') == 'good'
+                assert self.read(output_file.name) == ''
+            finally:
+                os.remove(output_file.name + '.good')
+
+    def test_call_cache(self):
+        with tempfile.TemporaryDirectory() as cache_dir, \
+                tempfile.NamedTemporaryFile('w') as input_file, \
+                tempfile.NamedTemporaryFile('w') as runs_file, \
+                tempfile.NamedTemporaryFile('w') as output_file:
+            input_file.write('abc')
+            input_file.flush()
+
+            def run(upstream_command, input_path=input_file.name):
+                p = Pipeline(backend=LocalBackend(call_cache_dir=cache_dir))
+                input = p.read_input(input_path)
+                t1 = p.new_task()
+                t1.command(f'echo t1 >> {runs_file.name}')
+                t1.command(upstream_command.format(input=input, ofile=t1.ofile))
+                t2 = p.new_task()
+                t2.command(f'echo t2 >> {runs_file.name}')
+                t2.command(f'cat {t1.ofile} {t1.ofile} > {t2.ofile}')
+                p.write_output(t2.ofile, output_file.name)
+                p.run()
+                return self.read(output_file.name)
+
+            assert run('cat {input} > {ofile}') == 'abcabc'
+            assert run('cat {input} > {ofile}') == 'abcabc'
+            assert self.read(runs_file.name).split() == ['t1', 't2']
+
+            # a changed command reruns the task, and the task downstream of it
+            assert run('cat {input} {input} > {ofile}') == 'abcabcabcabc'
+            assert self.read(runs_file.name).split() == ['t1', 't2', 't1', 't2']
+
+            # so does a changed input
+            with tempfile.NamedTemporaryFile('w') as other_input_file:
+                other_input_file.write('abc')
+                other_input_file.flush()
+                assert run('cat {input} > {ofile}', other_input_file.name) == 'abcabc'
+                assert self.read(runs_file.name).split() == ['t1', 't2', 't1', 't2']
+                other_input_file.write('d')
+                other_input_file.flush()
+                assert run('cat {input} > {ofile}', other_input_file.name) == 'abcdabcd'
+                assert self.read(runs_file.name).split() == ['t1', 't2', 't1', 't2', 't1', 't2']
+
+    def test_call_cache_task_without_outputs(self):
+        with tempfile.TemporaryDirectory() as cache_dir, \
+                tempfile.NamedTemporaryFile('w') as runs_file:
+
+            def run(upstream_command):
+                p = Pipeline(backend=LocalBackend(call_cache_dir=cache_dir))
+                t1 = p.new_task()
+                t1.command(upstream_command)
+                t2 = p.new_task()
+                t2.depends_on(t1)
+                t2.command(f'echo t2 >> {runs_file.name}')
+                p.run()
+
+            # a task with no output files still runs against an empty cache
+            run('true')
+            run('true')
+            assert self.read(runs_file.name).split() == ['t2']
+
+            # a changed dependency that is not a resource reruns the task
+            run('echo changed')
+            assert self.read(runs_file.name).split() == ['t2', 't2']
+
     def test_select_tasks(self):
         p = self.pipeline()
         for i in range(3):